@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""Offline reward-abuse analytics over reward_transactions and game_sessions.
+
+Game sessions moved to game_sessions_archive by the session reaper are
+read too, unless --no-archive is given.
+
+Collections are streamed in columnar chunks (one pandas DataFrame per
+chunk) and folded into per-wallet and per-IP partial aggregates, so the
+full collections are never held in memory. Features are computed with
+vectorized numpy/pandas operations:
+
+  * claim inter-arrival times per wallet (count, mean, min, share of
+    claims arriving faster than a threshold)
+  * game session duration against levels_completed (sessions that are
+    faster per level than a human can play)
+  * wallets sharing client IPs, grouped into wallet/IP clusters
+
+    python abuse_analytics.py --since 2025-10-01 --output flagged.csv
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from reward_schema import MIGRATION_ID, SHORT_FIELDS, RewardStore, decode_value
+
+ROOT_DIR = Path(__file__).parent
+
+REWARD_COLUMNS = ["wallet_address", "client_ip", "amount", "created_at"]
+SESSION_COLUMNS = ["wallet_address", "start_time", "end_time", "levels_completed"]
+
+
+def iter_frames(collection, query: Dict, columns: List[str], sort: List, chunk_size: int = 500000) -> Iterator[pd.DataFrame]:
+    """Stream a collection as DataFrames of at most chunk_size rows.
+
+    Values are appended into per-column lists rather than per-row dicts,
+    which keeps the conversion to numpy cheap.
+    """
+    projection = {column: 1 for column in columns}
+    projection["_id"] = 0
+    cursor = collection.find(query, projection).sort(sort).batch_size(min(chunk_size, 100000))
+
+    buffers = {column: [] for column in columns}
+    rows = 0
+    for document in cursor:
+        for column in columns:
+            buffers[column].append(document.get(column))
+        rows += 1
+        if rows >= chunk_size:
+            yield pd.DataFrame(buffers)
+            buffers = {column: [] for column in columns}
+            rows = 0
+    if rows:
+        yield pd.DataFrame(buffers)
+
+
+def decode_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Rename and decode a chunk of compact reward rows into legacy columns"""
+    frame = frame.rename(columns=SHORT_FIELDS)
+    for column in ("wallet_address", "client_ip"):
+        decoded = {value: decode_value(column, value) for value in frame[column].unique()}
+        frame[column] = frame[column].map(decoded)
+    return frame
+
+
+def to_epoch_seconds(values: pd.Series) -> np.ndarray:
+    """Convert a datetime column (naive UTC or aware) to float epoch seconds"""
+    epoch = pd.Timestamp(0, tz="UTC")
+    return (pd.to_datetime(values, utc=True) - epoch).dt.total_seconds().to_numpy()
+
+
+class RewardFeatures:
+    """Per-wallet claim timing and per-IP sharing features.
+
+    Chunks must arrive sorted by (wallet_address, created_at) so claim
+    intervals can be taken with a single vectorized diff; the last claim
+    of each chunk is carried into the next.
+    """
+
+    def __init__(self, fast_interval_seconds: float = 360.0):
+        self.fast_interval_seconds = fast_interval_seconds
+        self.wallets: Optional[pd.DataFrame] = None
+        self.ips: Optional[pd.DataFrame] = None
+        self.pairs: List[pd.DataFrame] = []
+        self.pair_rows = 0
+        self.carry_wallet = None
+        self.carry_ts = None
+        self.rows = 0
+
+    def update(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        self.rows += len(frame)
+        wallets = frame["wallet_address"].to_numpy()
+        ts = to_epoch_seconds(frame["created_at"])
+        amounts = frame["amount"].to_numpy(dtype="float64")
+
+        previous_wallet = np.empty(len(frame), dtype=object)
+        previous_wallet[0] = self.carry_wallet
+        previous_wallet[1:] = wallets[:-1]
+        previous_ts = np.empty(len(frame))
+        previous_ts[0] = self.carry_ts if self.carry_ts is not None else np.nan
+        previous_ts[1:] = ts[:-1]
+
+        intervals = np.where(previous_wallet == wallets, ts - previous_ts, np.nan)
+        has_interval = ~np.isnan(intervals)
+        part = pd.DataFrame({
+            "wallet_address": wallets,
+            "claims": 1,
+            "amount": amounts,
+            "first_claim": ts,
+            "last_claim": ts,
+            "intervals": has_interval.astype("int64"),
+            "interval_sum": np.where(has_interval, intervals, 0.0),
+            "min_interval": intervals,
+            "fast_claims": (has_interval & (intervals < self.fast_interval_seconds)).astype("int64")
+        }).groupby("wallet_address").agg(self.wallet_aggregations())
+        self.wallets = part if self.wallets is None else self.merge(self.wallets, part, self.wallet_aggregations())
+
+        self.carry_wallet = wallets[-1]
+        self.carry_ts = ts[-1]
+
+        ip_part = pd.DataFrame({"client_ip": frame["client_ip"].fillna("unknown").to_numpy(), "ip_claims": 1, "ip_amount": amounts}) \
+            .groupby("client_ip").agg({"ip_claims": "sum", "ip_amount": "sum"})
+        self.ips = ip_part if self.ips is None else self.merge(self.ips, ip_part, {"ip_claims": "sum", "ip_amount": "sum"})
+
+        pairs = frame[["client_ip", "wallet_address"]].fillna({"client_ip": "unknown"}).drop_duplicates()
+        self.pairs.append(pairs)
+        self.pair_rows += len(pairs)
+        if self.pair_rows > 2 * max(len(self.wallets), 100000):
+            self.compact_pairs()
+
+    @staticmethod
+    def wallet_aggregations() -> Dict[str, str]:
+        return {
+            "claims": "sum",
+            "amount": "sum",
+            "first_claim": "min",
+            "last_claim": "max",
+            "intervals": "sum",
+            "interval_sum": "sum",
+            "min_interval": "min",
+            "fast_claims": "sum"
+        }
+
+    @staticmethod
+    def merge(left: pd.DataFrame, right: pd.DataFrame, aggregations: Dict[str, str]) -> pd.DataFrame:
+        return pd.concat([left, right]).groupby(level=0).agg(aggregations)
+
+    def compact_pairs(self) -> pd.DataFrame:
+        combined = pd.concat(self.pairs, ignore_index=True).drop_duplicates() if self.pairs else \
+            pd.DataFrame(columns=["client_ip", "wallet_address"])
+        self.pairs = [combined]
+        self.pair_rows = len(combined)
+        return combined
+
+    def wallet_features(self) -> pd.DataFrame:
+        features = self.wallets.copy() if self.wallets is not None else \
+            pd.DataFrame(columns=list(self.wallet_aggregations()), dtype="float64")
+        features["mean_interval"] = features["interval_sum"] / features["intervals"].replace(0, np.nan)
+        features["fast_claim_ratio"] = features["fast_claims"] / features["intervals"].replace(0, np.nan)
+
+        pairs = self.compact_pairs()
+        wallets_per_ip = pairs.groupby("client_ip")["wallet_address"].nunique()
+        pairs = pairs.assign(ip_wallets=pairs["client_ip"].map(wallets_per_ip).to_numpy())
+        shared = pairs.groupby("wallet_address").agg(ip_count=("client_ip", "nunique"), max_wallets_per_ip=("ip_wallets", "max"))
+        return features.join(shared, how="left")
+
+    def ip_features(self) -> pd.DataFrame:
+        pairs = self.compact_pairs()
+        wallets_per_ip = pairs.groupby("client_ip")["wallet_address"].nunique().rename("wallets")
+        if self.ips is None:
+            return wallets_per_ip.to_frame()
+        return self.ips.join(wallets_per_ip, how="left")
+
+
+class SessionFeatures:
+    """Per-wallet game session duration vs levels_completed"""
+
+    def __init__(self, min_seconds_per_level: float = 5.0):
+        self.min_seconds_per_level = min_seconds_per_level
+        self.wallets: Optional[pd.DataFrame] = None
+        self.rows = 0
+
+    def update(self, frame: pd.DataFrame) -> None:
+        if frame.empty:
+            return
+        self.rows += len(frame)
+        duration = to_epoch_seconds(frame["end_time"]) - to_epoch_seconds(frame["start_time"])
+        levels = pd.to_numeric(frame["levels_completed"], errors="coerce").fillna(0).to_numpy(dtype="float64")
+        with np.errstate(divide="ignore", invalid="ignore"):
+            per_level = np.where(levels > 0, duration / levels, np.nan)
+        impossible = (levels > 0) & ~(per_level >= self.min_seconds_per_level)
+
+        aggregations = {
+            "sessions": "sum",
+            "levels": "sum",
+            "play_seconds": "sum",
+            "impossible_sessions": "sum",
+            "min_seconds_per_level": "min"
+        }
+        part = pd.DataFrame({
+            "wallet_address": frame["wallet_address"].to_numpy(),
+            "sessions": 1,
+            "levels": levels,
+            "play_seconds": np.nan_to_num(duration),
+            "impossible_sessions": impossible.astype("int64"),
+            "min_seconds_per_level": per_level
+        }).groupby("wallet_address").agg(aggregations)
+        self.wallets = part if self.wallets is None else RewardFeatures.merge(self.wallets, part, aggregations)
+
+    def wallet_features(self) -> pd.DataFrame:
+        features = self.wallets.copy() if self.wallets is not None else pd.DataFrame(
+            columns=["sessions", "levels", "play_seconds", "impossible_sessions", "min_seconds_per_level"], dtype="float64"
+        )
+        features["impossible_session_ratio"] = features["impossible_sessions"] / features["sessions"]
+        return features
+
+
+def connected_clusters(pairs: pd.DataFrame) -> pd.Series:
+    """Label wallets by connected component of the wallet/IP graph.
+
+    Uses vectorized min-label propagation with pointer jumping, which
+    converges in a logarithmic number of passes for typical graphs.
+    """
+    if pairs.empty:
+        return pd.Series(dtype="int64", name="cluster")
+    wallet_codes, wallet_index = pd.factorize(pairs["wallet_address"])
+    ip_codes, _ = pd.factorize(pairs["client_ip"])
+    u = wallet_codes
+    v = ip_codes + len(wallet_index)
+    labels = np.arange(len(wallet_index) + ip_codes.max() + 1)
+
+    while True:
+        edge_min = np.minimum(labels[u], labels[v])
+        updated = labels.copy()
+        np.minimum.at(updated, u, edge_min)
+        np.minimum.at(updated, v, edge_min)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    return pd.Series(labels[:len(wallet_index)], index=wallet_index, name="cluster")
+
+
+def flag_suspicious(
+    rewards: RewardFeatures,
+    sessions: SessionFeatures,
+    fast_claim_ratio: float = 0.5,
+    min_intervals: int = 3,
+    impossible_session_ratio: float = 0.2,
+    shared_ip_wallets: int = 5,
+    min_cluster_wallets: int = 3
+) -> pd.DataFrame:
+    """Join features, flag wallets and mark suspicious wallet/IP clusters"""
+    features = rewards.wallet_features().join(sessions.wallet_features(), how="outer")
+    features = features.join(connected_clusters(rewards.compact_pairs()), how="left")
+
+    fast = (features["intervals"].fillna(0) >= min_intervals) & (features["fast_claim_ratio"].fillna(0) >= fast_claim_ratio)
+    impossible = features["impossible_session_ratio"].fillna(0) >= impossible_session_ratio
+    shared = features["max_wallets_per_ip"].fillna(0) >= shared_ip_wallets
+
+    features["flag_fast_claims"] = fast
+    features["flag_impossible_sessions"] = impossible
+    features["flag_shared_ip"] = shared
+    features["wallet_flagged"] = fast | impossible | shared
+
+    clusters = features.groupby("cluster").agg(
+        cluster_wallets=("claims", "size"),
+        cluster_amount=("amount", "sum"),
+        cluster_flagged_wallets=("wallet_flagged", "sum")
+    )
+    features = features.join(clusters, on="cluster")
+    features["cluster_suspicious"] = (
+        (features["cluster_wallets"] >= min_cluster_wallets) & (features["cluster_flagged_wallets"] > 0)
+    )
+    features["suspicious"] = features["wallet_flagged"] | features["cluster_suspicious"]
+    features.index.name = "wallet_address"
+    return features.sort_values(["suspicious", "cluster_amount", "amount"], ascending=False)
+
+
+def analyze(reward_frames: Iterable[pd.DataFrame], session_frames: Iterable[pd.DataFrame], **thresholds) -> pd.DataFrame:
+    """Run the full pipeline over streams of reward and session chunks"""
+    rewards = RewardFeatures(fast_interval_seconds=thresholds.pop("fast_interval_seconds", 360.0))
+    for frame in reward_frames:
+        rewards.update(frame)
+
+    sessions = SessionFeatures(min_seconds_per_level=thresholds.pop("min_seconds_per_level", 5.0))
+    for frame in session_frames:
+        sessions.update(frame)
+
+    return flag_suspicious(rewards, sessions, **thresholds)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Flag suspicious reward activity")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Only analyze activity from this date")
+    parser.add_argument("--chunk-size", type=int, default=500000, help="Rows per columnar chunk")
+    parser.add_argument("--fast-interval", type=float, default=360.0, help="Claims closer than this many seconds count as fast")
+    parser.add_argument("--min-seconds-per-level", type=float, default=5.0, help="Faster sessions are considered impossible")
+    parser.add_argument("--shared-ip-wallets", type=int, default=5, help="Flag wallets on IPs shared by this many wallets")
+    parser.add_argument("--no-archive", action="store_true", help="Skip sessions in game_sessions_archive")
+    parser.add_argument("--all", action="store_true", help="Write every wallet, not only suspicious ones")
+    parser.add_argument("-o", "--output", help="CSV output path, defaults to stdout")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from pymongo import MongoClient
+
+    load_dotenv(ROOT_DIR / '.env')
+    client = MongoClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+
+    reward_query = {"status": "completed"}
+    session_query = {"status": "completed"}
+    if args.since:
+        since = args.since if args.since.tzinfo else args.since.replace(tzinfo=timezone.utc)
+        reward_query["created_at"] = {"$gte": since}
+        session_query["start_time"] = {"$gte": since}
+
+    # Read whichever reward layout is live; see reward_schema.py
+    state = db.migrations.find_one({"_id": MIGRATION_ID})
+    reward_store = RewardStore(db, compact=bool(state and state.get("completed_at")))
+    reward_frames = iter_frames(
+        reward_store.collection, reward_store.query(reward_query),
+        [reward_store.field(column) for column in REWARD_COLUMNS],
+        reward_store.sort([("wallet_address", 1), ("created_at", 1)]), args.chunk_size
+    )
+
+    started = time.perf_counter()
+    rewards = RewardFeatures(fast_interval_seconds=args.fast_interval)
+    for frame in reward_frames:
+        if reward_store.compact:
+            frame = decode_frame(frame)
+        rewards.update(frame)
+        print(f"reward_transactions: {rewards.rows} rows", file=sys.stderr)
+
+    # Sessions older than the reaper's retention window only exist in the archive
+    session_collections = [db.game_sessions] if args.no_archive else [db.game_sessions, db.game_sessions_archive]
+    sessions = SessionFeatures(min_seconds_per_level=args.min_seconds_per_level)
+    for collection in session_collections:
+        for frame in iter_frames(collection, session_query, SESSION_COLUMNS,
+                                 [("_id", 1)], args.chunk_size):
+            sessions.update(frame)
+            print(f"{collection.name}: {sessions.rows} rows", file=sys.stderr)
+
+    report = flag_suspicious(rewards, sessions, shared_ip_wallets=args.shared_ip_wallets)
+    if not args.all:
+        report = report[report["suspicious"]]
+    report.to_csv(args.output or sys.stdout)
+
+    elapsed = time.perf_counter() - started
+    print(f"Flagged {int(report['suspicious'].sum())} wallets from {rewards.rows} claims and "
+          f"{sessions.rows} sessions in {elapsed:.1f}s", file=sys.stderr)
+    client.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Add rewards from before live rollups to the reward_rollups leaderboards.
+
+Servers roll up each claim as it completes, starting from the moment the
+first of them came up with rollups enabled. Run this once after that
+deploy so the windows and all-time totals also cover older rewards:
+
+    python backfill_rollups.py
+
+Only rewards created before that moment are counted, and the run is
+claimed atomically, so running it again or from several hosts at once
+never counts a reward twice.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from reward_rollups import BACKFILL_ID, backfill_rollups, ensure_rollup_indexes
+from reward_schema import RewardStore
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+async def run_backfill(args) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        await ensure_rollup_indexes(db)
+        backfilled = await backfill_rollups(db, await RewardStore.open(db), batch_size=args.batch_size)
+        marker = await db.migrations.find_one({"_id": BACKFILL_ID})
+    finally:
+        client.close()
+
+    if backfilled is None:
+        print("No server has started with live rollups yet; deploy them first, then rerun", file=sys.stderr)
+        return 1
+    if not backfilled and not marker.get("completed_at"):
+        print(f"Backfill already started at {marker['started_at']} and has not completed", file=sys.stderr)
+        return 1
+    if not backfilled:
+        print(f"Backfill completed at {marker['completed_at']}, nothing to add", file=sys.stderr)
+        return 0
+    print(f"Backfilled {backfilled} reward rollup buckets from rewards before {marker['cutoff']}", file=sys.stderr)
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Backfill reward rollups from older rewards")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Buckets written concurrently")
+    args = parser.parse_args()
+
+    return asyncio.run(run_backfill(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
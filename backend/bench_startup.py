@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Startup benchmark for the Purpe's Leap API.
+
+Measures, in fresh interpreter processes so nothing is cached:
+  * import time of the server module
+  * time from process start until the first successful response from
+    /api/ and from /api/ready (after warm start)
+
+Run from the backend directory against a local MongoDB:
+
+    MONGO_URL=mongodb://localhost:27017 DB_NAME=purpe_bench python bench_startup.py --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent
+
+IMPORT_SNIPPET = (
+    "import time; started = time.perf_counter(); import server; "
+    "print(time.perf_counter() - started)"
+)
+
+def bench_env() -> dict:
+    """Environment for child processes, with local defaults"""
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "purpe_bench")
+    env.setdefault("JWT_SECRET_KEY", "bench")
+    env.setdefault("PYTHONDONTWRITEBYTECODE", "1")
+    return env
+
+def free_port() -> int:
+    """Pick an unused local TCP port"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_import(env: dict) -> float:
+    """Seconds spent importing the server module in a fresh interpreter"""
+    output = subprocess.check_output(
+        [sys.executable, "-c", IMPORT_SNIPPET], cwd=ROOT_DIR, env=env
+    )
+    return float(output.decode().strip().splitlines()[-1])
+
+def wait_for(url: str, deadline: float) -> bool:
+    """Poll url until it returns 200 or the deadline passes"""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    return False
+
+def measure_first_response(env: dict, timeout: float) -> dict:
+    """Seconds from process spawn until /api/ and /api/ready answer"""
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}/api"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:create_app", "--factory",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env
+    )
+    try:
+        deadline = started + timeout
+        if not wait_for(f"{base_url}/", deadline):
+            raise RuntimeError("Server did not answer /api/ before timeout")
+        first_response = time.perf_counter() - started
+        if not wait_for(f"{base_url}/ready", deadline):
+            raise RuntimeError("Server did not become ready before timeout")
+        ready = time.perf_counter() - started
+        return {"first_response": first_response, "ready": ready}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def summarize(name: str, samples: list) -> None:
+    """Print median/min/max for a list of samples in milliseconds"""
+    millis = [sample * 1000 for sample in samples]
+    print(f"{name:<20} median {statistics.median(millis):8.1f} ms   "
+          f"min {min(millis):8.1f} ms   max {max(millis):8.1f} ms")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure API cold start")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts to measure")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for each server")
+    parser.add_argument("--import-only", action="store_true", help="Skip the server start benchmark")
+    args = parser.parse_args()
+
+    env = bench_env()
+    imports, first_responses, readies = [], [], []
+    for _ in range(args.runs):
+        imports.append(measure_import(env))
+        if not args.import_only:
+            result = measure_first_response(env, args.timeout)
+            first_responses.append(result["first_response"])
+            readies.append(result["ready"])
+
+    print(f"Cold start benchmark ({args.runs} runs, python {sys.version.split()[0]})")
+    summarize("import server", imports)
+    if first_responses:
+        summarize("first response", first_responses)
+        summarize("ready", readies)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
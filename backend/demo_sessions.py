@@ -0,0 +1,136 @@
+"""In-memory game sessions for demo users.
+
+Demo users never earn rewards, so their sessions are kept in a bounded
+LRU with a TTL instead of being written to Mongo. A configurable sample
+of completed demo sessions is buffered and written to
+``db.demo_game_sessions`` in batches by a background task, off the
+request path.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class DemoSessionStore:
+    """Bounded, TTL'd store of demo game sessions"""
+
+    def __init__(
+        self,
+        max_sessions: int = 100000,
+        ttl_seconds: int = 7200,
+        sample_rate: float = 0.0,
+        flush_interval: float = 30.0,
+        max_buffered: int = 10000
+    ):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.sample_rate = sample_rate
+        self.flush_interval = flush_interval
+        self.sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self.sampled = deque(maxlen=max_buffered)
+        self.metrics = {"started": 0, "completed": 0, "evicted": 0, "expired": 0, "persisted": 0}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls) -> "DemoSessionStore":
+        return cls(
+            max_sessions=int(os.getenv("DEMO_SESSION_CACHE_SIZE", "100000")),
+            ttl_seconds=int(os.getenv("DEMO_SESSION_TTL_SECONDS", "7200")),
+            sample_rate=float(os.getenv("DEMO_SESSION_SAMPLE_RATE", "0.0"))
+        )
+
+    def evict_expired(self) -> None:
+        """Drop expired sessions from the cold end of the LRU"""
+        now = time.monotonic()
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session["expires"] > now:
+                break
+            del self.sessions[session_id]
+            self.metrics["expired"] += 1
+
+    def start(self, wallet_address: str) -> Dict:
+        """Create a demo session"""
+        self.evict_expired()
+        session = {
+            "id": str(uuid.uuid4()),
+            "wallet_address": wallet_address,
+            "start_time": datetime.now(timezone.utc),
+            "status": "active",
+            "current_level": 1,
+            "score": 0,
+            "lives": 3,
+            "demo_mode": True,
+            "expires": time.monotonic() + self.ttl_seconds
+        }
+        self.sessions[session["id"]] = session
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+            self.metrics["evicted"] += 1
+        self.metrics["started"] += 1
+        return session
+
+    def complete(self, session_id: str, wallet_address: str, final_score: int, levels_completed: int) -> Optional[Dict]:
+        """Mark a demo session completed, returning it if it was still held"""
+        session = self.sessions.get(session_id)
+        if session is None or session["wallet_address"] != wallet_address:
+            return None
+        del self.sessions[session_id]
+
+        session.update({
+            "status": "completed",
+            "end_time": datetime.now(timezone.utc),
+            "final_score": final_score,
+            "levels_completed": levels_completed
+        })
+        self.metrics["completed"] += 1
+        if self.sample_rate and random.random() < self.sample_rate:
+            self.sampled.append({key: value for key, value in session.items() if key != "expires"})
+        return session
+
+    def start_flusher(self, db) -> None:
+        if not self.sample_rate:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run_flusher(db))
+
+    async def stop_flusher(self, db) -> None:
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+        try:
+            await self.flush(db)
+        except Exception as e:
+            logger.error(f"Failed to persist sampled demo sessions: {e}")
+
+    async def run_flusher(self, db) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush(db)
+            except Exception as e:
+                logger.error(f"Failed to persist sampled demo sessions: {e}")
+
+    async def flush(self, db) -> int:
+        """Write buffered sampled sessions in one batch"""
+        if not self.sampled:
+            return 0
+        batch = list(self.sampled)
+        self.sampled.clear()
+        await db.demo_game_sessions.insert_many(batch, ordered=False)
+        self.metrics["persisted"] += len(batch)
+        return len(batch)
@@ -0,0 +1,99 @@
+"""Per-wallet cache of reward eligibility decisions.
+
+check_reward_eligibility is polled by the reward dashboard and run again
+on every game start and completion. Most of those calls return the same
+answer as the last one. This module keeps the wallet-scoped part of the
+decision (PURPE balance, daily limit and minimum interval) so that the
+balance lookup is skipped when nothing has changed:
+
+* An ineligible decision with a ``next_eligible`` time cannot change
+  before then except through a claim, so it is held until that moment.
+* Eligible decisions, and ineligible ones without a known end such as an
+  insufficient balance, are held for a short TTL.
+* Claims and observed balance changes drop the wallet's entry right away.
+
+IP limits depend on the request's address and on other wallets' claims,
+so they are not cached here and are checked on every call.
+"""
+
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+
+class EligibilityCache:
+    """Bounded LRU of eligibility decisions keyed by wallet address"""
+
+    def __init__(self, max_entries: int = 100000, positive_ttl: float = 30.0, negative_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        # Bumped on every invalidation so that a decision computed across one is not stored
+        self.generation = 0
+        self.metrics = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "evicted": 0}
+
+    @classmethod
+    def from_env(cls) -> "EligibilityCache":
+        return cls(
+            max_entries=int(os.getenv("ELIGIBILITY_CACHE_SIZE", "100000")),
+            positive_ttl=float(os.getenv("ELIGIBILITY_POSITIVE_TTL_SECONDS", "30")),
+            negative_ttl=float(os.getenv("ELIGIBILITY_NEGATIVE_TTL_SECONDS", "30"))
+        )
+
+    def expires_at(self, decision: Dict, now: float) -> float:
+        next_eligible = decision.get("next_eligible")
+        if not decision["eligible"] and next_eligible:
+            return datetime.fromisoformat(next_eligible).timestamp()
+        return now + (self.positive_ttl if decision["eligible"] else self.negative_ttl)
+
+    def get(self, wallet_address: str, now: Optional[float] = None) -> Optional[Dict]:
+        """The wallet's cached decision, or None if it must be recomputed"""
+        entry = self.entries.get(wallet_address)
+        if entry is None:
+            self.metrics["misses"] += 1
+            return None
+        if entry["expires"] <= (now or time.time()):
+            del self.entries[wallet_address]
+            self.metrics["expired"] += 1
+            self.metrics["misses"] += 1
+            return None
+        self.entries.move_to_end(wallet_address)
+        self.metrics["hits"] += 1
+        return dict(entry["decision"])
+
+    def put(self, wallet_address: str, decision: Dict, generation: int, balance: Optional[float] = None, now: Optional[float] = None) -> None:
+        """Store a decision computed when the cache was at ``generation``"""
+        if generation != self.generation:
+            return
+        now = now or time.time()
+        self.entries[wallet_address] = {
+            "decision": dict(decision),
+            "balance": balance,
+            "expires": self.expires_at(decision, now)
+        }
+        self.entries.move_to_end(wallet_address)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.metrics["evicted"] += 1
+
+    def invalidate(self, wallet_address: str) -> None:
+        self.generation += 1
+        if self.entries.pop(wallet_address, None) is not None:
+            self.metrics["invalidated"] += 1
+
+    def observe_balance(self, wallet_address: str, balance: float) -> None:
+        """Drop the wallet's decision if its balance differs from the one it was based on"""
+        entry = self.entries.get(wallet_address)
+        if entry is not None and entry["balance"] != balance:
+            self.invalidate(wallet_address)
+
+    def stats(self) -> Dict:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return {
+            "entries": len(self.entries),
+            **self.metrics,
+            "hit_rate": round(self.metrics["hits"] / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Export reward_transactions as NDJSON or CSV.
+
+Streams straight from MongoDB with keyset pagination, so memory use does
+not grow with the size of the export. Every row carries a cursor; pass
+the last one received to --cursor to resume an interrupted export.
+
+    python export_rewards.py --format csv --start 2025-10-01 --gzip -o rewards.csv.gz
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from exports import (
+    EXPORT_FORMATS,
+    build_export_query,
+    iter_encoded,
+    iter_export_lines,
+    iter_reward_transactions
+)
+from reward_schema import RewardStore
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+def parse_date(value: str) -> datetime:
+    """Parse an ISO date or datetime, assuming UTC"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+async def run_export(args) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    output = open(args.output, "ab" if args.cursor else "wb") if args.output else sys.stdout.buffer
+    written = 0
+    try:
+        # Read the collection the servers use, compact once migrated
+        rewards = await RewardStore.open(db)
+        query = build_export_query(args.start, args.end, args.wallet, args.ip)
+        documents = iter_reward_transactions(
+            db, query, rewards, cursor=args.cursor, page_size=args.page_size, limit=args.limit
+        )
+        async for chunk in iter_encoded(iter_export_lines(documents, args.format, header=not args.cursor), compress=args.gzip):
+            output.write(chunk)
+            written += len(chunk)
+        output.flush()
+    finally:
+        if args.output:
+            output.close()
+        client.close()
+
+    print(f"Exported {written} bytes", file=sys.stderr)
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export reward transactions")
+    parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output")
+    parser.add_argument("--start", type=parse_date, help="Include rows created at or after this time")
+    parser.add_argument("--end", type=parse_date, help="Include rows created before this time")
+    parser.add_argument("--wallet", help="Only rows for this wallet address")
+    parser.add_argument("--ip", help="Only rows from this client IP")
+    parser.add_argument("--cursor", help="Resume after the row with this cursor (appends to --output)")
+    parser.add_argument("--limit", type=int, help="Stop after this many rows")
+    parser.add_argument("--page-size", type=int, default=1000, help="Rows fetched per query")
+    parser.add_argument("-o", "--output", help="Output file, defaults to stdout")
+    args = parser.parse_args()
+
+    return asyncio.run(run_export(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
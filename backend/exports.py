@@ -0,0 +1,202 @@
+"""Streaming exports of reward_transactions.
+
+Rows are read page by page with keyset pagination on (created_at, _id),
+so memory stays constant however large the export is, and every row
+carries an opaque cursor from which an interrupted export can resume.
+"""
+
+import base64
+import csv
+import io
+import json
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Optional
+
+from reward_schema import RewardStore, ensure_compact_indexes
+
+EXPORT_FIELDS = [
+    "id",
+    "wallet_address",
+    "client_ip",
+    "amount",
+    "reward_type",
+    "transaction_signature",
+    "payout_status",
+    "status",
+    "demo_mode",
+    "created_at"
+]
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+
+def encode_cursor(created_at: datetime, object_id) -> str:
+    """Encode a (created_at, _id) position as an opaque token"""
+    payload = json.dumps({"t": created_at.isoformat(), "id": str(object_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict:
+    """Decode a cursor token back into its (created_at, _id) position.
+
+    Legacy rows are keyed by ObjectId and compact rows by their reward UUID.
+    """
+    from bson import ObjectId
+
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if ObjectId.is_valid(payload["id"]):
+            object_id = ObjectId(payload["id"])
+        else:
+            object_id = str(uuid.UUID(payload["id"]))
+        return {"created_at": datetime.fromisoformat(payload["t"]), "_id": object_id}
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def build_export_query(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    wallet_address: Optional[str] = None,
+    client_ip: Optional[str] = None
+) -> Dict:
+    """Build the Mongo filter for an export"""
+    query: Dict = {}
+    if wallet_address:
+        query["wallet_address"] = wallet_address
+    if client_ip:
+        query["client_ip"] = client_ip
+    if start or end:
+        query["created_at"] = {}
+        if start:
+            query["created_at"]["$gte"] = start
+        if end:
+            query["created_at"]["$lt"] = end
+    return query
+
+
+def after_cursor(query: Dict, position: Dict) -> Dict:
+    """Restrict query to rows strictly after a keyset position"""
+    return {"$and": [query, {"$or": [
+        {"created_at": {"$gt": position["created_at"]}},
+        {"created_at": position["created_at"], "_id": {"$gt": position["_id"]}}
+    ]}]}
+
+
+def before_cursor(query: Dict, position: Dict) -> Dict:
+    """Restrict query to rows strictly before a keyset position, for newest-first pages"""
+    return {"$and": [query, {"created_at": {"$lte": position["created_at"]}}, {"$or": [
+        {"created_at": {"$lt": position["created_at"]}},
+        {"created_at": position["created_at"], "_id": {"$lt": position["_id"]}}
+    ]}]}
+
+
+async def ensure_export_indexes(db, rewards: RewardStore) -> None:
+    """Indexes backing keyset scans, unfiltered or by wallet or IP"""
+    if rewards.compact or rewards.dual_write:
+        await ensure_compact_indexes(db)
+    if rewards.compact:
+        return
+    await db.reward_transactions.create_index([("created_at", 1), ("_id", 1)])
+    await db.reward_transactions.create_index([("wallet_address", 1), ("created_at", 1), ("_id", 1)])
+    await db.reward_transactions.create_index([("client_ip", 1), ("created_at", 1), ("_id", 1)])
+
+
+async def iter_reward_transactions(
+    db,
+    query: Dict,
+    rewards: RewardStore,
+    cursor: Optional[str] = None,
+    page_size: int = 1000,
+    limit: Optional[int] = None
+) -> AsyncIterator[Dict]:
+    """Yield matching rows in (created_at, _id) order, one page in memory at a time"""
+    position = decode_cursor(cursor) if cursor else None
+    remaining = limit
+
+    while remaining is None or remaining > 0:
+        size = page_size if remaining is None else min(page_size, remaining)
+        page_query = after_cursor(query, position) if position else query
+        count = 0
+
+        async for document in rewards.find(
+            page_query, EXPORT_FIELDS, sort=[("created_at", 1), ("_id", 1)], limit=size, batch_size=size
+        ):
+            position = {"created_at": document["created_at"], "_id": document["_id"]}
+            count += 1
+            yield document
+
+        if remaining is not None:
+            remaining -= count
+        if count < size:
+            return
+
+
+def export_row(document: Dict) -> Dict:
+    """Convert a stored document to an exported row with its resume cursor"""
+    row = {field: document.get(field) for field in EXPORT_FIELDS}
+    created_at = document["created_at"]
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    row["created_at"] = created_at.isoformat()
+    row["cursor"] = encode_cursor(document["created_at"], document["_id"])
+    return row
+
+
+async def iter_export_lines(documents: AsyncIterator[Dict], export_format: str, header: bool = True) -> AsyncIterator[str]:
+    """Serialize rows as NDJSON lines or CSV records.
+
+    Resumed CSV exports should pass header=False so the appended output
+    remains one valid file.
+    """
+    if export_format == "ndjson":
+        async for document in documents:
+            yield json.dumps(export_row(document), separators=(",", ":")) + "\n"
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS + ["cursor"])
+    async for document in documents:
+        row = export_row(document)
+        writer.writerow([row[field] for field in EXPORT_FIELDS + ["cursor"]])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def iter_encoded(lines: AsyncIterator[str], compress: bool = False, flush_bytes: int = 64 * 1024) -> AsyncIterator[bytes]:
+    """Encode lines into chunks of roughly flush_bytes, optionally gzipped"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    pending = []
+    pending_size = 0
+
+    async for line in lines:
+        data = line.encode()
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= flush_bytes:
+            chunk = b"".join(pending)
+            pending, pending_size = [], 0
+            if compressor:
+                chunk = compressor.compress(chunk)
+            if chunk:
+                yield chunk
+
+    chunk = b"".join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
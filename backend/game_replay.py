@@ -0,0 +1,467 @@
+"""Server-side replay validation of Frogger game sessions.
+
+The client records the player's hops in a compact binary input log and
+submits it with ``/api/game/complete``. The server replays the log
+through a deterministic copy of the game rules and grants rewards on the
+replayed score and level count, never on the values the client reports.
+
+Game rules (mirrored step for step by GameSimulation in
+frontend/src/lib/replay.js, which drives the client):
+    * The game advances in 50 ms ticks. Each tick applies the hops logged
+      for that tick, moves every obstacle, then checks collisions.
+    * Obstacle start positions come from a xorshift32 stream seeded by the
+      per-session seed issued by ``/api/game/start``.
+    * Touching a dangerous obstacle costs a life and resets the frog;
+      riding a lily pad or log carries the frog along.
+    * Reaching the top scores 1000 plus a time bonus of
+      max(0, 5000 - 50 ms * ticks spent on the level).
+
+Input log format, version 1 (all varints are unsigned LEB128):
+
+    magic         2 bytes   b"PL"
+    version       1 byte    1
+    seed          4 bytes   uint32, little endian
+    event count   varint
+    events        varint    (ticks since previous event << 2) | direction
+    tail          varint    ticks from the last event to the end of play
+
+Directions are 0 up, 1 down, 2 left and 3 right. A typical two-level game
+encodes in well under a kilobyte.
+
+Logs are simulated in batches: every session in a batch advances in
+lockstep, with all frogs and obstacles held in NumPy arrays, so the cost
+of a tick is shared by the whole batch. ReplayValidator gathers
+concurrent requests into such batches and runs them in a process pool.
+"""
+
+import asyncio
+import logging
+import os
+import struct
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"PL"
+VERSION = 1
+HEADER = struct.Struct("<2sBI")
+
+UP, DOWN, LEFT, RIGHT = range(4)
+
+TICK_MS = 50
+MAX_REPLAY_TICKS = 30 * 60 * 1000 // TICK_MS
+MAX_REPLAY_EVENTS = 20000
+
+GAME_WIDTH = 800
+GAME_HEIGHT = 600
+FROG_SIZE = 30
+GRID_SIZE = 40
+OBSTACLE_HEIGHT = 30
+START_LIVES = 3
+START_POSITION = (GAME_WIDTH / 2 - FROG_SIZE / 2, GAME_HEIGHT - 80)
+RESET_POSITION = (GAME_WIDTH / 2, GAME_HEIGHT - 50)
+GOAL_Y = 50
+SAFE_OBSTACLES = ("lily_pad", "log")
+
+# Lanes per level as (type, y, speed, width, spacing), matching LEVEL_LANES in replay.js
+LEVELS = {
+    1: [
+        ("lily_pad", 200, 1, 60, 120),
+        ("dragonfly", 160, 2, 40, 180),
+        ("log", 240, -1.5, 100, 200),
+        ("lily_pad", 280, 0.8, 60, 140)
+    ],
+    2: [
+        ("fish", 180, 2.5, 50, 160),
+        ("turtle", 220, -1.8, 70, 200),
+        ("crocodile", 260, 3, 80, 220),
+        ("log", 300, -2, 120, 180),
+        ("fish", 340, 2.8, 50, 140)
+    ]
+}
+LEVEL_COUNT = len(LEVELS)
+
+
+class InvalidReplay(ValueError):
+    """Raised when an input log cannot be decoded"""
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise InvalidReplay("Truncated input log")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+        if shift > 35:
+            raise InvalidReplay("Varint too long")
+
+
+def encode_replay(seed: int, events: List[Tuple[int, int]], end_tick: int) -> bytes:
+    """Encode (tick, direction) events, in tick order, as an input log"""
+    out = bytearray(HEADER.pack(MAGIC, VERSION, seed))
+    _write_varint(out, len(events))
+    previous = 0
+    for tick, direction in events:
+        _write_varint(out, (tick - previous) << 2 | direction)
+        previous = tick
+    _write_varint(out, end_tick - previous)
+    return bytes(out)
+
+
+def decode_replay(data: bytes) -> Tuple[int, np.ndarray, np.ndarray, int]:
+    """Decode an input log into (seed, event ticks, event directions, end tick)"""
+    if len(data) < HEADER.size:
+        raise InvalidReplay("Input log too short")
+    magic, version, seed = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise InvalidReplay("Unsupported input log format")
+
+    count, offset = _read_varint(data, HEADER.size)
+    if count > MAX_REPLAY_EVENTS:
+        raise InvalidReplay("Too many input events")
+    ticks = np.empty(count, dtype=np.int64)
+    directions = np.empty(count, dtype=np.int8)
+    tick = 0
+    for index in range(count):
+        value, offset = _read_varint(data, offset)
+        tick += value >> 2
+        ticks[index] = tick
+        directions[index] = value & 3
+    tail, offset = _read_varint(data, offset)
+    end_tick = tick + tail
+    if offset != len(data):
+        raise InvalidReplay("Trailing bytes after input log")
+    if end_tick > MAX_REPLAY_TICKS:
+        raise InvalidReplay("Input log is longer than a game can last")
+    return seed, ticks, directions, end_tick
+
+
+def _level_table() -> Dict[str, np.ndarray]:
+    """Per-level obstacle layout padded to a common obstacle count"""
+    layouts = {}
+    for level, lanes in LEVELS.items():
+        rows = []
+        for lane_type, y, speed, width, spacing in lanes:
+            for index in range(GAME_WIDTH // spacing + 2):
+                rows.append((index * spacing, spacing, y, speed, width, lane_type not in SAFE_OBSTACLES))
+        layouts[level] = rows
+
+    size = max(len(rows) for rows in layouts.values())
+    table = {
+        name: np.zeros((LEVEL_COUNT + 1, size), dtype=np.float64)
+        for name in ("base", "spacing", "y", "speed", "width")
+    }
+    table["dangerous"] = np.zeros((LEVEL_COUNT + 1, size), dtype=bool)
+    table["valid"] = np.zeros((LEVEL_COUNT + 1, size), dtype=bool)
+    for level, rows in layouts.items():
+        for column, (base, spacing, y, speed, width, dangerous) in enumerate(rows):
+            table["base"][level, column] = base
+            table["spacing"][level, column] = spacing
+            table["y"][level, column] = y
+            table["speed"][level, column] = speed
+            table["width"][level, column] = width
+            table["dangerous"][level, column] = dangerous
+            table["valid"][level, column] = True
+    return table
+
+
+LEVEL_TABLE = _level_table()
+LANE_TOP = LEVEL_TABLE["y"][LEVEL_TABLE["valid"]].min()
+LANE_BOTTOM = LEVEL_TABLE["y"][LEVEL_TABLE["valid"]].max() + OBSTACLE_HEIGHT
+
+
+def level_seeds(seeds: np.ndarray, level: int) -> np.ndarray:
+    """Per-level xorshift32 state derived from the session seeds"""
+    state = (seeds.astype(np.uint64) ^ np.uint64((level * 0x9E3779B9) & 0xFFFFFFFF)).astype(np.uint32)
+    state[state == 0] = 1
+    return state
+
+
+def initial_obstacle_x(seeds: np.ndarray, level: int) -> np.ndarray:
+    """Starting x of every obstacle of a level, one row per session"""
+    state = level_seeds(seeds, level)
+    base = LEVEL_TABLE["base"][level]
+    spacing = LEVEL_TABLE["spacing"][level]
+    x = np.zeros((len(seeds), base.size), dtype=np.float64)
+    for column in range(int(LEVEL_TABLE["valid"][level].sum())):
+        state ^= state << np.uint32(13)
+        state ^= state >> np.uint32(17)
+        state ^= state << np.uint32(5)
+        x[:, column] = base[column] - (state / 4294967296.0) * spacing[column]
+    return x
+
+
+class _Batch:
+    """Lockstep simulation state of a batch of sessions"""
+
+    def __init__(self, seeds: np.ndarray, ticks: List[np.ndarray], directions: List[np.ndarray], end_ticks: np.ndarray):
+        count = len(seeds)
+        self.rows = np.arange(count)
+        self.seeds = seeds
+        self.end_tick = end_ticks
+        width = max([len(events) for events in ticks] + [0]) + 1
+        self.event_tick = np.full((count, width), np.iinfo(np.int64).max, dtype=np.int64)
+        self.event_direction = np.zeros((count, width), dtype=np.int8)
+        for row, (session_ticks, session_directions) in enumerate(zip(ticks, directions)):
+            self.event_tick[row, :len(session_ticks)] = session_ticks
+            self.event_direction[row, :len(session_directions)] = session_directions
+        self.next_event = np.zeros(count, dtype=np.int64)
+
+        self.frog_x = np.full(count, START_POSITION[0])
+        self.frog_y = np.full(count, float(START_POSITION[1]))
+        self.level = np.ones(count, dtype=np.int64)
+        self.level_start = np.zeros(count, dtype=np.int64)
+        self.lives = np.full(count, START_LIVES, dtype=np.int64)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.levels_completed = np.zeros(count, dtype=np.int64)
+        self.finished = np.zeros(count, dtype=bool)
+        self.obstacle_x = initial_obstacle_x(seeds, 1)
+        self._load_level_layout(np.arange(count), 1)
+
+    def _load_level_layout(self, rows: np.ndarray, level: int) -> None:
+        if not hasattr(self, "obstacle_y"):
+            shape = self.obstacle_x.shape
+            self.obstacle_y = np.zeros(shape)
+            self.obstacle_speed = np.zeros(shape)
+            self.obstacle_width = np.zeros(shape)
+            self.obstacle_dangerous = np.zeros(shape, dtype=bool)
+            self.obstacle_valid = np.zeros(shape, dtype=bool)
+        self.obstacle_y[rows] = LEVEL_TABLE["y"][level]
+        self.obstacle_speed[rows] = LEVEL_TABLE["speed"][level]
+        self.obstacle_width[rows] = LEVEL_TABLE["width"][level]
+        self.obstacle_dangerous[rows] = LEVEL_TABLE["dangerous"][level]
+        self.obstacle_valid[rows] = LEVEL_TABLE["valid"][level]
+
+    def keep(self, mask: np.ndarray) -> None:
+        """Drop sessions that are no longer being simulated"""
+        for name, value in list(vars(self).items()):
+            if isinstance(value, np.ndarray):
+                setattr(self, name, value[mask])
+
+    def apply_events(self, tick: int, active: np.ndarray) -> None:
+        index = np.arange(len(self.rows))
+        while True:
+            due = active & (self.event_tick[index, self.next_event] == tick)
+            if not due.any():
+                return
+            direction = self.event_direction[index, self.next_event]
+            up = due & (direction == UP)
+            down = due & (direction == DOWN)
+            left = due & (direction == LEFT)
+            right = due & (direction == RIGHT)
+            self.frog_y[up] = np.maximum(0, self.frog_y[up] - GRID_SIZE)
+            self.score[up] += 10
+            self.frog_y[down] = np.minimum(GAME_HEIGHT - FROG_SIZE, self.frog_y[down] + GRID_SIZE)
+            self.frog_x[left] = np.maximum(0, self.frog_x[left] - GRID_SIZE)
+            self.frog_x[right] = np.minimum(GAME_WIDTH - FROG_SIZE, self.frog_x[right] + GRID_SIZE)
+            self.next_event[due] += 1
+
+    def move_obstacles(self) -> None:
+        # Obstacles of sessions that are no longer active move too; it is
+        # cheaper than masking them out and their positions are never read
+        x = self.obstacle_x
+        x += self.obstacle_speed
+        np.copyto(x, -self.obstacle_width, where=x > GAME_WIDTH + self.obstacle_width)
+        np.copyto(x, GAME_WIDTH, where=x < -self.obstacle_width)
+
+    def check_collisions(self, tick: int, active: np.ndarray) -> None:
+        # Only frogs inside the band of obstacle lanes can touch anything
+        rows = np.flatnonzero(active & (self.frog_y < LANE_BOTTOM) & (self.frog_y + FROG_SIZE > LANE_TOP))
+        hit = np.zeros(len(active), dtype=bool)
+        if len(rows):
+            frog_x = self.frog_x[rows, None]
+            frog_y = self.frog_y[rows, None]
+            obstacle_x = self.obstacle_x[rows]
+            obstacle_y = self.obstacle_y[rows]
+            overlap = (
+                self.obstacle_valid[rows]
+                & (frog_x < obstacle_x + self.obstacle_width[rows])
+                & (frog_x + FROG_SIZE > obstacle_x)
+                & (frog_y < obstacle_y + OBSTACLE_HEIGHT)
+                & (frog_y + FROG_SIZE > obstacle_y)
+            )
+            dangerous = self.obstacle_dangerous[rows]
+            hit[rows] = (overlap & dangerous).any(axis=1)
+            carry = np.where(overlap & ~dangerous, self.obstacle_speed[rows], 0.0).sum(axis=1)
+            self.frog_x[rows] = np.clip(self.frog_x[rows] + carry, 0, GAME_WIDTH - FROG_SIZE)
+
+        # Lose a life and start over at the bottom
+        self.lives[hit] -= 1
+        self.frog_x[hit] = RESET_POSITION[0]
+        self.frog_y[hit] = RESET_POSITION[1]
+        game_over = hit & (self.lives <= 0)
+        self.levels_completed[game_over] = self.level[game_over] - 1
+        self.finished |= game_over
+
+        # Reaching the top
+        cleared = active & ~hit & (self.frog_y <= GOAL_Y)
+        if not cleared.any():
+            return
+        elapsed_ms = (tick + 1 - self.level_start[cleared]) * TICK_MS
+        self.score[cleared] += 1000 + np.maximum(0, 5000 - elapsed_ms)
+        self.levels_completed[cleared] = self.level[cleared]
+        self.frog_x[cleared] = RESET_POSITION[0]
+        self.frog_y[cleared] = RESET_POSITION[1]
+        self.finished |= cleared & (self.level >= LEVEL_COUNT)
+
+        advancing = cleared & (self.level < LEVEL_COUNT)
+        for level in np.unique(self.level[advancing]):
+            rows = np.flatnonzero(advancing & (self.level == level))
+            self.obstacle_x[rows] = initial_obstacle_x(self.seeds[rows], int(level) + 1)
+            self._load_level_layout(rows, int(level) + 1)
+        self.level[advancing] += 1
+        self.level_start[advancing] = tick + 1
+
+
+_RESULT_FIELDS = ("rows", "score", "levels_completed", "lives", "finished", "end_tick")
+
+
+def simulate_batch(replays: List[bytes], seeds: List[int]) -> List[Dict]:
+    """Replay a batch of input logs against the seeds issued for their sessions"""
+    results: List[Optional[Dict]] = [None] * len(replays)
+    accepted = []
+    decoded = []
+    for index, (replay, seed) in enumerate(zip(replays, seeds)):
+        try:
+            log_seed, ticks, directions, end_tick = decode_replay(replay)
+        except InvalidReplay as e:
+            results[index] = {"valid": False, "reason": str(e)}
+            continue
+        if log_seed != seed:
+            results[index] = {"valid": False, "reason": "Input log belongs to a different session"}
+            continue
+        accepted.append(index)
+        decoded.append((ticks, directions, end_tick))
+
+    if accepted:
+        batch = _Batch(
+            np.array([seeds[index] for index in accepted], dtype=np.uint32),
+            [ticks for ticks, _, _ in decoded],
+            [directions for _, directions, _ in decoded],
+            np.array([end_tick for _, _, end_tick in decoded], dtype=np.int64)
+        )
+        batch.rows = np.array(accepted)
+        done = []
+        tick = 0
+        while len(batch.rows):
+            active = ~batch.finished & (tick < batch.end_tick)
+            if tick % 64 == 0 and active.sum() * 2 < len(active):
+                done.append({name: getattr(batch, name)[~active] for name in _RESULT_FIELDS})
+                batch.keep(active)
+                active = active[active]
+                if not len(batch.rows):
+                    break
+            batch.apply_events(tick, active)
+            batch.move_obstacles()
+            batch.check_collisions(tick, active)
+            tick += 1
+        done.append({name: getattr(batch, name) for name in _RESULT_FIELDS})
+
+        for part in done:
+            for position, row in enumerate(part["rows"]):
+                results[row] = {
+                    "valid": True,
+                    "score": int(part["score"][position]),
+                    "levels_completed": int(part["levels_completed"][position]),
+                    "lives": int(part["lives"][position]),
+                    "finished": bool(part["finished"][position]),
+                    "ticks": int(part["end_tick"][position]),
+                    "duration_seconds": int(part["end_tick"][position]) * TICK_MS / 1000
+                }
+    return results
+
+
+def replay_workers() -> int:
+    """Replay processes for this web worker: REPLAY_WORKERS, or an even
+    share of the CPUs between the WEB_CONCURRENCY web workers.
+    REPLAY_WORKERS=0 replays on the event loop's default thread pool
+    instead of in separate processes."""
+    if os.getenv("REPLAY_WORKERS"):
+        return int(os.getenv("REPLAY_WORKERS"))
+    web_workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(1, (os.cpu_count() or 1) // web_workers)
+
+
+class ReplayValidator:
+    """Batches concurrent replay validations and runs them in a worker pool"""
+
+    def __init__(self, executor: Optional[Executor] = None, batch_size: int = 512, max_wait: float = 0.02):
+        self.executor = executor
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.metrics = {"validated": 0, "rejected": 0, "batches": 0}
+        self._pending: List[Tuple[bytes, int, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @classmethod
+    def from_env(cls) -> "ReplayValidator":
+        workers = replay_workers()
+        # Without a process pool, replays run on the loop's default executor
+        return cls(
+            executor=ProcessPoolExecutor(max_workers=workers) if workers > 0 else None,
+            batch_size=int(os.getenv("REPLAY_BATCH_SIZE", "512"))
+        )
+
+    async def validate(self, replay: bytes, seed: int) -> Dict:
+        """Replay one input log, sharing a simulator batch with concurrent callers"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((replay, seed, future))
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.ensure_future(self._run(batch))
+
+    async def _run(self, batch: List[Tuple[bytes, int, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor,
+                simulate_batch,
+                [replay for replay, _, _ in batch],
+                [seed for _, seed, _ in batch]
+            )
+        except Exception as e:
+            logger.error(f"Replay validation batch failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.metrics["batches"] += 1
+        for (_, _, future), result in zip(batch, results):
+            self.metrics["validated" if result["valid"] else "rejected"] += 1
+            if not future.done():
+                future.set_result(result)
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,189 @@
+"""Idempotency-Key support for retried POST requests.
+
+Completed responses are kept in a bounded, TTL'd in-process cache and in
+``db.idempotency_keys``, whose unique index on ``key`` lets only one
+worker run a given request. Duplicates that arrive while the original is
+still running wait for it instead of executing again.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+def fingerprint(payload: Any) -> str:
+    """Stable hash of a request payload, used to detect key reuse"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Runs each idempotency key at most once and replays its response"""
+
+    def __init__(
+        self,
+        db,
+        max_entries: int = 10000,
+        ttl_seconds: int = 86400,
+        lock_timeout: float = 60.0,
+        wait_timeout: float = 30.0
+    ):
+        self.db = db
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.cache: "OrderedDict[str, Dict]" = OrderedDict()
+        # key -> (request hash, future of the running request)
+        self.in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    @classmethod
+    def from_env(cls, db) -> "IdempotencyStore":
+        return cls(
+            db,
+            max_entries=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+            ttl_seconds=int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+        )
+
+    async def ensure_indexes(self) -> None:
+        await self.db.idempotency_keys.create_index("key", unique=True)
+        await self.db.idempotency_keys.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+
+    def cache_get(self, key: str) -> Optional[Dict]:
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] < time.monotonic():
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return entry
+
+    def cache_put(self, key: str, request_hash: str, response: Any) -> None:
+        self.cache[key] = {
+            "request_hash": request_hash,
+            "response": response,
+            "expires": time.monotonic() + self.ttl_seconds
+        }
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    @staticmethod
+    def check_hash(stored_hash: str, request_hash: str) -> None:
+        if stored_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used with a different request"
+            )
+
+    async def run(self, key: str, payload: Any, handler: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the stored response for key, or run handler exactly once"""
+        request_hash = fingerprint(payload)
+
+        entry = self.cache_get(key)
+        if entry is not None:
+            self.check_hash(entry["request_hash"], request_hash)
+            return entry["response"]
+
+        if key in self.in_flight:
+            running_hash, running = self.in_flight[key]
+            self.check_hash(running_hash, request_hash)
+            return await asyncio.shield(running)
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = (request_hash, future)
+        try:
+            response = await self.execute(key, request_hash, handler)
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieve the exception so an unawaited future does not warn
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            del self.in_flight[key]
+
+    async def execute(self, key: str, request_hash: str, handler: Callable[[], Awaitable[Any]]) -> Any:
+        from pymongo.errors import DuplicateKeyError
+
+        try:
+            await self.db.idempotency_keys.insert_one({
+                "key": key,
+                "request_hash": request_hash,
+                "status": IN_PROGRESS,
+                "created_at": datetime.now(timezone.utc)
+            })
+        except DuplicateKeyError:
+            existing = await self.wait_for_other_worker(key)
+            if existing is not None:
+                self.check_hash(existing["request_hash"], request_hash)
+                self.cache_put(key, existing["request_hash"], existing["response"])
+                return existing["response"]
+
+        try:
+            response = await handler()
+        except BaseException:
+            await self.db.idempotency_keys.delete_one({"key": key, "status": IN_PROGRESS})
+            raise
+
+        await self.db.idempotency_keys.update_one(
+            {"key": key},
+            {"$set": {"status": COMPLETED, "response": response, "request_hash": request_hash}}
+        )
+        self.cache_put(key, request_hash, response)
+        return response
+
+    async def wait_for_other_worker(self, key: str) -> Optional[Dict]:
+        """Wait for another worker's result, or take over its abandoned lock.
+
+        Returns the completed record, or None once this worker holds the lock.
+        """
+        from pymongo.errors import DuplicateKeyError
+
+        deadline = time.monotonic() + self.wait_timeout
+        delay = 0.05
+        while time.monotonic() < deadline:
+            record = await self.db.idempotency_keys.find_one({"key": key}, {"_id": 0})
+            if record is None:
+                try:
+                    await self.db.idempotency_keys.insert_one({
+                        "key": key,
+                        "request_hash": None,
+                        "status": IN_PROGRESS,
+                        "created_at": datetime.now(timezone.utc)
+                    })
+                    return None
+                except DuplicateKeyError:
+                    continue
+
+            if record["status"] == COMPLETED:
+                return record
+
+            stale_before = datetime.now(timezone.utc) - timedelta(seconds=self.lock_timeout)
+            taken = await self.db.idempotency_keys.update_one(
+                {"key": key, "status": IN_PROGRESS, "created_at": {"$lt": stale_before}},
+                {"$set": {"created_at": datetime.now(timezone.utc)}}
+            )
+            if taken.modified_count:
+                logger.warning(f"Taking over abandoned idempotency key {key}")
+                return None
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
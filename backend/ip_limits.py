@@ -0,0 +1,246 @@
+"""Subnet-aware reward limits per client IP.
+
+Reward totals are kept in one path-compressed binary (radix) trie per
+address family. Every node holds the total earned by all addresses below
+it, so the amount earned by any covering subnet of an address is found
+by walking at most prefix-length bits, and recording a claim updates the
+totals along a single path.
+
+The tries live in each web worker's memory, so a worker only sees the
+claims it granted itself plus whatever it last loaded from Mongo. Every
+IP_LIMIT_SYNC_SECONDS each worker rebuilds its tries from completed
+rewards, picking up the other workers' claims. Between syncs an address
+can earn up to its cap once per worker; lower the interval to narrow
+that window at the cost of one aggregation per worker per sync.
+
+Only single addresses are capped by default (MAX_PURPE_PER_IP). Subnet
+caps are opt-in through IPV4_SUBNET_LIMITS and IPV6_SUBNET_LIMITS,
+because carrier-grade NAT and shared IPv6 prefixes put many unrelated
+players behind one subnet.
+"""
+
+import asyncio
+import ipaddress
+import logging
+import os
+from typing import Dict, List, Optional, Tuple
+
+from reward_schema import RewardStore
+
+logger = logging.getLogger(__name__)
+
+
+class _Node:
+    __slots__ = ("prefix", "length", "total", "children")
+
+    def __init__(self, prefix: int, length: int, total: float):
+        self.prefix = prefix
+        self.length = length
+        self.total = total
+        self.children: List[Optional["_Node"]] = [None, None]
+
+
+class PrefixTrie:
+    """Radix trie of amounts keyed by fixed-width integer addresses"""
+
+    def __init__(self, width: int):
+        self.width = width
+        self.root = _Node(0, 0, 0.0)
+        self.size = 0
+
+    def _bit(self, value: int, index: int) -> int:
+        return (value >> (self.width - 1 - index)) & 1
+
+    def mask(self, length: int) -> int:
+        return ((1 << length) - 1) << (self.width - length)
+
+    def _common_prefix_length(self, a: int, b: int, limit: int) -> int:
+        return min(self.width - (a ^ b).bit_length(), limit)
+
+    def add(self, value: int, amount: float) -> None:
+        """Add amount to an address and every prefix covering it"""
+        node = self.root
+        node.total += amount
+        while node.length < self.width:
+            branch = self._bit(value, node.length)
+            child = node.children[branch]
+            if child is None:
+                node.children[branch] = _Node(value, self.width, amount)
+                self.size += 1
+                return
+
+            shared = self._common_prefix_length(child.prefix, value, child.length)
+            if shared == child.length:
+                child.total += amount
+                node = child
+                continue
+
+            # Split the compressed edge where the new address diverges
+            middle = _Node(value & self.mask(shared), shared, child.total + amount)
+            middle.children[self._bit(child.prefix, shared)] = child
+            middle.children[self._bit(value, shared)] = _Node(value, self.width, amount)
+            node.children[branch] = middle
+            self.size += 1
+            return
+
+    def total(self, value: int, prefix_length: int) -> float:
+        """Total recorded under the /prefix_length network containing value"""
+        node = self.root
+        while node.length < prefix_length:
+            child = node.children[self._bit(value, node.length)]
+            if child is None:
+                return 0.0
+            shared = self._common_prefix_length(child.prefix, value, child.length)
+            if shared >= prefix_length:
+                return child.total
+            if shared < child.length:
+                return 0.0
+            node = child
+        return node.total
+
+
+def parse_prefix_limits(spec: str) -> Dict[int, float]:
+    """Parse "24:50,16:200" into {prefix_length: cap}"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        prefix_length, cap = item.split(":")
+        limits[int(prefix_length)] = float(cap)
+    return limits
+
+
+class SubnetLimiter:
+    """Tracks reward totals per IP and per covering subnet and enforces caps"""
+
+    def __init__(self, ipv4_limits: Dict[int, float], ipv6_limits: Dict[int, float], sync_interval: float = 0.0):
+        self.tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        self.limits = {
+            4: sorted(ipv4_limits.items(), reverse=True),
+            6: sorted(ipv6_limits.items(), reverse=True)
+        }
+        # Client addresses that are not valid IPs (e.g. behind odd proxies)
+        # are still capped by their exact string
+        self.other: Dict[str, float] = {}
+        self.max_per_ip = ipv4_limits.get(32, 0.0)
+        self.sync_interval = sync_interval
+        self.metrics = {"syncs": 0, "sync_failures": 0}
+        # Claims recorded while a sync is reading Mongo
+        self._pending: Optional[List[Tuple[str, float]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls) -> "SubnetLimiter":
+        max_per_ip = float(os.getenv("MAX_PURPE_PER_IP", "10.0"))
+        ipv4_limits = {32: max_per_ip}
+        ipv4_limits.update(parse_prefix_limits(os.getenv("IPV4_SUBNET_LIMITS", "")))
+        ipv6_limits = {128: max_per_ip}
+        ipv6_limits.update(parse_prefix_limits(os.getenv("IPV6_SUBNET_LIMITS", "")))
+        return cls(ipv4_limits, ipv6_limits, sync_interval=float(os.getenv("IP_LIMIT_SYNC_SECONDS", "60")))
+
+    @staticmethod
+    def parse(client_ip: str) -> Optional[Tuple[int, int]]:
+        try:
+            address = ipaddress.ip_address(client_ip.strip())
+        except (ValueError, AttributeError):
+            return None
+        if address.version == 6 and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        return address.version, int(address)
+
+    def _add(self, tries: Dict[int, PrefixTrie], other: Dict[str, float], client_ip: str, amount: float) -> None:
+        parsed = self.parse(client_ip)
+        if parsed is None:
+            other[client_ip] = other.get(client_ip, 0.0) + amount
+            return
+        version, value = parsed
+        tries[version].add(value, amount)
+
+    def record(self, client_ip: str, amount: float) -> None:
+        """Record a reward earned from client_ip"""
+        self._add(self.tries, self.other, client_ip, amount)
+        if self._pending is not None:
+            self._pending.append((client_ip, amount))
+
+    def usage(self, client_ip: str) -> List[Dict]:
+        """Totals and caps for the address and each capped subnet around it"""
+        parsed = self.parse(client_ip)
+        if parsed is None:
+            return [{
+                "network": client_ip,
+                "total": self.other.get(client_ip, 0.0),
+                "limit": self.max_per_ip
+            }]
+        version, value = parsed
+        trie = self.tries[version]
+        network_type = ipaddress.IPv4Network if version == 4 else ipaddress.IPv6Network
+        return [
+            {
+                "network": str(network_type((value & trie.mask(length), length))),
+                "prefix_length": length,
+                "total": trie.total(value, length),
+                "limit": cap
+            }
+            for length, cap in self.limits[version]
+        ]
+
+    def exceeded(self, client_ip: str) -> Optional[Dict]:
+        """The most specific capped network that client_ip has exhausted, if any"""
+        for entry in self.usage(client_ip):
+            if entry["total"] >= entry["limit"]:
+                return entry
+        return None
+
+    async def hydrate(self, db, rewards: RewardStore) -> int:
+        """Rebuild reward totals per IP from completed rewards in Mongo
+
+        The new totals replace the current ones in a single step. Claims
+        recorded while the aggregation runs are added on top; one that
+        the aggregation also read is counted twice until the next sync,
+        which errs toward blocking rather than letting a claim through.
+        """
+        pipeline = [
+            {"$match": rewards.query({"status": "completed"})},
+            {"$group": {"_id": "$" + rewards.field("client_ip"), "total": {"$sum": "$" + rewards.field("amount")}}}
+        ]
+        tries = {4: PrefixTrie(32), 6: PrefixTrie(128)}
+        other: Dict[str, float] = {}
+        count = 0
+        self._pending = []
+        try:
+            async for result in rewards.collection.aggregate(pipeline, allowDiskUse=True):
+                if result["_id"] is None:
+                    continue
+                self._add(tries, other, rewards.decode_value("client_ip", result["_id"]), result["total"])
+                count += 1
+            for client_ip, amount in self._pending:
+                self._add(tries, other, client_ip, amount)
+        finally:
+            self._pending = None
+        self.tries, self.other = tries, other
+        return count
+
+    def start_sync(self, db, rewards: RewardStore) -> None:
+        if not self.sync_interval:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run_sync(db, rewards))
+
+    async def stop_sync(self) -> None:
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def run_sync(self, db, rewards: RewardStore) -> None:
+        while not self._stopping.is_set():
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.sync_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.hydrate(db, rewards)
+                self.metrics["syncs"] += 1
+            except Exception as e:
+                self.metrics["sync_failures"] += 1
+                logger.error(f"Failed to sync reward totals per IP: {e}")
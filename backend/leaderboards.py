@@ -0,0 +1,231 @@
+"""High-score leaderboards backed by an indexed best-score collection.
+
+Each window (all time, the current UTC day and the current ISO week)
+keeps every wallet's best validated ``final_score`` in
+``db.score_bests``, one document per window, period and wallet. Scores
+are written as games complete with a conditional upsert, so concurrent
+web workers agree on every wallet's best without coordinating.
+
+A process only holds each board's top K in memory for serving pages,
+reloaded from the collection every few seconds and whenever one of its
+own submissions enters the top K. A wallet's rank and percentile are
+answered by counting the entries ahead of it on the
+(window, period, score, achieved_at, _id) index, so memory does not
+grow with the number of players. Pages and standings rank by the same
+order: higher score first, then whoever got there first, then wallet,
+so no two wallets share a rank. Daily and weekly documents expire once
+their period is over.
+"""
+
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+
+GLOBAL = "global"
+DAILY = "daily"
+WEEKLY = "weekly"
+WINDOWS = (GLOBAL, DAILY, WEEKLY)
+
+PERIOD_LENGTH = {DAILY: timedelta(days=1), WEEKLY: timedelta(weeks=1)}
+
+# Finished periods are kept this long before their documents expire
+EXPIRY_GRACE = timedelta(days=1)
+
+SEED_ID = "score_bests_seed"
+
+
+def period_start(window: str, now: datetime) -> Optional[datetime]:
+    """Start of the window's current period, or None for all time"""
+    day = now.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    if window == DAILY:
+        return day
+    if window == WEEKLY:
+        return day - timedelta(days=day.weekday())
+    return None
+
+
+def period_key(window: str, now: datetime) -> str:
+    start = period_start(window, now)
+    if start is None:
+        return "all"
+    if window == WEEKLY:
+        year, week, _ = start.isocalendar()
+        return f"{year}-W{week:02d}"
+    return start.date().isoformat()
+
+
+def _timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def ensure_score_indexes(db) -> None:
+    await db.score_bests.create_index([
+        ("window", 1), ("period", 1), ("score", -1), ("achieved_at", 1), ("_id", 1)
+    ])
+    await db.score_bests.create_index("expires_at", expireAfterSeconds=0)
+
+
+class ScoreBoard:
+    """One period of a window: best scores in Mongo, top K cached in memory"""
+
+    def __init__(self, collection, window: str, period: str, expires_at: Optional[datetime] = None, top_k: int = 1000, refresh_seconds: float = 5.0):
+        self.collection = collection
+        self.window = window
+        self.period = period
+        self.expires_at = expires_at
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        # (score, achieved_at, wallet) in rank order
+        self.top: List[Tuple[int, float, str]] = []
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def query(self) -> Dict:
+        return {"window": self.window, "period": self.period}
+
+    def entry_id(self, wallet_address: str) -> str:
+        return f"{self.window}:{self.period}:{wallet_address}"
+
+    async def submit(self, wallet_address: str, score: int, achieved_at: datetime) -> bool:
+        """Record a score, returning True if it is the wallet's new best"""
+        from pymongo.errors import DuplicateKeyError
+
+        document = {**self.query, "wallet_address": wallet_address, "score": score, "achieved_at": achieved_at}
+        if self.expires_at is not None:
+            document["expires_at"] = self.expires_at
+        try:
+            # Matches only a lower best; a higher one makes the upsert collide on _id
+            await self.collection.update_one(
+                {"_id": self.entry_id(wallet_address), "score": {"$lt": score}},
+                {"$set": document},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            return False
+
+        if len(self.top) < self.top_k or score > self.top[-1][0]:
+            self.loaded_at = None
+        return True
+
+    async def load_top(self) -> List[Tuple[int, float, str]]:
+        """The cached top K, reloaded when stale"""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_seconds:
+            cursor = self.collection.find(
+                self.query, {"_id": 0, "wallet_address": 1, "score": 1, "achieved_at": 1}
+            ).sort([("score", -1), ("achieved_at", 1), ("_id", 1)]).limit(self.top_k)
+            self.top = [
+                (document["score"], _timestamp(document["achieved_at"]), document["wallet_address"])
+                async for document in cursor
+            ]
+            self.loaded_at = time.monotonic()
+        return self.top
+
+    async def page(self, offset: int, limit: int) -> List[Dict]:
+        top = await self.load_top()
+        return [
+            {"rank": offset + index + 1, "wallet_address": wallet, "score": score, "achieved_at": achieved_at}
+            for index, (score, achieved_at, wallet) in enumerate(top[offset:offset + limit])
+        ]
+
+    async def count(self) -> int:
+        return await self.collection.count_documents(self.query)
+
+    async def standing(self, wallet_address: str) -> Optional[Dict]:
+        """A wallet's best score, rank and percentile on this board"""
+        entry_id = self.entry_id(wallet_address)
+        best = await self.collection.find_one({"_id": entry_id}, {"score": 1, "achieved_at": 1})
+        if best is None:
+            return None
+        score, achieved_at = best["score"], best["achieved_at"]
+        total = await self.count()
+        # Entries ahead of this one in page order
+        ahead = await self.collection.count_documents({**self.query, "$or": [
+            {"score": {"$gt": score}},
+            {"score": score, "achieved_at": {"$lt": achieved_at}},
+            {"score": score, "achieved_at": achieved_at, "_id": {"$lt": entry_id}}
+        ]})
+        return {
+            "score": score,
+            "achieved_at": _timestamp(achieved_at),
+            "rank": ahead + 1,
+            "percentile": round(100.0 * (total - ahead) / total, 2),
+            "total_players": total
+        }
+
+
+class ScoreLeaderboards:
+    """Global, daily and weekly score boards that roll over with the clock"""
+
+    def __init__(self, db, top_k: int = 1000, refresh_seconds: float = 5.0):
+        self.db = db
+        self.top_k = top_k
+        self.refresh_seconds = refresh_seconds
+        self.boards: Dict[str, ScoreBoard] = {}
+        self.periods: Dict[str, str] = {}
+
+    @classmethod
+    def from_env(cls, db) -> "ScoreLeaderboards":
+        return cls(
+            db,
+            top_k=int(os.getenv("LEADERBOARD_TOP_K", "1000")),
+            refresh_seconds=float(os.getenv("LEADERBOARD_REFRESH_SECONDS", "5"))
+        )
+
+    def board(self, window: str, now: Optional[datetime] = None) -> ScoreBoard:
+        """The window's board for the current period, starting a fresh one on rollover"""
+        now = now or datetime.now(timezone.utc)
+        key = period_key(window, now)
+        if self.periods.get(window) != key:
+            start = period_start(window, now)
+            expires_at = start + PERIOD_LENGTH[window] + EXPIRY_GRACE if start is not None else None
+            self.boards[window] = ScoreBoard(self.db.score_bests, window, key, expires_at, self.top_k, self.refresh_seconds)
+            self.periods[window] = key
+        return self.boards[window]
+
+    async def submit(self, wallet_address: str, score: int, achieved_at: datetime) -> None:
+        """Record a completed game in every window whose current period it falls into"""
+        now = datetime.now(timezone.utc)
+        for window in WINDOWS:
+            start = period_start(window, now)
+            if start is None or achieved_at >= start:
+                await self.board(window, now).submit(wallet_address, score, achieved_at)
+
+    async def rebuild(self) -> int:
+        """Seed best scores from game sessions until a seed has completed
+
+        Submissions keep the higher score, so workers that seed at the same
+        time, or a seed rerun after a crash, write the same bests.
+        """
+        db = self.db
+        if await db.migrations.find_one({"_id": SEED_ID, "completed_at": {"$exists": True}}):
+            return 0
+
+        now = datetime.now(timezone.utc)
+        loaded = 0
+        # Sessions archived by the session reaper still count toward all-time scores
+        for collection, windows in ((db.game_sessions_archive, (GLOBAL,)), (db.game_sessions, WINDOWS)):
+            for window in windows:
+                query = {"status": "completed", "replay_valid": True}
+                start = period_start(window, now)
+                if start is not None:
+                    query["end_time"] = {"$gte": start}
+                pipeline = [
+                    {"$match": query},
+                    {"$sort": {"final_score": -1, "end_time": 1}},
+                    {"$group": {
+                        "_id": "$wallet_address",
+                        "score": {"$first": "$final_score"},
+                        "achieved_at": {"$first": "$end_time"}
+                    }}
+                ]
+                board = self.board(window, now)
+                async for result in collection.aggregate(pipeline, allowDiskUse=True):
+                    await board.submit(result["_id"], result["score"], result["achieved_at"])
+                    loaded += 1
+        await db.migrations.update_one(
+            {"_id": SEED_ID}, {"$set": {"completed_at": datetime.now(timezone.utc)}}, upsert=True
+        )
+        return loaded
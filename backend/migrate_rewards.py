@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Migrate reward_transactions to the compact layout in reward_schema.py.
+
+Runs online next to live servers. Rows are copied in batches, and
+progress is checkpointed in Mongo after every batch, so rerunning the
+command resumes an interrupted migration. Use --pause to leave the
+database some headroom between batches. Collection sizes and query
+latencies are reported for both layouts before and after the copy.
+
+    python migrate_rewards.py --batch-size 2000 --pause 0.05
+
+Restart the servers once the migration is reported complete so they
+switch over to the compact collection.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from reward_schema import (
+    COMPACT_COLLECTION,
+    LEGACY_COLLECTION,
+    RewardMigration,
+    RewardStore,
+    collection_size,
+    measure_latency
+)
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+async def sample_wallets(db, count: int):
+    """Wallets to time history queries with, taken from the legacy rows"""
+    pipeline = [{"$group": {"_id": "$wallet_address"}}, {"$limit": count}]
+    return [result["_id"] async for result in db[LEGACY_COLLECTION].aggregate(pipeline)]
+
+async def report(db, wallets, label: str) -> dict:
+    return {
+        "stage": label,
+        "legacy": {
+            "size": await collection_size(db, LEGACY_COLLECTION),
+            "latency": await measure_latency(RewardStore(db), wallets)
+        },
+        "compact": {
+            "size": await collection_size(db, COMPACT_COLLECTION),
+            "latency": await measure_latency(RewardStore(db, compact=True), wallets)
+        }
+    }
+
+async def run_migration(args) -> int:
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        wallets = await sample_wallets(db, args.sample_wallets)
+        if not args.skip_report:
+            print(json.dumps(await report(db, wallets, "before"), default=str), file=sys.stderr)
+
+        migration = RewardMigration(db, batch_size=args.batch_size, pause=args.pause)
+
+        def progress(metrics):
+            print(f"Migrated batch {metrics['batches']}: {metrics}", file=sys.stderr)
+
+        state = await migration.run(progress=progress)
+
+        if not args.skip_report:
+            print(json.dumps(await report(db, wallets, "after"), default=str), file=sys.stderr)
+    finally:
+        client.close()
+
+    if not state.get("completed_at"):
+        print("Migration incomplete: rows are still being written below the checkpoint, rerun to finish", file=sys.stderr)
+        return 1
+    print(f"Migration complete at {state['completed_at']}: {migration.metrics}", file=sys.stderr)
+    return 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Migrate reward transactions to the compact layout")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows copied per batch")
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    parser.add_argument("--sample-wallets", type=int, default=50, help="Wallets used to time history queries")
+    parser.add_argument("--skip-report", action="store_true", help="Do not measure sizes and latencies")
+    args = parser.parse_args()
+
+    return asyncio.run(run_migration(args))
+
+if __name__ == "__main__":
+    sys.exit(main())
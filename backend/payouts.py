@@ -0,0 +1,633 @@
+"""Asynchronous PURPE payout queue.
+
+Claims enqueue a durable record in ``db.payouts`` and return immediately.
+A background PayoutWorker packs pending payouts into as few SPL token
+transactions as the packet size allows, submits them, and polls
+confirmations in bulk.
+
+Payout lifecycle:
+    pending -> submitting -> submitted -> confirmed
+                                      \\-> pending (retry) -> ... -> failed
+
+A transaction's signature is recorded before it is sent. An unconfirmed
+payout is only rebuilt once its blockhash has expired, so a retried
+payout can never be paid twice.
+
+A reward is stored before its payout is enqueued. If enqueueing fails,
+the worker's periodic sweep finds the pending reward without a payout
+and queues it, so every stored reward is eventually paid.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import secrets
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from reward_schema import RewardStore
+
+logger = logging.getLogger(__name__)
+
+# Payout status values
+PENDING = "pending"
+SUBMITTING = "submitting"
+SUBMITTED = "submitted"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+PACKET_DATA_SIZE = 1232
+MAX_SIGNATURES_PER_STATUS_QUERY = 256
+
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+ASSOCIATED_TOKEN_PROGRAM_ID = "ATokenGPvbdGVxr1b2hvZbsiqW5xWH25efTNsLJA8knL"
+
+# Wire size of a single-signer legacy transaction carrying N TransferChecked
+# instructions: signatures (1 + 64), header (3), account keys (1 + 32 each:
+# treasury, source account, mint, token program), blockhash (32) and the
+# instruction count (1), plus per transfer one destination account key (32)
+# and the compiled instruction (program index, 4 account indexes, 10 bytes data).
+BASE_TRANSACTION_SIZE = 1 + 64 + 3 + 1 + 32 * 4 + 32 + 1
+TRANSFER_INSTRUCTION_SIZE = 32 + 1 + 1 + 4 + 1 + 10
+
+
+class PayoutRPCError(Exception):
+    """Raised when the RPC node rejects or fails a payout request"""
+
+
+@dataclass
+class Transfer:
+    """A single token transfer, possibly covering several payouts to one wallet"""
+    wallet_address: str
+    amount: float
+    payout_ids: List[str] = field(default_factory=list)
+
+
+@dataclass
+class SignedTransaction:
+    """A built and signed transaction ready to be sent"""
+    signature: str
+    payload: Any
+    size: int
+
+
+def estimate_transaction_size(transfer_count: int) -> int:
+    """Estimate the serialized size of a transaction with transfer_count transfers"""
+    return BASE_TRANSACTION_SIZE + TRANSFER_INSTRUCTION_SIZE * transfer_count
+
+
+def max_transfers_per_transaction(max_bytes: int = PACKET_DATA_SIZE) -> int:
+    """Largest number of transfers that fit into one transaction"""
+    return max(1, (max_bytes - BASE_TRANSACTION_SIZE) // TRANSFER_INSTRUCTION_SIZE)
+
+
+def pack_transfers(payouts: List[Dict], max_bytes: int = PACKET_DATA_SIZE) -> List[List[Transfer]]:
+    """Pack payouts into as few transactions as the size limit allows.
+
+    Payouts to the same wallet are merged into a single transfer, so each
+    wallet costs one instruction no matter how many payouts it has queued.
+    """
+    transfers: Dict[str, Transfer] = {}
+    for payout in payouts:
+        transfer = transfers.get(payout["wallet_address"])
+        if transfer is None:
+            transfer = transfers[payout["wallet_address"]] = Transfer(payout["wallet_address"], 0.0)
+        transfer.amount = float(Decimal(str(transfer.amount)) + Decimal(str(payout["amount"])))
+        transfer.payout_ids.append(payout["id"])
+
+    per_transaction = max_transfers_per_transaction(max_bytes)
+    ordered = list(transfers.values())
+    return [ordered[i:i + per_transaction] for i in range(0, len(ordered), per_transaction)]
+
+
+def to_base_units(amount: float, decimals: int) -> int:
+    """Convert a PURPE amount to integer token base units"""
+    return int(Decimal(str(amount)).scaleb(decimals).to_integral_value())
+
+
+async def ensure_payout_indexes(db, rewards: RewardStore) -> None:
+    """Create the indexes used by enqueueing and the worker"""
+    await db.payouts.create_index("id", unique=True)
+    await db.payouts.create_index([("status", 1), ("next_attempt_at", 1)])
+    await rewards.collection.create_index([(rewards.field("payout_status"), 1), (rewards.field("created_at"), 1)])
+    await db.payouts.create_index("signature")
+
+
+async def enqueue_payout(db, payout_id: str, wallet_address: str, amount: float) -> Dict:
+    """Durably queue a payout. Enqueueing the same payout_id twice is a no-op."""
+    from pymongo.errors import DuplicateKeyError
+
+    now = datetime.now(timezone.utc)
+    payout = {
+        "id": payout_id,
+        "wallet_address": wallet_address,
+        "amount": amount,
+        "status": PENDING,
+        "attempts": 0,
+        "signature": None,
+        "batch_id": None,
+        "last_valid_block_height": None,
+        "error": None,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now
+    }
+
+    try:
+        await db.payouts.insert_one(payout)
+    except DuplicateKeyError:
+        return await get_payout(db, payout_id)
+    return payout
+
+
+async def get_payout(db, payout_id: str) -> Optional[Dict]:
+    """Get a payout record by id"""
+    return await db.payouts.find_one({"id": payout_id}, {"_id": 0})
+
+
+class LocalPayoutRPC:
+    """In-process stand-in for a Solana RPC node.
+
+    Used for tests and whenever no treasury key is configured. Transfers are
+    applied to an in-memory ledger once a transaction is sent, and statuses
+    become "confirmed" after confirm_after_polls status queries.
+    """
+
+    def __init__(self, confirm_after_polls: int = 1, blockhash_ttl: int = 150):
+        self.confirm_after_polls = confirm_after_polls
+        self.blockhash_ttl = blockhash_ttl
+        self.block_height = 0
+        self.transactions: Dict[str, Dict] = {}
+        self.ledger: Dict[str, float] = {}
+        # Failure injection: rejected at send, accepted but never landed,
+        # and landed but failed on chain
+        self.fail_sends = 0
+        self.drop_sends = 0
+        self.fail_on_chain = 0
+
+    def advance_blocks(self, count: int) -> None:
+        self.block_height += count
+
+    async def get_latest_blockhash(self) -> Tuple[str, int]:
+        self.block_height += 1
+        return secrets.token_hex(16), self.block_height + self.blockhash_ttl
+
+    async def get_block_height(self) -> int:
+        return self.block_height
+
+    def build_transaction(self, transfers: List[Transfer], blockhash: str) -> SignedTransaction:
+        size = estimate_transaction_size(len(transfers))
+        if size > PACKET_DATA_SIZE:
+            raise PayoutRPCError(f"Transaction too large: {size} bytes")
+        signature = hashlib.sha256(f"{blockhash}{uuid.uuid4()}".encode()).hexdigest()
+        return SignedTransaction(signature=signature, payload=list(transfers), size=size)
+
+    async def send_transaction(self, transaction: SignedTransaction) -> None:
+        if self.fail_sends:
+            self.fail_sends -= 1
+            raise PayoutRPCError("Transaction simulation failed")
+        if self.drop_sends:
+            # Accepted by the node but never lands
+            self.drop_sends -= 1
+            return
+        if transaction.signature in self.transactions:
+            return
+        failed = self.fail_on_chain > 0
+        self.fail_on_chain -= int(failed)
+        self.transactions[transaction.signature] = {"transfers": transaction.payload, "polls": 0, "failed": failed}
+        if failed:
+            return
+        for transfer in transaction.payload:
+            self.ledger[transfer.wallet_address] = self.ledger.get(transfer.wallet_address, 0.0) + transfer.amount
+
+    async def get_signature_statuses(self, signatures: List[str]) -> Dict[str, Optional[str]]:
+        statuses = {}
+        for signature in signatures:
+            transaction = self.transactions.get(signature)
+            if transaction is None:
+                statuses[signature] = None
+            elif transaction["failed"]:
+                statuses[signature] = FAILED
+            else:
+                transaction["polls"] += 1
+                statuses[signature] = "confirmed" if transaction["polls"] >= self.confirm_after_polls else "processed"
+        return statuses
+
+
+class SolanaPayoutRPC:
+    """Payout RPC backed by a Solana JSON-RPC node via solathon.
+
+    solathon's AsyncClient cannot be used outside Windows, so the blocking
+    Client runs in a worker thread. Recipients are expected to already hold
+    a PURPE token account, which reward eligibility requires.
+    """
+
+    def __init__(self, endpoint: str, treasury_private_key: str, mint_address: str, decimals: int):
+        from solathon import Client, Keypair, PublicKey
+
+        self.client = Client(endpoint, local=True)
+        self.treasury = Keypair.from_private_key(treasury_private_key)
+        self.mint = PublicKey(mint_address)
+        self.decimals = decimals
+        self.source = self.associated_token_address(self.treasury.public_key)
+
+    def associated_token_address(self, owner):
+        """Derive the associated token account of owner for the PURPE mint"""
+        from nacl.bindings import crypto_core_ed25519_is_valid_point
+        from solathon import PublicKey
+
+        program_id = bytes(PublicKey(ASSOCIATED_TOKEN_PROGRAM_ID))
+        seeds = bytes(owner) + bytes(PublicKey(TOKEN_PROGRAM_ID)) + bytes(self.mint)
+        for bump in range(255, -1, -1):
+            candidate = hashlib.sha256(seeds + bytes([bump]) + program_id + b"ProgramDerivedAddress").digest()
+            if not crypto_core_ed25519_is_valid_point(candidate):
+                return PublicKey(candidate)
+        raise PayoutRPCError(f"No associated token address for {owner}")
+
+    async def get_latest_blockhash(self) -> Tuple[str, int]:
+        result = await asyncio.to_thread(
+            self.client.build_and_send_request, "getLatestBlockhash", [{"commitment": "confirmed"}]
+        )
+        return result["value"]["blockhash"], result["value"]["lastValidBlockHeight"]
+
+    async def get_block_height(self) -> int:
+        return await asyncio.to_thread(
+            self.client.build_and_send_request, "getBlockHeight", [{"commitment": "confirmed"}]
+        )
+
+    def build_transaction(self, transfers: List[Transfer], blockhash: str) -> SignedTransaction:
+        import base58
+        from solathon import PublicKey, Transaction
+        from solathon.core.instructions import AccountMeta, Instruction
+
+        instructions = []
+        for transfer in transfers:
+            destination = self.associated_token_address(PublicKey(transfer.wallet_address))
+            data = bytes([12]) + to_base_units(transfer.amount, self.decimals).to_bytes(8, "little") + bytes([self.decimals])
+            instructions.append(Instruction(
+                keys=[
+                    AccountMeta(public_key=self.source, is_signer=False, is_writable=True),
+                    AccountMeta(public_key=self.mint, is_signer=False, is_writable=False),
+                    AccountMeta(public_key=destination, is_signer=False, is_writable=True),
+                    AccountMeta(public_key=self.treasury.public_key, is_signer=True, is_writable=False)
+                ],
+                program_id=PublicKey(TOKEN_PROGRAM_ID),
+                data=data
+            ))
+
+        transaction = Transaction(
+            instructions=instructions,
+            signers=[self.treasury],
+            fee_payer=self.treasury.public_key,
+            recent_blockhash=blockhash
+        )
+        try:
+            transaction.sign()
+            payload = transaction.serialize()
+        except RuntimeError as e:
+            raise PayoutRPCError(f"Failed to build transaction: {e}")
+
+        signature = base58.b58encode(transaction.signatures[0].signature).decode()
+        return SignedTransaction(signature=signature, payload=payload, size=len(payload))
+
+    async def send_transaction(self, transaction: SignedTransaction) -> None:
+        try:
+            await asyncio.to_thread(
+                self.client.build_and_send_request,
+                "sendTransaction",
+                [transaction.payload, {"encoding": "base64", "preflightCommitment": "confirmed"}]
+            )
+        except Exception as e:
+            raise PayoutRPCError(str(e))
+
+    async def get_signature_statuses(self, signatures: List[str]) -> Dict[str, Optional[str]]:
+        result = await asyncio.to_thread(
+            self.client.build_and_send_request,
+            "getSignatureStatuses",
+            [signatures, {"searchTransactionHistory": True}]
+        )
+        statuses = {}
+        for signature, status in zip(signatures, result["value"]):
+            if status is None:
+                statuses[signature] = None
+            elif status.get("err"):
+                statuses[signature] = FAILED
+            else:
+                statuses[signature] = status.get("confirmationStatus") or "processed"
+        return statuses
+
+
+def create_payout_rpc():
+    """Create the payout RPC from environment configuration"""
+    treasury_key = os.environ.get("PAYOUT_TREASURY_PRIVATE_KEY")
+    mint_address = os.environ.get("PURPE_TOKEN_MINT")
+    if not treasury_key or not mint_address:
+        logger.warning("Payout treasury not configured, using local stand-in RPC")
+        return LocalPayoutRPC()
+
+    return SolanaPayoutRPC(
+        endpoint=os.environ.get("SOLANA_RPC_ENDPOINT", "https://api.devnet.solana.com"),
+        treasury_private_key=treasury_key,
+        mint_address=mint_address,
+        decimals=int(os.environ.get("PURPE_TOKEN_DECIMALS", "6"))
+    )
+
+
+class PayoutWorker:
+    """Background worker that submits and confirms queued payouts"""
+
+    def __init__(
+        self,
+        db,
+        rpc,
+        rewards: RewardStore,
+        batch_size: int = 500,
+        poll_interval: float = 2.0,
+        max_attempts: int = 5,
+        retry_backoff: float = 5.0,
+        lease_seconds: float = 60.0,
+        sweep_interval: float = 300.0,
+        sweep_grace: float = 60.0
+    ):
+        self.db = db
+        self.rpc = rpc
+        self.rewards = rewards
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self.sweep_interval = sweep_interval
+        # Rewards younger than this may still be between insert and enqueue
+        self.sweep_grace = sweep_grace
+        self.swept_at: Optional[datetime] = None
+        self.metrics = {"submitted": 0, "confirmed": 0, "retried": 0, "failed": 0, "transactions": 0, "requeued": 0}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, db, rpc, rewards: RewardStore) -> "PayoutWorker":
+        return cls(
+            db,
+            rpc,
+            rewards,
+            batch_size=int(os.getenv("PAYOUT_BATCH_SIZE", "500")),
+            poll_interval=float(os.getenv("PAYOUT_POLL_INTERVAL_SECONDS", "2.0")),
+            max_attempts=int(os.getenv("PAYOUT_MAX_ATTEMPTS", "5")),
+            sweep_interval=float(os.getenv("PAYOUT_SWEEP_INTERVAL_SECONDS", "300"))
+        )
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Payout worker cycle failed: {e}")
+                processed = 0
+
+            if not processed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """Run one submit and confirm cycle, returning the number of payouts touched"""
+        await self.release_stale_leases()
+        now = datetime.now(timezone.utc)
+        if self.swept_at is None or now - self.swept_at >= timedelta(seconds=self.sweep_interval):
+            await self.requeue_orphans()
+            self.swept_at = now
+        submitted = await self.submit_pending()
+        resolved = await self.poll_confirmations()
+        return submitted + resolved
+
+    async def release_stale_leases(self) -> None:
+        """Return payouts leased by a worker that died before signing to the queue"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.lease_seconds)
+        await self.db.payouts.update_many(
+            {"status": SUBMITTING, "updated_at": {"$lt": cutoff}},
+            {"$set": {"status": PENDING, "batch_id": None}}
+        )
+
+    async def requeue_orphans(self) -> int:
+        """Queue payouts for pending rewards whose enqueue never happened"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.sweep_grace)
+        rewards = self.rewards.find(
+            {"payout_status": PENDING, "created_at": {"$lt": cutoff}},
+            fields=("id", "wallet_address", "amount"),
+            batch_size=self.batch_size
+        )
+        batch: List[Dict] = []
+        requeued = 0
+        async for reward in rewards:
+            batch.append(reward)
+            if len(batch) == self.batch_size:
+                requeued += await self._requeue(batch)
+                batch = []
+        if batch:
+            requeued += await self._requeue(batch)
+        return requeued
+
+    async def _requeue(self, rewards: List[Dict]) -> int:
+        queued = {
+            payout["id"]
+            async for payout in self.db.payouts.find({"id": {"$in": [reward["id"] for reward in rewards]}}, {"_id": 0, "id": 1})
+        }
+        requeued = 0
+        for reward in rewards:
+            if reward["id"] not in queued:
+                await enqueue_payout(self.db, reward["id"], reward["wallet_address"], reward["amount"])
+                logger.warning(f"Queued missing payout for reward {reward['id']}")
+                requeued += 1
+        self.metrics["requeued"] += requeued
+        return requeued
+
+    async def lease_pending(self) -> List[Dict]:
+        """Atomically claim a batch of due payouts for this worker"""
+        now = datetime.now(timezone.utc)
+        candidates = await self.db.payouts.find(
+            {"status": PENDING, "next_attempt_at": {"$lte": now}},
+            {"_id": 0, "id": 1}
+        ).sort("created_at", 1).limit(self.batch_size).to_list(self.batch_size)
+        if not candidates:
+            return []
+
+        batch_id = str(uuid.uuid4())
+        await self.db.payouts.update_many(
+            {"id": {"$in": [payout["id"] for payout in candidates]}, "status": PENDING},
+            {"$set": {"status": SUBMITTING, "batch_id": batch_id, "updated_at": now}}
+        )
+        return await self.db.payouts.find(
+            {"batch_id": batch_id, "status": SUBMITTING},
+            {"_id": 0, "id": 1, "wallet_address": 1, "amount": 1, "batch_id": 1}
+        ).to_list(None)
+
+    async def renew_lease(self, batch_id: str, payout_ids: List[str]) -> set:
+        """Extend this worker's lease on a batch, returning which payout_ids it still holds"""
+        lease = {"batch_id": batch_id, "status": SUBMITTING}
+        await self.db.payouts.update_many(lease, {"$set": {"updated_at": datetime.now(timezone.utc)}})
+        held = await self.db.payouts.find({**lease, "id": {"$in": payout_ids}}, {"_id": 0, "id": 1}).to_list(None)
+        return {payout["id"] for payout in held}
+
+    async def submit_pending(self) -> int:
+        """Pack leased payouts into transactions and send them"""
+        payouts = await self.lease_pending()
+        if not payouts:
+            return 0
+        batch_id = payouts[0]["batch_id"]
+
+        blockhash, last_valid_block_height = await self.rpc.get_latest_blockhash()
+        for transfers in pack_transfers(payouts):
+            # Sending earlier transactions may have outlasted the lease, in
+            # which case another worker can already hold some of these payouts
+            held = await self.renew_lease(batch_id, [payout_id for transfer in transfers for payout_id in transfer.payout_ids])
+            transfers = [transfer for transfer in transfers if held.issuperset(transfer.payout_ids)]
+            if not transfers:
+                continue
+            payout_ids = [payout_id for transfer in transfers for payout_id in transfer.payout_ids]
+            try:
+                transaction = self.rpc.build_transaction(transfers, blockhash)
+            except PayoutRPCError as e:
+                await self.schedule_retry(payout_ids, str(e))
+                continue
+
+            # Record the signature before sending so a crash can never lead
+            # to the same payout being signed into a second transaction
+            result = await self.db.payouts.update_many(
+                {"id": {"$in": payout_ids}, "batch_id": batch_id, "status": SUBMITTING},
+                {"$set": {
+                    "status": SUBMITTED,
+                    "signature": transaction.signature,
+                    "last_valid_block_height": last_valid_block_height,
+                    "updated_at": datetime.now(timezone.utc)
+                }}
+            )
+            if result.modified_count != len(payout_ids):
+                # Lost part of the lease since renewing it; the transaction was
+                # never sent, so requeue the payouts that were marked with it
+                await self.db.payouts.update_many(
+                    {"id": {"$in": payout_ids}, "signature": transaction.signature, "status": SUBMITTED},
+                    {"$set": {"status": PENDING, "signature": None, "batch_id": None}}
+                )
+                logger.warning(f"Payout lease {batch_id} expired before sending, skipped {len(payout_ids)} payouts")
+                continue
+
+            try:
+                await self.rpc.send_transaction(transaction)
+            except PayoutRPCError as e:
+                # The node may still have forwarded the transaction, so leave
+                # it submitted and let blockhash expiry decide on a retry
+                logger.warning(f"Failed to send payout transaction {transaction.signature}: {e}")
+                await self.db.payouts.update_many(
+                    {"id": {"$in": payout_ids}, "status": SUBMITTED},
+                    {"$set": {"error": str(e)}}
+                )
+                continue
+
+            self.metrics["submitted"] += len(payout_ids)
+            self.metrics["transactions"] += 1
+
+        return len(payouts)
+
+    async def poll_confirmations(self) -> int:
+        """Resolve submitted payouts with one status query per 256 signatures"""
+        submitted = await self.db.payouts.find(
+            {"status": SUBMITTED},
+            {"_id": 0, "id": 1, "signature": 1, "last_valid_block_height": 1}
+        ).limit(self.batch_size * 4).to_list(None)
+        if not submitted:
+            return 0
+
+        by_signature: Dict[str, List[Dict]] = {}
+        for payout in submitted:
+            by_signature.setdefault(payout["signature"], []).append(payout)
+
+        signatures = list(by_signature)
+        block_height = await self.rpc.get_block_height()
+        resolved = 0
+        for i in range(0, len(signatures), MAX_SIGNATURES_PER_STATUS_QUERY):
+            chunk = signatures[i:i + MAX_SIGNATURES_PER_STATUS_QUERY]
+            statuses = await self.rpc.get_signature_statuses(chunk)
+            for signature in chunk:
+                payouts = by_signature[signature]
+                payout_ids = [payout["id"] for payout in payouts]
+                status = statuses.get(signature)
+
+                if status in ("confirmed", "finalized"):
+                    await self.mark_confirmed(signature, payout_ids)
+                elif status == FAILED:
+                    await self.schedule_retry(payout_ids, "Transaction failed on chain")
+                elif status is None and block_height > payouts[0]["last_valid_block_height"]:
+                    # Blockhash expired without the transaction landing, so it
+                    # can never land and the payouts are safe to rebuild
+                    await self.schedule_retry(payout_ids, "Transaction expired")
+                else:
+                    continue
+                resolved += len(payout_ids)
+
+        return resolved
+
+    async def mark_confirmed(self, signature: str, payout_ids: List[str]) -> None:
+        now = datetime.now(timezone.utc)
+        await self.db.payouts.update_many(
+            {"id": {"$in": payout_ids}, "status": SUBMITTED},
+            {"$set": {"status": CONFIRMED, "confirmed_at": now, "updated_at": now}}
+        )
+        await self.rewards.update_many(
+            {"id": {"$in": payout_ids}},
+            {"$set": {"transaction_signature": signature, "payout_status": CONFIRMED}}
+        )
+        self.metrics["confirmed"] += len(payout_ids)
+
+    async def schedule_retry(self, payout_ids: List[str], error: str) -> None:
+        """Requeue payouts with backoff, failing those out of attempts"""
+        now = datetime.now(timezone.utc)
+        await self.db.payouts.update_many(
+            {"id": {"$in": payout_ids}},
+            {
+                "$set": {"status": PENDING, "signature": None, "batch_id": None, "error": error, "updated_at": now},
+                "$inc": {"attempts": 1}
+            }
+        )
+
+        exhausted = await self.db.payouts.find(
+            {"id": {"$in": payout_ids}, "attempts": {"$gte": self.max_attempts}},
+            {"_id": 0, "id": 1}
+        ).to_list(None)
+        exhausted_ids = [payout["id"] for payout in exhausted]
+        if exhausted_ids:
+            await self.db.payouts.update_many(
+                {"id": {"$in": exhausted_ids}},
+                {"$set": {"status": FAILED}}
+            )
+            await self.rewards.update_many(
+                {"id": {"$in": exhausted_ids}},
+                {"$set": {"payout_status": FAILED}}
+            )
+            self.metrics["failed"] += len(exhausted_ids)
+            logger.error(f"Payouts failed after {self.max_attempts} attempts: {exhausted_ids}")
+
+        retry_ids = [payout_id for payout_id in payout_ids if payout_id not in set(exhausted_ids)]
+        if retry_ids:
+            attempts = await self.db.payouts.find_one({"id": retry_ids[0]}, {"_id": 0, "attempts": 1})
+            delay = min(self.retry_backoff * (2 ** max(attempts["attempts"] - 1, 0)), 300)
+            await self.db.payouts.update_many(
+                {"id": {"$in": retry_ids}},
+                {"$set": {"next_attempt_at": now + timedelta(seconds=delay)}}
+            )
+            self.metrics["retried"] += len(retry_ids)
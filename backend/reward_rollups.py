@@ -0,0 +1,229 @@
+"""Per-wallet reward rollups for time-windowed leaderboards.
+
+Every completed claim increments two documents in ``db.reward_rollups``:
+the wallet's bucket for the current UTC hour and its all-time total.
+Daily, weekly and rolling-7-day leaderboards sum the hourly buckets in
+range, at most 168 per wallet, instead of scanning
+``reward_transactions``.
+
+RollupPruner keeps storage bounded by deleting hourly buckets once they
+are older than any live window needs. All-time totals live in their own
+document per wallet, so nothing else has to be kept for older hours.
+
+Rewards from before the servers started rolling claims up are added once
+by backfill_rollups.py. The first server to start records that moment in
+a marker document in ``db.migrations``. The backfill only counts rewards
+created before it, so claims that were already rolled up live are not
+counted twice.
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from reward_schema import RewardStore
+
+logger = logging.getLogger(__name__)
+
+HOUR = "hour"
+TOTAL = "total"
+
+DAILY = "daily"
+WEEKLY = "weekly"
+ROLLING_7D = "rolling_7d"
+ALL_TIME = "all"
+WINDOWS = (DAILY, WEEKLY, ROLLING_7D, ALL_TIME)
+
+ALL_TIME_BUCKET = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+BACKFILL_ID = "reward_rollups_backfill"
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def floor_day(value: datetime) -> datetime:
+    return floor_hour(value).replace(hour=0)
+
+
+def window_range(window: str, now: datetime) -> Tuple[datetime, datetime]:
+    """[start, end) of a leaderboard window, aligned to hourly buckets"""
+    end = floor_hour(now) + timedelta(hours=1)
+    if window == DAILY:
+        return floor_day(now), end
+    if window == WEEKLY:
+        day = floor_day(now)
+        return day - timedelta(days=day.weekday()), end
+    if window == ROLLING_7D:
+        return end - timedelta(days=7), end
+    raise ValueError(f"Unknown leaderboard window: {window}")
+
+
+async def ensure_rollup_indexes(db) -> None:
+    await db.reward_rollups.create_index(
+        [("granularity", 1), ("bucket", 1), ("wallet_address", 1)],
+        unique=True
+    )
+    await db.reward_rollups.create_index([("granularity", 1), ("total_rewards", -1)])
+
+
+async def _increment(db, granularity: str, bucket: datetime, wallet_address: str, amount: float, claims: int, at: datetime) -> None:
+    from pymongo.errors import DuplicateKeyError
+
+    query = {"granularity": granularity, "bucket": bucket, "wallet_address": wallet_address}
+    update = {
+        "$inc": {"total_rewards": amount, "claims": claims},
+        "$max": {"last_activity": at}
+    }
+    try:
+        await db.reward_rollups.update_one(query, update, upsert=True)
+    except DuplicateKeyError:
+        # Lost an upsert race for a new bucket; it exists now
+        await db.reward_rollups.update_one(query, update)
+
+
+async def record_reward(db, wallet_address: str, amount: float, at: datetime) -> None:
+    """Add a completed claim to the wallet's hourly and all-time rollups"""
+    await asyncio.gather(
+        _increment(db, HOUR, floor_hour(at), wallet_address, amount, 1, at),
+        _increment(db, TOTAL, ALL_TIME_BUCKET, wallet_address, amount, 1, at)
+    )
+
+
+async def mark_rollups_live(db, now: Optional[datetime] = None) -> None:
+    """Record when claims started being rolled up live, the backfill cutoff"""
+    from pymongo.errors import DuplicateKeyError
+
+    now = now or datetime.now(timezone.utc)
+    try:
+        await db.migrations.update_one({"_id": BACKFILL_ID}, {"$setOnInsert": {"cutoff": now}}, upsert=True)
+    except DuplicateKeyError:
+        # Another server recorded it first
+        pass
+
+
+async def backfill_rollups(db, rewards: RewardStore, batch_size: int = 1000) -> Optional[int]:
+    """Roll up the rewards created before the cutoff, once across all callers
+
+    Returns the number of buckets written, 0 if another caller has already
+    claimed the backfill, or None if no server has marked rollups live yet.
+    """
+    marker = await db.migrations.find_one_and_update(
+        {"_id": BACKFILL_ID, "started_at": {"$exists": False}},
+        {"$set": {"started_at": datetime.now(timezone.utc)}}
+    )
+    if marker is None:
+        return None if await db.migrations.find_one({"_id": BACKFILL_ID}) is None else 0
+
+    buckets: Dict[Tuple[str, datetime, str], List] = {}
+    query = {"status": "completed", "created_at": {"$lt": marker["cutoff"]}}
+    async for reward in rewards.find(query, ["wallet_address", "amount", "created_at"]):
+        at = reward["created_at"]
+        if at.tzinfo is None:
+            at = at.replace(tzinfo=timezone.utc)
+        for key in ((HOUR, floor_hour(at), reward["wallet_address"]), (TOTAL, ALL_TIME_BUCKET, reward["wallet_address"])):
+            totals = buckets.setdefault(key, [0.0, 0, at])
+            totals[0] += reward["amount"]
+            totals[1] += 1
+            totals[2] = max(totals[2], at)
+
+    items = list(buckets.items())
+    for start in range(0, len(items), batch_size):
+        await asyncio.gather(*(
+            _increment(db, granularity, bucket, wallet, amount, claims, last_activity)
+            for (granularity, bucket, wallet), (amount, claims, last_activity) in items[start:start + batch_size]
+        ))
+    await db.migrations.update_one(
+        {"_id": BACKFILL_ID},
+        {"$set": {"completed_at": datetime.now(timezone.utc), "buckets": len(items)}}
+    )
+    return len(items)
+
+
+async def get_window_leaderboard(db, window: str, limit: int, now: Optional[datetime] = None) -> List[Dict]:
+    """Top wallets by rewards earned within a window"""
+    if window == ALL_TIME:
+        cursor = db.reward_rollups.find(
+            {"granularity": TOTAL},
+            {"_id": 0, "wallet_address": 1, "total_rewards": 1, "claims": 1, "last_activity": 1}
+        ).sort("total_rewards", -1).limit(limit)
+        return await cursor.to_list(limit)
+
+    start, end = window_range(window, now or datetime.now(timezone.utc))
+    pipeline = [
+        {"$match": {"granularity": HOUR, "bucket": {"$gte": start, "$lt": end}}},
+        {"$group": {
+            "_id": "$wallet_address",
+            "total_rewards": {"$sum": "$total_rewards"},
+            "claims": {"$sum": "$claims"},
+            "last_activity": {"$max": "$last_activity"}
+        }},
+        {"$sort": {"total_rewards": -1}},
+        {"$limit": limit}
+    ]
+    results = await db.reward_rollups.aggregate(pipeline).to_list(None)
+    return [
+        {
+            "wallet_address": result["_id"],
+            "total_rewards": result["total_rewards"],
+            "claims": result["claims"],
+            "last_activity": result["last_activity"]
+        }
+        for result in results
+    ]
+
+
+class RollupPruner:
+    """Background task that deletes hourly buckets no live window reads"""
+
+    def __init__(self, db, hourly_days: int = 8, interval: float = 3600.0):
+        # Hourly buckets must outlive the longest live window (rolling 7 days)
+        self.db = db
+        self.hourly_days = max(hourly_days, 8)
+        self.interval = interval
+        self.metrics = {"runs": 0, "documents_removed": 0}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, db) -> "RollupPruner":
+        return cls(
+            db,
+            hourly_days=int(os.getenv("ROLLUP_HOURLY_RETENTION_DAYS", "8")),
+            interval=float(os.getenv("ROLLUP_PRUNE_INTERVAL_SECONDS", "3600"))
+        )
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.error(f"Reward rollup pruning failed: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def prune(self, now: Optional[datetime] = None) -> int:
+        """Delete hourly buckets from before the retention window"""
+        now = now or datetime.now(timezone.utc)
+        cutoff = floor_day(now - timedelta(days=self.hourly_days))
+        result = await self.db.reward_rollups.delete_many({"granularity": HOUR, "bucket": {"$lt": cutoff}})
+        self.metrics["runs"] += 1
+        self.metrics["documents_removed"] += result.deleted_count
+        if result.deleted_count:
+            logger.info(f"Pruned {result.deleted_count} reward rollup buckets")
+        return result.deleted_count
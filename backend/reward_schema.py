@@ -0,0 +1,445 @@
+"""Compact storage schema for reward transactions.
+
+Legacy rows in ``db.reward_transactions`` keep every value as a string
+under its full field name: a 36-char UUID, a 44-char base58 wallet, a
+dotted IP and a 64-char signature. Compact rows in
+``db.reward_transactions_v2`` store the same data in far less space:
+
+* The reward UUID is the ``_id``, as BSON binary subtype 4. This drops
+  both the ObjectId and the separate ``id`` field.
+* The wallet and a base58 signature are stored as raw bytes. A hex mock
+  signature is stored as bytes with its own subtype.
+* The client IP is stored as 4 or 16 packed bytes.
+* Field names are one or two letters. ``demo_mode`` and a missing
+  signature are simply left out.
+
+A value that would not survive the round trip exactly, such as an
+unparseable IP or a non-base58 wallet, is stored as its original string.
+Every consumer goes through RewardStore, which translates queries, sorts,
+projections and updates into the compact layout and decodes rows back
+into the legacy shape. API responses therefore do not change.
+
+Switching layouts is done online by migrate_rewards.py:
+
+1. Servers started before the migration completes write every reward to
+   both collections and keep reading the legacy one.
+2. The migration copies legacy rows across in resumable batches. Copied
+   rows are reconciled against concurrent payout updates.
+3. The migration marks itself complete once both collections hold the
+   same rows. Servers started after that read and write only compact
+   rows.
+
+A server picks its mode at startup and keeps it until restarted. Once
+the migration completes, servers that have not restarted still read
+only the legacy collection, while restarted servers write only to the
+compact one. Until every server has restarted, the old servers serve
+stale reward history, stats and per-IP totals. Restart all servers
+promptly after the migration completes.
+
+Deploy this code before running the migration. Servers that predate it
+write only to the legacy collection.
+"""
+
+import asyncio
+import ipaddress
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+
+LEGACY_COLLECTION = "reward_transactions"
+COMPACT_COLLECTION = "reward_transactions_v2"
+MIGRATION_ID = "reward_transactions_compact"
+
+# Full field name -> compact field name
+FIELDS = {
+    "id": "_id",
+    "wallet_address": "w",
+    "client_ip": "ip",
+    "amount": "a",
+    "reward_type": "t",
+    "transaction_signature": "s",
+    "payout_status": "p",
+    "status": "st",
+    "demo_mode": "d",
+    "created_at": "c"
+}
+SHORT_FIELDS = {short: field for field, short in FIELDS.items()}
+
+# Omitted from compact rows when they hold these values
+DEFAULTS = {"transaction_signature": None, "demo_mode": False}
+
+HEX_SUBTYPE = 0x80
+
+
+def _pack_base58(value: str) -> Optional[bytes]:
+    import base58
+
+    try:
+        packed = base58.b58decode(value)
+    except ValueError:
+        return None
+    return packed if base58.b58encode(packed).decode() == value else None
+
+
+def _pack_ip(value: str) -> Optional[bytes]:
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+    return address.packed if str(address) == value else None
+
+
+def _pack_signature(value: str):
+    from bson import Binary
+
+    if len(value) == 64 and value == value.lower():
+        try:
+            return Binary(bytes.fromhex(value), HEX_SUBTYPE)
+        except ValueError:
+            pass
+    packed = _pack_base58(value)
+    return packed if packed is not None else value
+
+
+def encode_value(field: str, value):
+    """Compact representation of one field's value"""
+    from bson import Binary
+
+    if field in ("id", "_id") and isinstance(value, str):
+        try:
+            return Binary.from_uuid(uuid.UUID(value))
+        except ValueError:
+            return value
+    if not isinstance(value, str):
+        return value
+    if field == "wallet_address":
+        packed = _pack_base58(value)
+        return packed if packed is not None else value
+    if field == "client_ip":
+        packed = _pack_ip(value)
+        return packed if packed is not None else value
+    if field == "transaction_signature":
+        return _pack_signature(value)
+    return value
+
+
+def decode_value(field: str, value):
+    """Inverse of encode_value"""
+    import base58
+    from bson import Binary
+    from bson.binary import UUID_SUBTYPE
+
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Binary) and value.subtype == UUID_SUBTYPE:
+        return str(value.as_uuid())
+    if isinstance(value, Binary) and value.subtype == HEX_SUBTYPE:
+        return bytes(value).hex()
+    if not isinstance(value, bytes):
+        return value
+    if field == "client_ip":
+        return str(ipaddress.ip_address(bytes(value)))
+    return base58.b58encode(bytes(value)).decode()
+
+
+def encode_reward(record: Dict) -> Dict:
+    """Compact document for a reward record in the legacy shape"""
+    document = {}
+    for field, short in FIELDS.items():
+        if field not in record:
+            continue
+        value = record[field]
+        if field in DEFAULTS and value == DEFAULTS[field]:
+            continue
+        document[short] = encode_value(field, value)
+    return document
+
+
+def decode_reward(document: Dict) -> Dict:
+    """Legacy-shaped record for a compact document.
+
+    ``_id`` is kept alongside ``id`` as the keyset tiebreaker for cursors.
+    """
+    record = {}
+    for short, value in document.items():
+        field = SHORT_FIELDS.get(short, short)
+        record[field] = decode_value(field, value)
+    if "id" in record:
+        record["_id"] = record["id"]
+    for field, default in DEFAULTS.items():
+        record.setdefault(field, default)
+    return record
+
+
+def encode_query(query: Dict) -> Dict:
+    """Translate a filter on legacy field names into the compact layout"""
+    encoded = {}
+    for key, value in query.items():
+        if key in ("$and", "$or", "$nor"):
+            encoded[key] = [encode_query(clause) for clause in value]
+            continue
+        field = "id" if key == "_id" else key
+        short = FIELDS.get(field, key)
+        if isinstance(value, dict) and any(operator.startswith("$") for operator in value):
+            encoded[short] = {
+                operator: [encode_value(field, item) for item in operand] if operator in ("$in", "$nin") else
+                operand if operator == "$exists" else encode_value(field, operand)
+                for operator, operand in value.items()
+            }
+        else:
+            encoded[short] = encode_value(field, value)
+    return encoded
+
+
+class RewardStore:
+    """Reads and writes reward transactions in whichever layout is live.
+
+    With ``compact=False`` every method is a pass-through to the legacy
+    collection. ``dual_write`` additionally mirrors inserts and updates
+    into the compact collection while a migration is pending.
+    """
+
+    def __init__(self, db, compact: bool = False, dual_write: bool = False):
+        self.db = db
+        self.compact = compact
+        self.dual_write = dual_write and not compact
+        self.collection = db[COMPACT_COLLECTION] if compact else db[LEGACY_COLLECTION]
+
+    @classmethod
+    async def open(cls, db) -> "RewardStore":
+        """Pick the layout from the migration's progress"""
+        state = await db.migrations.find_one({"_id": MIGRATION_ID})
+        if state and state.get("completed_at"):
+            return cls(db, compact=True)
+        if state is None and not await db[LEGACY_COLLECTION].find_one({}, {"_id": 1}):
+            # Nothing to migrate, so start out compact
+            await db.migrations.update_one(
+                {"_id": MIGRATION_ID},
+                {"$setOnInsert": {"scanned": 0, "completed_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+            return cls(db, compact=True)
+        return cls(db, dual_write=True)
+
+    def field(self, name: str) -> str:
+        return FIELDS.get(name, name) if self.compact else name
+
+    def query(self, query: Dict) -> Dict:
+        return encode_query(query) if self.compact else query
+
+    def sort(self, keys: Iterable) -> List:
+        return [(self.field(name), direction) for name, direction in keys]
+
+    def projection(self, fields: Iterable[str]) -> Dict:
+        return {self.field(name): 1 for name in fields}
+
+    def decode(self, document: Dict) -> Dict:
+        return decode_reward(document) if self.compact else document
+
+    def decode_value(self, field: str, value):
+        return decode_value(field, value) if self.compact else value
+
+    async def find(
+        self,
+        query: Dict,
+        fields: Optional[Iterable[str]] = None,
+        sort: Optional[Iterable] = None,
+        limit: int = 0,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict]:
+        """Yield matching rows in the legacy shape"""
+        cursor = self.collection.find(self.query(query), self.projection(fields) if fields else None)
+        if sort:
+            cursor = cursor.sort(self.sort(sort))
+        if limit:
+            cursor = cursor.limit(limit)
+        if batch_size:
+            cursor = cursor.batch_size(batch_size)
+        async for document in cursor:
+            yield self.decode(document)
+
+    async def insert(self, record: Dict) -> None:
+        """Insert a reward record given in the legacy shape"""
+        if not self.compact:
+            await self.db[LEGACY_COLLECTION].insert_one(dict(record))
+        if self.compact or self.dual_write:
+            await self.db[COMPACT_COLLECTION].insert_one(encode_reward(record))
+
+    async def update_many(self, query: Dict, update: Dict) -> None:
+        """Apply a $set update given in legacy field names"""
+        if not self.compact:
+            await self.db[LEGACY_COLLECTION].update_many(query, update)
+        if self.compact or self.dual_write:
+            await self.db[COMPACT_COLLECTION].update_many(encode_query(query), {
+                operator: encode_query(values) for operator, values in update.items()
+            })
+
+
+async def ensure_compact_indexes(db) -> None:
+    """Compact counterparts of the legacy reward_transactions indexes"""
+    collection = db[COMPACT_COLLECTION]
+    await collection.create_index([("st", 1), ("c", 1)])
+    await collection.create_index([("c", 1), ("_id", 1)])
+    await collection.create_index([("w", 1), ("c", 1), ("_id", 1)])
+    await collection.create_index([("ip", 1), ("c", 1), ("_id", 1)])
+
+
+def _snapshot(document: Dict) -> Dict:
+    """Filter matching a compact row only while it is unchanged"""
+    snapshot = dict(document)
+    for field in DEFAULTS:
+        snapshot.setdefault(FIELDS[field], {"$exists": False})
+    return snapshot
+
+
+class RewardMigration:
+    """Resumable, batched copy of legacy reward rows into the compact layout.
+
+    Progress (the last legacy ``_id`` copied) is checkpointed in
+    ``db.migrations`` after every batch, so an interrupted run picks up
+    where it stopped. Rows are inserted with their UUID as ``_id``, so
+    rows that were already copied or dual-written are skipped. After each
+    batch the copied rows are compared with the legacy ones, which
+    catches payout updates that landed between the read and the copy.
+    """
+
+    def __init__(self, db, batch_size: int = 1000, pause: float = 0.0, max_passes: int = 3):
+        self.db = db
+        self.batch_size = batch_size
+        self.pause = pause
+        self.max_passes = max_passes
+        self.legacy = db[LEGACY_COLLECTION]
+        self.target = db[COMPACT_COLLECTION]
+        self.metrics = {"batches": 0, "copied": 0, "already_present": 0, "reconciled": 0}
+
+    async def state(self) -> Dict:
+        state = await self.db.migrations.find_one({"_id": MIGRATION_ID})
+        if state is None:
+            state = {"_id": MIGRATION_ID, "last_id": None, "scanned": 0, "started_at": datetime.now(timezone.utc)}
+            await self.db.migrations.insert_one(state)
+        return state
+
+    async def copy_batch(self, rows: List[Dict]) -> None:
+        from pymongo.errors import BulkWriteError
+
+        documents = [encode_reward(row) for row in rows]
+        try:
+            result = await self.target.insert_many(documents, ordered=False)
+            self.metrics["copied"] += len(result.inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            self.metrics["copied"] += e.details.get("nInserted", 0)
+            self.metrics["already_present"] += len(errors)
+        await self.reconcile([row["_id"] for row in rows], [document["_id"] for document in documents])
+
+    async def reconcile(self, legacy_ids: List, compact_ids: List) -> None:
+        """Bring compact rows up to date with legacy rows changed mid-copy.
+
+        Compact rows are read before legacy ones and replaced only if they
+        are still as read. Payout updates write legacy first and compact
+        second, so an update racing this is either seen here or lands on
+        the compact row afterwards.
+        """
+        current = {document["_id"]: document async for document in self.target.find({"_id": {"$in": compact_ids}})}
+        async for row in self.legacy.find({"_id": {"$in": legacy_ids}}):
+            expected = encode_reward(row)
+            existing = current.get(expected["_id"])
+            if existing is not None and decode_reward(existing) != decode_reward(expected):
+                result = await self.target.replace_one(_snapshot(existing), expected)
+                self.metrics["reconciled"] += result.modified_count
+
+    async def run_pass(self, state: Dict, progress=None) -> None:
+        last_id = state.get("last_id")
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            rows = await self.legacy.find(query).sort("_id", 1).limit(self.batch_size).to_list(self.batch_size)
+            if not rows:
+                return
+            await self.copy_batch(rows)
+            last_id = rows[-1]["_id"]
+            await self.db.migrations.update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {"last_id": last_id, "updated_at": datetime.now(timezone.utc)}, "$inc": {"scanned": len(rows)}}
+            )
+            self.metrics["batches"] += 1
+            if progress:
+                progress(self.metrics)
+            if self.pause:
+                await asyncio.sleep(self.pause)
+
+    async def run(self, progress=None) -> Dict:
+        """Copy every legacy row, marking the migration complete once the collections match"""
+        await ensure_compact_indexes(self.db)
+        state = await self.state()
+        if state.get("completed_at"):
+            return state
+
+        for _ in range(self.max_passes):
+            await self.run_pass(state, progress)
+            # Rewards reach the compact collection after the legacy one, so
+            # counting compact rows first can only undercount the copy
+            compact_count = await self.target.count_documents({})
+            if compact_count >= await self.legacy.count_documents({}):
+                await self.db.migrations.update_one(
+                    {"_id": MIGRATION_ID},
+                    {"$set": {"completed_at": datetime.now(timezone.utc)}}
+                )
+                break
+            # Rows written concurrently with an ObjectId below the checkpoint;
+            # rescan from the start, which only inserts what is missing
+            state["last_id"] = None
+        return await self.state()
+
+
+async def collection_size(db, name: str, sample_size: int = 1000) -> Dict:
+    """Storage statistics for a collection, with the mean BSON size of a sample"""
+    import bson
+
+    sizes = [len(bson.encode(document)) async for document in db[name].find({}).limit(sample_size)]
+    report = {
+        "documents": await db[name].count_documents({}),
+        "sampled_avg_bytes": round(sum(sizes) / len(sizes), 1) if sizes else 0.0
+    }
+    try:
+        stats = await db.command("collStats", name)
+        report.update({
+            "size_bytes": stats.get("size"),
+            "storage_bytes": stats.get("storageSize"),
+            "index_bytes": stats.get("totalIndexSize")
+        })
+    except Exception:
+        # Not every deployment exposes collStats; the sample still compares layouts
+        pass
+    return report
+
+
+async def measure_latency(store: RewardStore, wallets: List[str], page_size: int = 20) -> Dict:
+    """p50/p95 milliseconds of a wallet history page and an export page"""
+    timings = {"wallet_history": [], "export_page": []}
+    for wallet in wallets:
+        started = time.perf_counter()
+        async for _ in store.find(
+            {"wallet_address": wallet, "status": "completed"},
+            sort=[("created_at", -1), ("_id", -1)],
+            limit=page_size
+        ):
+            pass
+        timings["wallet_history"].append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        async for _ in store.find({}, sort=[("created_at", 1), ("_id", 1)], limit=page_size * 50):
+            pass
+        timings["export_page"].append(time.perf_counter() - started)
+
+    report = {}
+    for name, samples in timings.items():
+        samples.sort()
+        if samples:
+            report[name] = {
+                "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+                "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 3)
+            }
+    return report
@@ -1,12 +1,16 @@
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Header, status, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from motor.motor_asyncio import AsyncIOMotorClient
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime, timezone, timedelta
 from decimal import Decimal
-import jwt
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from urllib.parse import parse_qsl, urlsplit
+import functools
 import json
 import time
 import logging
@@ -15,45 +19,77 @@ import uuid
 import asyncio
 from pathlib import Path
 from dotenv import load_dotenv
-
-# Solana imports
-from solathon import Client, PublicKey
-import httpx
 import secrets
 import hashlib
+import base64
+import binascii
+
+from demo_sessions import DemoSessionStore
+from eligibility_cache import EligibilityCache
+from exports import (
+    EXPORT_FORMATS,
+    InvalidCursor,
+    before_cursor,
+    build_export_query,
+    decode_cursor,
+    encode_cursor,
+    ensure_export_indexes,
+    iter_encoded,
+    iter_export_lines,
+    iter_reward_transactions
+)
+from idempotency import IdempotencyStore
+from leaderboards import WINDOWS, ScoreLeaderboards, ensure_score_indexes
+from ip_limits import SubnetLimiter
+from payouts import (
+    PENDING,
+    PayoutWorker,
+    create_payout_rpc,
+    enqueue_payout,
+    ensure_payout_indexes,
+    get_payout
+)
+from reward_schema import RewardStore
+from reward_rollups import (
+    WINDOWS as REWARD_WINDOWS,
+    RollupPruner,
+    ensure_rollup_indexes,
+    get_window_leaderboard,
+    mark_rollups_live,
+    record_reward
+)
+from session_reaper import SessionReaper, ensure_session_indexes
+
+# Heavy dependencies (motor, pymongo, solathon, jwt, numpy) are imported lazily so that
+# importing this module stays cheap; see lifespan() and the helpers below.
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Lifespan-managed resources, set up in lifespan()
+client = None
+db = None
+payout_worker = None
+idempotency_store = None
+ip_limiter = None
+demo_sessions = None
+session_reaper = None
+replay_validator = None
+score_leaderboards = None
+rollup_pruner = None
+eligibility_cache = None
+reward_store = None
 
-# Solana client
-solana_client = Client(os.environ.get('SOLANA_RPC_ENDPOINT', 'https://api.devnet.solana.com'))
+# Per-batch memo of shared lookups, set by /api/batch
+batch_cache: ContextVar[Optional[Dict]] = ContextVar("batch_cache", default=None)
 
 # Security
 security = HTTPBearer()
 
-# FastAPI app
-app = FastAPI(
-    title="Purpe's Leap - Solana Web3 Frogger Game",
-    description="Play-to-earn Frogger-style game on Solana",
-    version="1.0.0"
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# API router, mounted by create_app()
+api_router = APIRouter(prefix="/api")
 
 # Pydantic Models
 class WalletChallenge(BaseModel):
@@ -88,9 +124,19 @@ class RewardResponse(BaseModel):
     amount_sol: Optional[float] = None
     transaction_signature: Optional[str] = None
     reward_type: Optional[str] = None
+    payout_id: Optional[str] = None
+    payout_status: Optional[str] = None
     error: Optional[str] = None
     next_eligible: Optional[str] = None
 
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None
+    path: str
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
+
 class UserStats(BaseModel):
     wallet_address: str
     daily_rewards_claimed: int
@@ -104,9 +150,20 @@ class UserStats(BaseModel):
 auth_challenges = {}
 user_rewards_today = {}
 
+# Startup state, reported by the readiness endpoint
+startup_state = {
+    "ready": False,
+    "hydration_seconds": None,
+    "hydrated_wallets": 0,
+    "hydrated_ips": 0,
+    "hydrated_scores": 0
+}
+
 # Helper Functions
 def create_jwt_token(payload: Dict) -> str:
     """Create JWT token"""
+    import jwt
+    
     try:
         now = datetime.now(timezone.utc)
         payload.update({
@@ -123,6 +180,8 @@ def create_jwt_token(payload: Dict) -> str:
 
 def verify_jwt_token(token: str) -> Dict:
     """Verify JWT token"""
+    import jwt
+    
     try:
         payload = jwt.decode(
             token,
@@ -155,16 +214,38 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         logger.error(f"Error validating token: {e}")
         raise HTTPException(status_code=401, detail="Authentication failed")
 
+async def require_admin(x_admin_key: Optional[str] = Header(None, alias="X-Admin-Key")):
+    """Require the admin API key for back-office endpoints"""
+    admin_key = os.getenv("ADMIN_API_KEY")
+    if not admin_key or not x_admin_key or not secrets.compare_digest(x_admin_key, admin_key):
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return True
+
 def validate_wallet_address(address: str) -> bool:
     """Validate Solana wallet address format"""
     try:
         if not address or len(address) != 44:
             return False
+        from solathon import PublicKey
         PublicKey(address)
         return True
     except Exception:
         return False
 
+def shared_within_batch(func):
+    """Run a lookup once per /api/batch call, however many sub-requests need it"""
+    @functools.wraps(func)
+    async def wrapper(*args):
+        cache = batch_cache.get()
+        if cache is None:
+            return await func(*args)
+        key = (func.__name__, args)
+        if key not in cache:
+            cache[key] = asyncio.ensure_future(func(*args))
+        return await cache[key]
+    return wrapper
+
+@shared_within_batch
 async def get_purpe_token_balance(wallet_address: str) -> Dict:
     """Get PURPE token balance for wallet (simplified mock for MVP)"""
     try:
@@ -199,6 +280,7 @@ async def get_purpe_token_balance(wallet_address: str) -> Dict:
             "token_price": 15.0
         }
 
+@shared_within_batch
 async def get_purpe_price() -> float:
     """Get PURPE token price (mock implementation)"""
     # In production, integrate with Jupiter, CoinGecko, etc.
@@ -209,6 +291,10 @@ def get_daily_key(wallet_address: str) -> str:
     today = datetime.now(timezone.utc).date()
     return f"{wallet_address}:{today}"
 
+def truncate_wallet(wallet_address: str) -> str:
+    """Shorten a wallet address for public display"""
+    return wallet_address[:8] + "..." + wallet_address[-4:]
+
 def get_client_ip(request: Request) -> str:
     """Get client IP address"""
     forwarded = request.headers.get("X-Forwarded-For")
@@ -216,6 +302,49 @@ def get_client_ip(request: Request) -> str:
         return forwarded.split(",")[0].strip()
     return request.client.host
 
+async def evaluate_wallet_eligibility(wallet_address: str) -> Tuple[Dict, float]:
+    """Balance, daily limit and interval checks for a wallet, with the balance they saw"""
+    balance_info = await get_purpe_token_balance(wallet_address)
+    
+    if not balance_info["has_minimum_balance"]:
+        return {
+            "eligible": False,
+            "reason": f"Insufficient PURPE balance. Need minimum ${os.getenv('MINIMUM_PURPE_USD_REQUIREMENT', '10')} USD worth of PURPE tokens.",
+            "demo_mode": False
+        }, balance_info["balance"]
+    
+    # Check daily limits
+    daily_key = get_daily_key(wallet_address)
+    daily_rewards = user_rewards_today.get(daily_key, {"count": 0, "total_amount": 0, "last_reward": 0})
+    
+    daily_limit = float(os.getenv("DAILY_PURPE_REWARD_LIMIT", "10.0"))
+    
+    if daily_rewards["total_amount"] >= daily_limit:
+        tomorrow = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        return {
+            "eligible": False,
+            "reason": "Daily reward limit reached",
+            "next_eligible": tomorrow.isoformat(),
+            "demo_mode": False
+        }, balance_info["balance"]
+    
+    # Check minimum interval
+    min_interval = int(os.getenv("MIN_REWARD_INTERVAL_SECONDS", "300"))
+    if daily_rewards["last_reward"] and (time.time() - daily_rewards["last_reward"]) < min_interval:
+        next_eligible = datetime.fromtimestamp(daily_rewards["last_reward"] + min_interval, timezone.utc)
+        return {
+            "eligible": False,
+            "reason": f"Must wait {min_interval} seconds between rewards",
+            "next_eligible": next_eligible.isoformat(),
+            "demo_mode": False
+        }, balance_info["balance"]
+    
+    return {
+        "eligible": True,
+        "remaining_daily_amount": daily_limit - daily_rewards["total_amount"],
+        "demo_mode": False
+    }, balance_info["balance"]
+
 async def check_reward_eligibility(wallet_address: str, demo_mode: bool = False, client_ip: str = None) -> Dict:
     """Check if user is eligible for rewards"""
     try:
@@ -227,75 +356,89 @@ async def check_reward_eligibility(wallet_address: str, demo_mode: bool = False,
                 "demo_mode": True
             }
         
-        # Regular user flow - check PURPE balance requirement
-        balance_info = await get_purpe_token_balance(wallet_address)
+        # Wallet-scoped checks are cached; see eligibility_cache.py
+        eligibility = eligibility_cache.get(wallet_address)
+        if eligibility is None:
+            generation = eligibility_cache.generation
+            eligibility, balance = await evaluate_wallet_eligibility(wallet_address)
+            eligibility_cache.put(wallet_address, eligibility, generation, balance)
         
-        if not balance_info["has_minimum_balance"]:
-            return {
-                "eligible": False,
-                "reason": f"Insufficient PURPE balance. Need minimum ${os.getenv('MINIMUM_PURPE_USD_REQUIREMENT', '10')} USD worth of PURPE tokens.",
-                "demo_mode": False
-            }
+        if not eligibility["eligible"]:
+            return eligibility
         
-        # Check IP-based limits (10 PURPE max per IP)
+        # Check IP-based limits per address and per covering subnet
         if client_ip:
-            ip_rewards = await db.reward_transactions.find(
-                {"client_ip": client_ip, "status": "completed"}
-            ).to_list(None)
-            total_ip_rewards = sum(reward["amount"] for reward in ip_rewards)
-            max_per_ip = float(os.getenv("MAX_PURPE_PER_IP", "10.0"))
+            exhausted = ip_limiter.exceeded(client_ip)
             
-            if total_ip_rewards >= max_per_ip:
+            if exhausted:
+                if exhausted.get("prefix_length") in (None, 32, 128):
+                    reason = f"IP address has reached maximum limit of {exhausted['limit']} PURPE tokens"
+                else:
+                    reason = f"Network {exhausted['network']} has reached maximum limit of {exhausted['limit']} PURPE tokens"
                 return {
                     "eligible": False,
-                    "reason": f"IP address has reached maximum limit of {max_per_ip} PURPE tokens",
+                    "reason": reason,
                     "demo_mode": False
                 }
         
-        # Check daily limits
-        daily_key = get_daily_key(wallet_address)
-        daily_rewards = user_rewards_today.get(daily_key, {"count": 0, "total_amount": 0, "last_reward": 0})
-        
-        daily_limit = float(os.getenv("DAILY_PURPE_REWARD_LIMIT", "10.0"))
-        
-        if daily_rewards["total_amount"] >= daily_limit:
-            tomorrow = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
-            return {
-                "eligible": False,
-                "reason": "Daily reward limit reached",
-                "next_eligible": tomorrow.isoformat(),
-                "demo_mode": False
-            }
-        
-        # Check minimum interval
-        min_interval = int(os.getenv("MIN_REWARD_INTERVAL_SECONDS", "300"))
-        if daily_rewards["last_reward"] and (time.time() - daily_rewards["last_reward"]) < min_interval:
-            next_eligible = datetime.fromtimestamp(daily_rewards["last_reward"] + min_interval, timezone.utc)
-            return {
-                "eligible": False,
-                "reason": f"Must wait {min_interval} seconds between rewards",
-                "next_eligible": next_eligible.isoformat(),
-                "demo_mode": False
-            }
-        
-        return {
-            "eligible": True,
-            "remaining_daily_amount": daily_limit - daily_rewards["total_amount"],
-            "demo_mode": False
-        }
+        return eligibility
         
     except Exception as e:
         logger.error(f"Error checking reward eligibility: {e}")
         return {"eligible": False, "reason": "Unable to verify eligibility", "demo_mode": demo_mode}
 
+def to_timestamp(value: datetime) -> float:
+    """Convert a stored datetime (naive UTC from Mongo) to a unix timestamp"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+async def hydrate_reward_state() -> int:
+    """Rebuild today's in-memory reward counters from completed transactions"""
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    pipeline = [
+        {"$match": reward_store.query({"status": "completed", "created_at": {"$gte": today_start}})},
+        {"$group": {
+            "_id": "$" + reward_store.field("wallet_address"),
+            "count": {"$sum": 1},
+            "total_amount": {"$sum": "$" + reward_store.field("amount")},
+            "last_reward": {"$max": "$" + reward_store.field("created_at")}
+        }}
+    ]
+    
+    hydrated = 0
+    async for result in reward_store.collection.aggregate(pipeline):
+        wallet_address = reward_store.decode_value("wallet_address", result["_id"])
+        user_rewards_today[get_daily_key(wallet_address)] = {
+            "count": result["count"],
+            "total_amount": result["total_amount"],
+            "last_reward": to_timestamp(result["last_reward"])
+        }
+        hydrated += 1
+    
+    return hydrated
+
 # API Routes
 
-@app.get("/api/")
+@api_router.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "Purpe's Leap API is running!", "version": "1.0.0"}
 
-@app.post("/api/auth/challenge", response_model=ChallengeResponse)
+@api_router.get("/ready")
+async def readiness():
+    """Readiness probe, passes once in-memory state has been hydrated"""
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail="Service is starting up")
+    return {
+        "ready": True,
+        "hydration_seconds": startup_state["hydration_seconds"],
+        "hydrated_wallets": startup_state["hydrated_wallets"],
+        "hydrated_ips": startup_state["hydrated_ips"],
+        "hydrated_scores": startup_state["hydrated_scores"]
+    }
+
+@api_router.post("/auth/challenge", response_model=ChallengeResponse)
 async def create_auth_challenge(request: WalletChallenge):
     """Create authentication challenge for wallet"""
     try:
@@ -340,7 +483,7 @@ async def create_auth_challenge(request: WalletChallenge):
             error="Failed to create authentication challenge"
         )
 
-@app.post("/api/auth/verify")
+@api_router.post("/auth/verify")
 async def verify_wallet_signature(request: SignatureVerification):
     """Verify wallet signature and create session"""
     try:
@@ -392,7 +535,7 @@ async def verify_wallet_signature(request: SignatureVerification):
         logger.error(f"Error verifying signature: {e}")
         raise HTTPException(status_code=500, detail="Signature verification failed")
 
-@app.post("/api/auth/demo")
+@api_router.post("/auth/demo")
 async def create_demo_session():
     """Create a demo session without wallet requirements"""
     try:
@@ -421,7 +564,7 @@ async def create_demo_session():
         logger.error(f"Error creating demo session: {e}")
         raise HTTPException(status_code=500, detail="Failed to create demo session")
 
-@app.get("/api/token/balance/{wallet_address}", response_model=TokenBalance)
+@api_router.get("/token/balance/{wallet_address}", response_model=TokenBalance)
 async def get_token_balance(wallet_address: str):
     """Get PURPE token balance for wallet"""
     try:
@@ -429,6 +572,7 @@ async def get_token_balance(wallet_address: str):
             raise HTTPException(status_code=400, detail="Invalid wallet address")
         
         balance_info = await get_purpe_token_balance(wallet_address)
+        eligibility_cache.observe_balance(wallet_address, balance_info["balance"])
         
         return TokenBalance(
             wallet_address=wallet_address,
@@ -446,7 +590,7 @@ async def get_token_balance(wallet_address: str):
         logger.error(f"Error getting balance: {e}")
         raise HTTPException(status_code=500, detail="Failed to get token balance")
 
-@app.get("/api/rewards/eligibility")
+@api_router.get("/rewards/eligibility")
 async def get_reward_eligibility(request: Request, current_user: dict = Depends(get_current_user)):
     """Check reward eligibility for authenticated user"""
     try:
@@ -466,83 +610,29 @@ async def get_reward_eligibility(request: Request, current_user: dict = Depends(
         logger.error(f"Error checking eligibility: {e}")
         raise HTTPException(status_code=500, detail="Failed to check eligibility")
 
-@app.post("/api/rewards/claim", response_model=RewardResponse)
+@api_router.post("/rewards/claim", response_model=RewardResponse)
 async def claim_reward(
     reward_request: RewardClaim,
     request: Request,
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Claim reward for authenticated user"""
     try:
-        wallet_address = current_user["wallet_address"]
-        demo_mode = current_user.get("demo_mode", False)
-        reward_type = reward_request.reward_type
         client_ip = get_client_ip(request)
         
-        # Check eligibility
-        eligibility = await check_reward_eligibility(wallet_address, demo_mode, client_ip)
-        
-        if not eligibility["eligible"]:
-            return RewardResponse(
-                success=False,
-                error=eligibility["reason"],
-                next_eligible=eligibility.get("next_eligible")
-            )
-        
-        # Demo mode users get no rewards
-        if demo_mode:
-            return RewardResponse(
-                success=False,
-                error="Demo mode does not earn rewards. Connect wallet with PURPE tokens to earn rewards."
-            )
-        
-        # Calculate PURPE reward amount
-        reward_amounts = {
-            "game_completion": 1.0,  # 1 PURPE per game completion
-            "level_completion": 0.5,  # 0.5 PURPE per level
-            "daily_bonus": 2.0        # 2 PURPE daily bonus
-        }
-        
-        reward_amount = reward_amounts.get(reward_type, 1.0)
-        max_reward = float(os.getenv("MAX_SINGLE_REWARD_PURPE", "2.0"))
-        reward_amount = min(reward_amount, max_reward)
-        
-        # For MVP, we'll mock the PURPE transfer
-        # In production, implement actual token transfer
-        mock_signature = f"purpe_tx_{int(time.time())}_{secrets.token_hex(8)}"
-        logger.info(f"Mock PURPE reward of {reward_amount} sent to {wallet_address}")
-        
-        # Update daily rewards tracking
-        daily_key = get_daily_key(wallet_address)
-        if daily_key not in user_rewards_today:
-            user_rewards_today[daily_key] = {"count": 0, "total_amount": 0, "last_reward": 0}
-        
-        user_rewards_today[daily_key]["count"] += 1
-        user_rewards_today[daily_key]["total_amount"] += reward_amount
-        user_rewards_today[daily_key]["last_reward"] = time.time()
-        
-        # Store in database
-        reward_record = {
-            "id": str(uuid.uuid4()),
-            "wallet_address": wallet_address,
-            "client_ip": client_ip,
-            "amount": reward_amount,
-            "reward_type": reward_type,
-            "transaction_signature": mock_signature,
-            "status": "completed",
-            "demo_mode": demo_mode,
-            "created_at": datetime.now(timezone.utc)
-        }
+        if not idempotency_key:
+            return await grant_reward(reward_request.reward_type, client_ip, current_user)
         
-        await db.reward_transactions.insert_one(reward_record)
+        async def process_claim():
+            response = await grant_reward(reward_request.reward_type, client_ip, current_user)
+            return response.model_dump()
         
-        return RewardResponse(
-            success=True,
-            amount_sol=reward_amount,  # Will change this field name later
-            transaction_signature=mock_signature,
-            reward_type=reward_type
-        )
+        key = f"{current_user['wallet_address']}:rewards/claim:{idempotency_key}"
+        return await idempotency_store.run(key, reward_request.model_dump(), process_claim)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error claiming reward: {e}")
         return RewardResponse(
@@ -550,7 +640,118 @@ async def claim_reward(
             error="Failed to process reward claim"
         )
 
-@app.get("/api/user/stats", response_model=UserStats)
+async def grant_reward(reward_type: str, client_ip: str, current_user: dict) -> RewardResponse:
+    """Check eligibility and grant a reward, queueing its payout"""
+    wallet_address = current_user["wallet_address"]
+    demo_mode = current_user.get("demo_mode", False)
+    
+    # Check eligibility
+    eligibility = await check_reward_eligibility(wallet_address, demo_mode, client_ip)
+    
+    if not eligibility["eligible"]:
+        return RewardResponse(
+            success=False,
+            error=eligibility["reason"],
+            next_eligible=eligibility.get("next_eligible")
+        )
+    
+    # Demo mode users get no rewards
+    if demo_mode:
+        return RewardResponse(
+            success=False,
+            error="Demo mode does not earn rewards. Connect wallet with PURPE tokens to earn rewards."
+        )
+    
+    # Calculate PURPE reward amount
+    reward_amounts = {
+        "game_completion": 1.0,  # 1 PURPE per game completion
+        "level_completion": 0.5,  # 0.5 PURPE per level
+        "daily_bonus": 2.0        # 2 PURPE daily bonus
+    }
+    
+    reward_amount = reward_amounts.get(reward_type, 1.0)
+    max_reward = float(os.getenv("MAX_SINGLE_REWARD_PURPE", "2.0"))
+    reward_amount = min(reward_amount, max_reward)
+    
+    # Update daily rewards tracking
+    daily_key = get_daily_key(wallet_address)
+    if daily_key not in user_rewards_today:
+        user_rewards_today[daily_key] = {"count": 0, "total_amount": 0, "last_reward": 0}
+    
+    last_reward = user_rewards_today[daily_key]["last_reward"]
+    user_rewards_today[daily_key]["count"] += 1
+    user_rewards_today[daily_key]["total_amount"] += reward_amount
+    user_rewards_today[daily_key]["last_reward"] = time.time()
+    eligibility_cache.invalidate(wallet_address)
+    
+    # Store in database; the token transfer is sent by the payout worker
+    reward_record = {
+        "id": str(uuid.uuid4()),
+        "wallet_address": wallet_address,
+        "client_ip": client_ip,
+        "amount": reward_amount,
+        "reward_type": reward_type,
+        "transaction_signature": None,
+        "payout_status": PENDING,
+        "status": "completed",
+        "demo_mode": demo_mode,
+        "created_at": datetime.now(timezone.utc)
+    }
+    
+    try:
+        await reward_store.insert(reward_record)
+    except Exception:
+        # Nothing was granted, so give the claim back
+        user_rewards_today[daily_key]["count"] -= 1
+        user_rewards_today[daily_key]["total_amount"] -= reward_amount
+        user_rewards_today[daily_key]["last_reward"] = last_reward
+        raise
+    ip_limiter.record(client_ip, reward_amount)
+    try:
+        await record_reward(db, wallet_address, reward_amount, reward_record["created_at"])
+    except Exception as e:
+        logger.error(f"Failed to update reward rollups for {wallet_address}: {e}")
+    try:
+        await enqueue_payout(db, reward_record["id"], wallet_address, reward_amount)
+        logger.info(f"Queued PURPE reward of {reward_amount} for {wallet_address}")
+    except Exception as e:
+        # The reward is stored as pending; the payout worker's sweep queues it
+        logger.error(f"Failed to queue payout for reward {reward_record['id']}: {e}")
+    
+    return RewardResponse(
+        success=True,
+        amount_sol=reward_amount,  # Will change this field name later
+        reward_type=reward_type,
+        payout_id=reward_record["id"],
+        payout_status=PENDING
+    )
+
+@api_router.get("/rewards/payouts/{payout_id}")
+async def get_payout_status(payout_id: str, current_user: dict = Depends(get_current_user)):
+    """Get the delivery status of a reward payout"""
+    try:
+        payout = await get_payout(db, payout_id)
+        
+        if not payout or payout["wallet_address"] != current_user["wallet_address"]:
+            raise HTTPException(status_code=404, detail="Payout not found")
+        
+        return {
+            "success": True,
+            "payout_id": payout["id"],
+            "amount": payout["amount"],
+            "status": payout["status"],
+            "attempts": payout["attempts"],
+            "transaction_signature": payout["signature"],
+            "created_at": payout["created_at"].isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting payout status: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get payout status")
+
+@api_router.get("/user/stats", response_model=UserStats)
 async def get_user_stats(current_user: dict = Depends(get_current_user)):
     """Get user reward statistics"""
     try:
@@ -561,9 +762,11 @@ async def get_user_stats(current_user: dict = Depends(get_current_user)):
         daily_rewards = user_rewards_today.get(daily_key, {"count": 0, "total_amount": 0})
         
         # Get total stats from database
-        total_rewards = await db.reward_transactions.find(
-            {"wallet_address": wallet_address, "status": "completed"}
-        ).to_list(None)
+        total_rewards = [
+            reward async for reward in reward_store.find(
+                {"wallet_address": wallet_address, "status": "completed"}, ["amount"]
+            )
+        ]
         
         total_amount = sum(reward["amount"] for reward in total_rewards)
         daily_limit = float(os.getenv("DAILY_SOL_REWARD_LIMIT", "0.1"))
@@ -582,37 +785,86 @@ async def get_user_stats(current_user: dict = Depends(get_current_user)):
         logger.error(f"Error getting user stats: {e}")
         raise HTTPException(status_code=500, detail="Failed to get user statistics")
 
-@app.get("/api/leaderboard")
-async def get_leaderboard(limit: int = 10):
-    """Get top players leaderboard"""
+@api_router.get("/user/rewards")
+async def get_reward_history(
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get the user's rewards, newest first, one keyset page at a time"""
+    if not 0 < limit <= 100:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 100")
     try:
-        # Aggregate rewards by wallet
-        pipeline = [
-            {"$match": {"status": "completed"}},
-            {"$group": {
-                "_id": "$wallet_address",
-                "total_rewards": {"$sum": "$amount"},
-                "total_games": {"$sum": 1},
-                "last_activity": {"$max": "$created_at"}
-            }},
-            {"$sort": {"total_rewards": -1}},
-            {"$limit": limit}
+        position = decode_cursor(cursor) if cursor else None
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        # Walks the (wallet_address, created_at, _id) index backwards from the
+        # cursor, so every page costs the same however deep it is
+        query = {"wallet_address": current_user["wallet_address"], "status": "completed"}
+        if position:
+            query = before_cursor(query, position)
+        
+        documents = [
+            document async for document in reward_store.find(
+                query,
+                ["_id", "id", "amount", "reward_type", "payout_status", "transaction_signature", "created_at"],
+                sort=[("created_at", -1), ("_id", -1)],
+                limit=limit + 1
+            )
+        ]
+        
+        page = documents[:limit]
+        rewards = [
+            {
+                "id": document.get("id"),
+                "amount": document["amount"],
+                "reward_type": document.get("reward_type"),
+                "payout_status": document.get("payout_status"),
+                "transaction_signature": document.get("transaction_signature"),
+                "created_at": document["created_at"].isoformat()
+            }
+            for document in page
         ]
+        next_cursor = None
+        if len(documents) > limit:
+            last = page[-1]
+            next_cursor = encode_cursor(last["created_at"], last["_id"])
         
-        results = await db.reward_transactions.aggregate(pipeline).to_list(None)
+        return {
+            "success": True,
+            "rewards": rewards,
+            "next_cursor": next_cursor
+        }
+        
+    except Exception as e:
+        logger.error(f"Error getting reward history: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get reward history")
+
+@api_router.get("/leaderboard")
+async def get_leaderboard(limit: int = 10, window: str = "all"):
+    """Get top players leaderboard for all time, today, this week or the last 7 days"""
+    if window not in REWARD_WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unknown leaderboard window: {window}")
+    
+    try:
+        # Merged from per-wallet rollup buckets rather than reward_transactions
+        results = await get_window_leaderboard(db, window, limit)
         
         leaderboard = []
         for i, result in enumerate(results, 1):
             leaderboard.append({
                 "rank": i,
-                "wallet_address": result["_id"][:8] + "..." + result["_id"][-4:],  # Truncate for privacy
+                "wallet_address": truncate_wallet(result["wallet_address"]),  # Truncate for privacy
                 "total_rewards": round(result["total_rewards"], 6),
-                "total_games": result["total_games"],
+                "total_games": result["claims"],
                 "last_activity": result["last_activity"].isoformat()
             })
         
         return {
             "success": True,
+            "window": window,
             "leaderboard": leaderboard
         }
         
@@ -620,25 +872,202 @@ async def get_leaderboard(limit: int = 10):
         logger.error(f"Error getting leaderboard: {e}")
         raise HTTPException(status_code=500, detail="Failed to get leaderboard")
 
+@api_router.get("/leaderboard/scores")
+async def get_score_leaderboard(window: str = "global", offset: int = 0, limit: int = 10):
+    """Get the best validated game scores for all time, today or this week"""
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"Unknown leaderboard window: {window}")
+    if offset < 0 or not 0 < limit <= 100 or offset + limit > score_leaderboards.top_k:
+        raise HTTPException(status_code=400, detail=f"Only the top {score_leaderboards.top_k} scores are ranked")
+    
+    board = score_leaderboards.board(window)
+    leaderboard = [
+        {
+            **entry,
+            "wallet_address": truncate_wallet(entry["wallet_address"]),
+            "achieved_at": datetime.fromtimestamp(entry["achieved_at"], timezone.utc).isoformat()
+        }
+        for entry in await board.page(offset, limit)
+    ]
+    
+    return {
+        "success": True,
+        "window": window,
+        "period": score_leaderboards.periods[window],
+        "total_players": await board.count(),
+        "leaderboard": leaderboard
+    }
+
+@api_router.get("/leaderboard/scores/me")
+async def get_my_score_standing(current_user: dict = Depends(get_current_user)):
+    """Get the current wallet's best score, rank and percentile in each window"""
+    standings = {}
+    for window in WINDOWS:
+        standing = await score_leaderboards.board(window).standing(current_user["wallet_address"])
+        if standing:
+            standing["achieved_at"] = datetime.fromtimestamp(standing["achieved_at"], timezone.utc).isoformat()
+        standings[window] = standing
+    
+    return {
+        "success": True,
+        "standings": standings
+    }
+
+@api_router.get("/admin/exports/reward-transactions")
+async def export_reward_transactions(
+    format: str = "ndjson",
+    gzip: bool = False,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    wallet_address: Optional[str] = None,
+    client_ip: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    admin: bool = Depends(require_admin)
+):
+    """Stream reward transactions as NDJSON or CSV, resumable from any row's cursor"""
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format: {format}")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    query = build_export_query(start, end, wallet_address, client_ip)
+    documents = iter_reward_transactions(db, query, reward_store, cursor=cursor, limit=limit)
+    body = iter_encoded(iter_export_lines(documents, format, header=not cursor), compress=gzip)
+    
+    filename = f"reward_transactions.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        body,
+        media_type="application/gzip" if gzip else EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.get("/admin/sessions/reaper")
+async def get_session_reaper_status(admin: bool = Depends(require_admin)):
+    """Progress metrics of the stale game session reaper"""
+    return {
+        "idle_seconds": session_reaper.idle_seconds,
+        "retention_days": session_reaper.retention_days,
+        **session_reaper.metrics
+    }
+
+@api_router.get("/admin/eligibility/cache")
+async def get_eligibility_cache_status(admin: bool = Depends(require_admin)):
+    """Hit rate and size of the reward eligibility decision cache"""
+    return {
+        "positive_ttl_seconds": eligibility_cache.positive_ttl,
+        "negative_ttl_seconds": eligibility_cache.negative_ttl,
+        **eligibility_cache.stats()
+    }
+
+# Read-only endpoints that can be multiplexed through /api/batch
+BATCH_ROUTES = {
+    "/user/stats": lambda params, request, user: get_user_stats(current_user=user),
+    "/user/rewards": lambda params, request, user: get_reward_history(
+        limit=int(params.get("limit", 20)), cursor=params.get("cursor"), current_user=user
+    ),
+    "/rewards/eligibility": lambda params, request, user: get_reward_eligibility(request, current_user=user),
+    "/token/balance": lambda params, request, user: get_token_balance(user["wallet_address"]),
+    "/leaderboard": lambda params, request, user: get_leaderboard(
+        limit=int(params.get("limit", 10)), window=params.get("window", "all")
+    ),
+    "/leaderboard/scores": lambda params, request, user: get_score_leaderboard(
+        window=params.get("window", "global"), offset=int(params.get("offset", 0)), limit=int(params.get("limit", 10))
+    ),
+    "/leaderboard/scores/me": lambda params, request, user: get_my_score_standing(current_user=user)
+}
+
+def parse_batch_path(sub_request: BatchSubRequest) -> Tuple[str, Dict]:
+    """Split a sub-request into its router path and merged query parameters"""
+    url = urlsplit(sub_request.path)
+    path = url.path[len("/api"):] if url.path.startswith("/api/") else url.path
+    return path.rstrip("/") or "/", {**dict(parse_qsl(url.query)), **sub_request.params}
+
+async def run_batch_request(path: str, params: Dict, request: Request, current_user: dict) -> Dict:
+    """Run one sub-request, returning its status and body instead of raising"""
+    handler = BATCH_ROUTES.get(path)
+    if handler is None:
+        return {"status": 404, "body": {"detail": f"Not available in a batch: {path}"}}
+    try:
+        return {"status": 200, "body": jsonable_encoder(await handler(params, request, current_user))}
+    except HTTPException as e:
+        return {"status": e.status_code, "body": {"detail": e.detail}}
+    except (TypeError, ValueError):
+        return {"status": 400, "body": {"detail": "Invalid parameters"}}
+    except Exception as e:
+        logger.error(f"Batched request to {path} failed: {e}")
+        return {"status": 500, "body": {"detail": "Internal server error"}}
+
+@api_router.post("/batch")
+async def batch(batch_request: BatchRequest, request: Request, current_user: dict = Depends(get_current_user)):
+    """Run several read-only API calls in one authenticated round trip.
+    
+    Sub-requests run concurrently; identical ones run once, and lookups
+    such as the token balance are shared between them.
+    """
+    max_requests = int(os.getenv("BATCH_MAX_REQUESTS", "20"))
+    if len(batch_request.requests) > max_requests:
+        raise HTTPException(status_code=400, detail=f"At most {max_requests} requests per batch")
+    
+    batch_cache.set({})
+    tasks: Dict[str, asyncio.Future] = {}
+    keys = []
+    for sub_request in batch_request.requests:
+        path, params = parse_batch_path(sub_request)
+        key = json.dumps([path, params], sort_keys=True, default=str)
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(run_batch_request(path, params, request, current_user))
+        keys.append(key)
+    await asyncio.gather(*tasks.values())
+    
+    return {
+        "success": True,
+        "responses": [
+            {"id": sub_request.id, **tasks[key].result()}
+            for sub_request, key in zip(batch_request.requests, keys)
+        ]
+    }
+
 # Game-specific endpoints
 
-@app.post("/api/game/start")
+@api_router.post("/game/start")
 async def start_game_session(current_user: dict = Depends(get_current_user)):
     """Start a new game session"""
     try:
         wallet_address = current_user["wallet_address"]
+        demo_mode = current_user.get("demo_mode", False)
         
         # Check eligibility
-        eligibility = await check_reward_eligibility(wallet_address)
+        eligibility = await check_reward_eligibility(wallet_address, demo_mode)
+        
+        # Seeds the obstacle layout; the client's input log is replayed against it
+        replay_seed = secrets.randbits(32)
+        
+        # Demo sessions stay in memory and never touch the database
+        if demo_mode:
+            game_session = demo_sessions.start(wallet_address)
+            return {
+                "success": True,
+                "session_id": game_session["id"],
+                "replay_seed": replay_seed,
+                "eligible_for_rewards": False,
+                "eligibility_reason": eligibility["reason"]
+            }
         
+        start_time = datetime.now(timezone.utc)
         game_session = {
             "id": str(uuid.uuid4()),
             "wallet_address": wallet_address,
-            "start_time": datetime.now(timezone.utc),
+            "start_time": start_time,
+            "last_seen": start_time,
             "status": "active",
             "current_level": 1,
             "score": 0,
-            "lives": 3
+            "lives": 3,
+            "replay_seed": replay_seed
         }
         
         await db.game_sessions.insert_one(game_session)
@@ -646,6 +1075,7 @@ async def start_game_session(current_user: dict = Depends(get_current_user)):
         return {
             "success": True,
             "session_id": game_session["id"],
+            "replay_seed": replay_seed,
             "eligible_for_rewards": eligibility["eligible"],
             "eligibility_reason": eligibility.get("reason", "Eligible for rewards")
         }
@@ -654,60 +1084,247 @@ async def start_game_session(current_user: dict = Depends(get_current_user)):
         logger.error(f"Error starting game session: {e}")
         raise HTTPException(status_code=500, detail="Failed to start game session")
 
-@app.post("/api/game/complete")
+@api_router.post("/game/heartbeat")
+async def game_session_heartbeat(session_data: dict, current_user: dict = Depends(get_current_user)):
+    """Mark an active game session as still being played"""
+    # Demo sessions are in memory and never reaped
+    if current_user.get("demo_mode", False):
+        return {"success": True}
+    
+    result = await db.game_sessions.update_one(
+        {"id": session_data.get("session_id"), "wallet_address": current_user["wallet_address"], "status": "active"},
+        {"$set": {"last_seen": datetime.now(timezone.utc)}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Game session is unknown or no longer active")
+    return {"success": True}
+
+@api_router.post("/game/complete")
 async def complete_game_session(
     session_data: dict,
-    current_user: dict = Depends(get_current_user)
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """Complete game session and award rewards"""
     try:
-        wallet_address = current_user["wallet_address"]
-        session_id = session_data.get("session_id")
-        final_score = session_data.get("score", 0)
-        levels_completed = session_data.get("levels_completed", 0)
+        client_ip = get_client_ip(request)
         
-        # Update game session
-        await db.game_sessions.update_one(
-            {"id": session_id, "wallet_address": wallet_address},
-            {
-                "$set": {
-                    "status": "completed",
-                    "end_time": datetime.now(timezone.utc),
-                    "final_score": final_score,
-                    "levels_completed": levels_completed
-                }
-            }
-        )
+        # Demo completions are in-memory only and never rewarded, so retries are harmless
+        if not idempotency_key or current_user.get("demo_mode", False):
+            return await finish_game_session(session_data, client_ip, current_user)
         
-        # Award rewards if eligible
-        eligibility = await check_reward_eligibility(wallet_address)
+        key = f"{current_user['wallet_address']}:game/complete:{idempotency_key}"
+        return await idempotency_store.run(
+            key,
+            session_data,
+            lambda: finish_game_session(session_data, client_ip, current_user)
+        )
         
-        if eligibility["eligible"] and levels_completed > 0:
-            # Claim game completion reward
-            reward_request = RewardClaim(reward_type="game_completion")
-            reward_response = await claim_reward(reward_request, current_user)
-            
-            return {
-                "success": True,
-                "final_score": final_score,
-                "levels_completed": levels_completed,
-                "reward_awarded": reward_response.success,
-                "reward_amount": reward_response.amount_sol if reward_response.success else 0,
-                "transaction_signature": reward_response.transaction_signature if reward_response.success else None
-            }
-        else:
-            return {
-                "success": True,
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error completing game session: {e}")
+        raise HTTPException(status_code=500, detail="Failed to complete game session")
+
+async def finish_game_session(session_data: dict, client_ip: str, current_user: dict) -> Dict:
+    """Record a finished game session and award the completion reward"""
+    wallet_address = current_user["wallet_address"]
+    session_id = session_data.get("session_id")
+    final_score = session_data.get("score", 0)
+    levels_completed = session_data.get("levels_completed", 0)
+    
+    if current_user.get("demo_mode", False):
+        demo_sessions.complete(session_id, wallet_address, final_score, levels_completed)
+        return {
+            "success": True,
+            "final_score": final_score,
+            "levels_completed": levels_completed,
+            "reward_awarded": False,
+            "reward_reason": "Demo mode does not earn rewards. Connect wallet with PURPE tokens to earn rewards."
+        }
+    
+    session = await db.game_sessions.find_one(
+        {"id": session_id, "wallet_address": wallet_address},
+        {"_id": 0, "replay_seed": 1, "start_time": 1, "status": 1}
+    )
+    replay = await validate_game_replay(session, session_data.get("replay"))
+    if replay["valid"]:
+        # The replayed result is authoritative; the client's claim is only kept for review
+        final_score = replay["score"]
+        levels_completed = replay["levels_completed"]
+    
+    # Update game session, once
+    end_time = datetime.now(timezone.utc)
+    result = await db.game_sessions.update_one(
+        {"id": session_id, "wallet_address": wallet_address, "status": "active"},
+        {
+            "$set": {
+                "status": "completed",
+                "end_time": end_time,
+                "last_seen": end_time,
                 "final_score": final_score,
                 "levels_completed": levels_completed,
-                "reward_awarded": False,
-                "reward_reason": eligibility.get("reason", "No reward eligibility")
+                "claimed_score": session_data.get("score", 0),
+                "claimed_levels_completed": session_data.get("levels_completed", 0),
+                "replay_valid": replay["valid"],
+                "replay_reason": replay.get("reason")
             }
+        }
+    )
+    if result.matched_count == 0 and replay["valid"]:
+        replay = {"valid": False, "reason": "Game session is unknown or no longer active"}
+    
+    if not replay["valid"]:
+        logger.warning(f"Rejected game replay for {wallet_address} session {session_id}: {replay['reason']}")
+        return {
+            "success": True,
+            "final_score": final_score,
+            "levels_completed": levels_completed,
+            "replay_valid": False,
+            "reward_awarded": False,
+            "reward_reason": f"Gameplay could not be validated: {replay['reason']}"
+        }
+    
+    await score_leaderboards.submit(wallet_address, final_score, end_time)
+    
+    # Award rewards if eligible
+    eligibility = await check_reward_eligibility(wallet_address)
+    
+    if eligibility["eligible"] and levels_completed > 0:
+        # Claim game completion reward
+        reward_response = await grant_reward("game_completion", client_ip, current_user)
         
-    except Exception as e:
-        logger.error(f"Error completing game session: {e}")
-        raise HTTPException(status_code=500, detail="Failed to complete game session")
+        return {
+            "success": True,
+            "final_score": final_score,
+            "levels_completed": levels_completed,
+            "replay_valid": True,
+            "reward_awarded": reward_response.success,
+            "reward_amount": reward_response.amount_sol if reward_response.success else 0,
+            "transaction_signature": reward_response.transaction_signature if reward_response.success else None,
+            "payout_id": reward_response.payout_id,
+            "payout_status": reward_response.payout_status
+        }
+    else:
+        return {
+            "success": True,
+            "final_score": final_score,
+            "levels_completed": levels_completed,
+            "replay_valid": True,
+            "reward_awarded": False,
+            "reward_reason": eligibility.get("reason", "No reward eligibility")
+        }
+
+async def validate_game_replay(session: Optional[Dict], replay: Optional[str]) -> Dict:
+    """Replay a session's base64 input log against the seed it was issued"""
+    if not session or session.get("replay_seed") is None:
+        return {"valid": False, "reason": "Unknown game session"}
+    if session.get("status") == "completed":
+        return {"valid": False, "reason": "Game session already completed"}
+    if session.get("status") != "active":
+        return {"valid": False, "reason": "Game session expired"}
+    if not replay:
+        return {"valid": False, "reason": "Missing gameplay replay"}
+    try:
+        replay_bytes = base64.b64decode(replay, validate=True)
+    except (binascii.Error, ValueError, TypeError):
+        return {"valid": False, "reason": "Malformed gameplay replay"}
+    
+    result = await replay_validator.validate(replay_bytes, session["replay_seed"])
+    if not result["valid"]:
+        return result
+    
+    # A log cannot cover more game time than has passed since the session started
+    elapsed = time.time() - to_timestamp(session["start_time"])
+    if result["duration_seconds"] > elapsed + float(os.getenv("REPLAY_CLOCK_SLACK_SECONDS", "5")):
+        return {"valid": False, "reason": "Gameplay replay is longer than the session"}
+    return result
+
+async def warm_start():
+    """Hydrate daily reward limits before accepting traffic"""
+    started = time.perf_counter()
+    await reward_store.collection.create_index([(reward_store.field("status"), 1), (reward_store.field("created_at"), 1)])
+    hydrated = await hydrate_reward_state()
+    hydrated_ips = await ip_limiter.hydrate(db, reward_store)
+    await ensure_score_indexes(db)
+    hydrated_scores = await score_leaderboards.rebuild()
+    await ensure_rollup_indexes(db)
+    await mark_rollups_live(db)
+    elapsed = time.perf_counter() - started
+    
+    startup_state["hydration_seconds"] = round(elapsed, 4)
+    startup_state["hydrated_wallets"] = hydrated
+    startup_state["hydrated_ips"] = hydrated_ips
+    startup_state["hydrated_scores"] = hydrated_scores
+    startup_state["ready"] = True
+    logger.info(f"Hydrated reward state for {hydrated} wallets and {hydrated_ips} IPs in {elapsed:.3f}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database connection and warm in-memory state for the app's lifetime"""
+    global client, db, payout_worker, idempotency_store, ip_limiter, demo_sessions, session_reaper, replay_validator
+    global score_leaderboards, rollup_pruner, eligibility_cache, reward_store
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from game_replay import ReplayValidator
+    
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    ip_limiter = SubnetLimiter.from_env()
+    demo_sessions = DemoSessionStore.from_env()
+    eligibility_cache = EligibilityCache.from_env()
+    score_leaderboards = ScoreLeaderboards.from_env(db)
+    replay_validator = ReplayValidator.from_env()
+    try:
+        reward_store = await RewardStore.open(db)
+        await warm_start()
+        ip_limiter.start_sync(db, reward_store)
+        await ensure_payout_indexes(db, reward_store)
+        await ensure_export_indexes(db, reward_store)
+        await ensure_session_indexes(db)
+        idempotency_store = IdempotencyStore.from_env(db)
+        await idempotency_store.ensure_indexes()
+        payout_worker = PayoutWorker.from_env(db, create_payout_rpc(), reward_store)
+        payout_worker.start()
+        demo_sessions.start_flusher(db)
+        session_reaper = SessionReaper.from_env(db)
+        session_reaper.start()
+        rollup_pruner = RollupPruner.from_env(db)
+        rollup_pruner.start()
+        yield
+    finally:
+        startup_state["ready"] = False
+        await ip_limiter.stop_sync()
+        if payout_worker:
+            await payout_worker.stop()
+        if session_reaper:
+            await session_reaper.stop()
+        if rollup_pruner:
+            await rollup_pruner.stop()
+        await demo_sessions.stop_flusher(db)
+        replay_validator.close()
+        client.close()
+
+def create_app() -> FastAPI:
+    """Application factory"""
+    logging.basicConfig(level=logging.INFO)
+    
+    app = FastAPI(
+        title="Purpe's Leap - Solana Web3 Frogger Game",
+        description="Play-to-earn Frogger-style game on Solana",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    
+    app.include_router(api_router)
+    return app
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+app = create_app()
@@ -0,0 +1,216 @@
+"""Background reaper for abandoned and old game sessions.
+
+Sessions whose player closed the tab stay ``active`` forever. Clients
+refresh a session's ``last_seen`` while it is being played. The reaper
+periodically marks active sessions that have not been seen for longer
+than the idle window as ``expired``, and moves completed or expired
+sessions older than the retention window into ``db.game_sessions_archive``.
+
+Both sweeps work in small batches keyed by session id and sleep between
+batches in proportion to how long the last batch took, so that the
+reaper uses at most a fraction of the database's time and never crowds
+out request-path queries.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Game session status values
+ACTIVE = "active"
+COMPLETED = "completed"
+EXPIRED = "expired"
+
+# Fields kept in the archive; live-play fields such as lives and the
+# running score are dropped
+ARCHIVE_FIELDS = (
+    "wallet_address", "start_time", "end_time", "status", "final_score", "levels_completed", "replay_valid"
+)
+
+
+async def ensure_session_indexes(db) -> None:
+    await db.game_sessions.create_index("id")
+    await db.game_sessions.create_index([("status", 1), ("start_time", 1)])
+    await db.game_sessions.create_index([("status", 1), ("last_seen", 1)])
+    await db.game_sessions.create_index([("status", 1), ("end_time", 1)])
+    await db.game_sessions_archive.create_index([("wallet_address", 1), ("end_time", 1)])
+
+
+def to_archive_document(session: Dict) -> Dict:
+    """Compact archive form of a game session, keyed by session id"""
+    document = {"_id": session["id"]}
+    for name in ARCHIVE_FIELDS:
+        if session.get(name) is not None:
+            document[name] = session[name]
+    return document
+
+
+class SessionReaper:
+    """Background task that expires abandoned sessions and archives old ones"""
+
+    def __init__(
+        self,
+        db,
+        idle_seconds: float = 7200,
+        retention_days: float = 30,
+        batch_size: int = 500,
+        interval: float = 300.0,
+        duty_cycle: float = 0.2,
+        min_pause: float = 0.05
+    ):
+        self.db = db
+        self.idle_seconds = idle_seconds
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.interval = interval
+        self.duty_cycle = duty_cycle
+        self.min_pause = min_pause
+        self.metrics = {
+            "sweeps": 0,
+            "batches": 0,
+            "expired": 0,
+            "archived": 0,
+            "errors": 0,
+            "last_sweep_started": None,
+            "last_sweep_seconds": None,
+            "sweep_in_progress": False
+        }
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, db) -> "SessionReaper":
+        return cls(
+            db,
+            idle_seconds=float(os.getenv("SESSION_IDLE_SECONDS", "7200")),
+            retention_days=float(os.getenv("SESSION_RETENTION_DAYS", "30")),
+            batch_size=int(os.getenv("SESSION_REAPER_BATCH_SIZE", "500")),
+            interval=float(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", "300"))
+        )
+
+    def start(self) -> None:
+        self._stopping.clear()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        if self._task:
+            await self._task
+            self._task = None
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.metrics["errors"] += 1
+                logger.error(f"Session reaper sweep failed: {e}")
+            await self._sleep(self.interval)
+
+    async def _sleep(self, seconds: float) -> bool:
+        """Sleep unless stopping; returns True if the reaper should stop"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        return self._stopping.is_set()
+
+    async def _pace(self, batch_seconds: float) -> bool:
+        """Back off after a batch so the reaper stays within its duty cycle"""
+        pause = max(self.min_pause, batch_seconds * (1 - self.duty_cycle) / self.duty_cycle)
+        return await self._sleep(pause)
+
+    async def sweep(self) -> Dict:
+        """Run one expire pass and one archive pass"""
+        started = time.perf_counter()
+        self.metrics["sweep_in_progress"] = True
+        self.metrics["last_sweep_started"] = datetime.now(timezone.utc).isoformat()
+        try:
+            expired = await self.expire_abandoned()
+            archived = await self.archive_old()
+        finally:
+            self.metrics["sweep_in_progress"] = False
+
+        elapsed = time.perf_counter() - started
+        self.metrics["sweeps"] += 1
+        self.metrics["last_sweep_seconds"] = round(elapsed, 4)
+        if expired or archived:
+            logger.info(f"Session reaper expired {expired} and archived {archived} sessions in {elapsed:.3f}s")
+        return {"expired": expired, "archived": archived}
+
+    @staticmethod
+    def idle_query(cutoff: datetime) -> Dict:
+        """Active sessions not seen since the cutoff"""
+        return {"status": ACTIVE, "$or": [
+            {"last_seen": {"$lt": cutoff}},
+            # Started before sessions tracked last_seen
+            {"last_seen": {"$exists": False}, "start_time": {"$lt": cutoff}}
+        ]}
+
+    async def expire_abandoned(self) -> int:
+        """Mark active sessions not seen for longer than the idle window as expired"""
+        total = 0
+        while True:
+            batch_started = time.perf_counter()
+            now = datetime.now(timezone.utc)
+            cutoff = now - timedelta(seconds=self.idle_seconds)
+            cursor = self.db.game_sessions.find(
+                self.idle_query(cutoff),
+                {"_id": 0, "id": 1}
+            ).limit(self.batch_size)
+            ids = [session["id"] async for session in cursor]
+            if not ids:
+                return total
+
+            # Re-check so a session completed or seen since the read is left alone
+            result = await self.db.game_sessions.update_many(
+                {"id": {"$in": ids}, **self.idle_query(cutoff)},
+                {"$set": {"status": EXPIRED, "end_time": now}}
+            )
+            total += result.modified_count
+            self.metrics["expired"] += result.modified_count
+            self.metrics["batches"] += 1
+
+            if len(ids) < self.batch_size or await self._pace(time.perf_counter() - batch_started):
+                return total
+
+    async def archive_old(self) -> int:
+        """Move finished sessions past the retention window into the archive"""
+        from pymongo.errors import BulkWriteError
+
+        total = 0
+        while True:
+            batch_started = time.perf_counter()
+            cutoff = datetime.now(timezone.utc) - timedelta(days=self.retention_days)
+            sessions = await self.db.game_sessions.find(
+                {"status": {"$in": [COMPLETED, EXPIRED]}, "end_time": {"$lt": cutoff}},
+                {"_id": 0, "id": 1, **{name: 1 for name in ARCHIVE_FIELDS}}
+            ).limit(self.batch_size).to_list(self.batch_size)
+            if not sessions:
+                return total
+
+            # Archive documents are keyed by session id, so rows copied by a
+            # sweep that died before deleting them are skipped on the rerun
+            try:
+                await self.db.game_sessions_archive.insert_many(
+                    [to_archive_document(session) for session in sessions],
+                    ordered=False
+                )
+            except BulkWriteError as e:
+                if any(error["code"] != 11000 for error in e.details.get("writeErrors", [])):
+                    raise
+
+            ids = [session["id"] for session in sessions]
+            result = await self.db.game_sessions.delete_many({"id": {"$in": ids}})
+            total += result.deleted_count
+            self.metrics["archived"] += result.deleted_count
+            self.metrics["batches"] += 1
+
+            if len(sessions) < self.batch_size or await self._pace(time.perf_counter() - batch_started):
+                return total
+
@@ -95,6 +95,19 @@ class PurpeLeapAPITester:
         )
         return success
 
+    def test_readiness(self):
+        """Test readiness probe after warm start"""
+        success, response = self.run_test(
+            "Readiness Probe",
+            "GET",
+            "ready",
+            200
+        )
+        
+        if success and 'hydration_seconds' in response:
+            print(f"   Hydration took {response['hydration_seconds']}s")
+        return success
+
     def test_auth_challenge(self):
         """Test authentication challenge creation"""
         # Use a valid Solana wallet address format (44 characters base58)
@@ -188,6 +201,30 @@ class PurpeLeapAPITester:
         )
         return success
 
+    def test_batch(self):
+        """Test batched dashboard load (requires auth)"""
+        if not self.token:
+            print("❌ Cannot test batch - no auth token")
+            return False
+            
+        success, response = self.run_test(
+            "Batch Dashboard Load",
+            "POST",
+            "batch",
+            200,
+            data={"requests": [
+                {"id": "stats", "path": "/user/stats"},
+                {"id": "eligibility", "path": "/rewards/eligibility"},
+                {"id": "history", "path": "/user/rewards"}
+            ]}
+        )
+        
+        if success:
+            statuses = {item['id']: item['status'] for item in response.get('responses', [])}
+            print(f"   Sub-request statuses: {statuses}")
+            return all(code == 200 for code in statuses.values())
+        return success
+
     def test_leaderboard(self):
         """Test leaderboard endpoint"""
         success, response = self.run_test(
@@ -262,6 +299,7 @@ class PurpeLeapAPITester:
         # Basic tests (no auth required)
         print("\n📋 Basic API Tests")
         self.test_health_check()
+        self.test_readiness()
         self.test_leaderboard()
         
         # Token balance test (no auth required)
@@ -278,6 +316,7 @@ class PurpeLeapAPITester:
             print("\n🎮 Game & Reward Tests (Authenticated)")
             self.test_reward_eligibility()
             self.test_user_stats()
+            self.test_batch()
             
             if self.test_game_start():
                 # Wait a moment before completing game
@@ -1,81 +1,83 @@
 import { useState, useEffect, useRef, useCallback } from 'react';
 import axios from 'axios';
+import {
+  FROG_SIZE,
+  GAME_HEIGHT,
+  GAME_WIDTH,
+  GameSimulation,
+  ReplayRecorder,
+  START_LIVES,
+  TICK_MS,
+  randomSeed
+} from '@/lib/replay';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
-// Game constants
-const GAME_WIDTH = 800;
-const GAME_HEIGHT = 600;
-const FROG_SIZE = 30;
-const GRID_SIZE = 40;
+// Ticks between repeated hops while a direction is held
+const HOP_REPEAT_TICKS = 3;
 
-// Level configurations
+// Keeps the session from being reaped as abandoned while it is open
+const HEARTBEAT_MS = 60000;
+
+const KEY_DIRECTIONS = {
+  ArrowUp: 'up', w: 'up', W: 'up',
+  ArrowDown: 'down', s: 'down', S: 'down',
+  ArrowLeft: 'left', a: 'left', A: 'left',
+  ArrowRight: 'right', d: 'right', D: 'right'
+};
+
+// Level presentation; obstacle lanes live in LEVEL_LANES in lib/replay.js
 const LEVELS = {
   1: {
     name: "Lilly Pad Lagoon",
     theme: "pond",
-    background: "linear-gradient(180deg, #2563eb 0%, #1e40af 50%, #059669 100%)",
-    obstacles: [
-      { type: "lily_pad", y: 200, speed: 1, width: 60, spacing: 120 },
-      { type: "dragonfly", y: 160, speed: 2, width: 40, spacing: 180 },
-      { type: "log", y: 240, speed: -1.5, width: 100, spacing: 200 },
-      { type: "lily_pad", y: 280, speed: 0.8, width: 60, spacing: 140 }
-    ]
+    background: "linear-gradient(180deg, #2563eb 0%, #1e40af 50%, #059669 100%)"
   },
   2: {
     name: "Perilous Pond",
     theme: "deep_water",
-    background: "linear-gradient(180deg, #1e3a8a 0%, #1e40af 30%, #0f766e  70%, #134e4a 100%)",
-    obstacles: [
-      { type: "fish", y: 180, speed: 2.5, width: 50, spacing: 160 },
-      { type: "turtle", y: 220, speed: -1.8, width: 70, spacing: 200 },
-      { type: "crocodile", y: 260, speed: 3, width: 80, spacing: 220 },
-      { type: "log", y: 300, speed: -2, width: 120, spacing: 180 },
-      { type: "fish", y: 340, speed: 2.8, width: 50, spacing: 140 }
-    ]
+    background: "linear-gradient(180deg, #1e3a8a 0%, #1e40af 30%, #0f766e  70%, #134e4a 100%)"
   }
 };
 
 export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats }) => {
   const canvasRef = useRef(null);
-  const gameLoopRef = useRef(null);
+  const simulationRef = useRef(null);
+  const tickRef = useRef(0);
+  const recorderRef = useRef(null);
+  const pendingHopsRef = useRef([]);
+  const heldRef = useRef({});
   const [gameState, setGameState] = useState('menu'); // menu, playing, paused, game_over, level_complete
   const [currentLevel, setCurrentLevel] = useState(1);
   const [score, setScore] = useState(0);
-  const [lives, setLives] = useState(3);
+  const [lives, setLives] = useState(START_LIVES);
   const [frogPosition, setFrogPosition] = useState({ x: GAME_WIDTH / 2, y: GAME_HEIGHT - 50 });
   const [obstacles, setObstacles] = useState([]);
   const [sessionId, setSessionId] = useState(null);
-  const [levelStartTime, setLevelStartTime] = useState(null);
-  const [keys, setKeys] = useState({});
-
-  // Initialize obstacles for current level
-  const initializeLevel = useCallback((level) => {
-    const levelConfig = LEVELS[level];
-    if (!levelConfig) return [];
-
-    const newObstacles = [];
-    levelConfig.obstacles.forEach((obstacleConfig, index) => {
-      // Create multiple obstacles per row
-      const numObstacles = Math.floor(GAME_WIDTH / obstacleConfig.spacing) + 2;
-      for (let i = 0; i < numObstacles; i++) {
-        newObstacles.push({
-          id: `${index}-${i}`,
-          type: obstacleConfig.type,
-          x: (i * obstacleConfig.spacing) - (Math.random() * obstacleConfig.spacing),
-          y: obstacleConfig.y,
-          width: obstacleConfig.width,
-          height: 30,
-          speed: obstacleConfig.speed,
-          direction: obstacleConfig.speed > 0 ? 1 : -1
-        });
-      }
-    });
 
-    return newObstacles;
+  // Copy the simulation into React state for rendering
+  const showSimulation = useCallback(() => {
+    const simulation = simulationRef.current;
+    setCurrentLevel(simulation.level);
+    setScore(simulation.score);
+    setLives(simulation.lives);
+    setFrogPosition({ ...simulation.frog });
+    setObstacles(simulation.obstacles.map(obstacle => ({ ...obstacle })));
   }, []);
 
+  // Start a new game with a fresh input log
+  const beginGame = (id, seed) => {
+    setSessionId(id);
+    simulationRef.current = new GameSimulation(seed);
+    recorderRef.current = new ReplayRecorder(seed);
+    tickRef.current = 0;
+    pendingHopsRef.current = [];
+    heldRef.current = {};
+    showSimulation();
+    setGameState('playing');
+  };
+
   // Start new game session
   const startGameSession = async () => {
     if (!authToken) {
@@ -89,14 +91,7 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
       });
 
       if (response.data.success) {
-        setSessionId(response.data.session_id);
-        setCurrentLevel(1);
-        setScore(0);
-        setLives(3);
-        setFrogPosition({ x: GAME_WIDTH / 2 - FROG_SIZE / 2, y: GAME_HEIGHT - 80 });
-        setObstacles(initializeLevel(1));
-        setLevelStartTime(Date.now());
-        setGameState('playing');
+        beginGame(response.data.session_id, response.data.replay_seed);
         
         if (!response.data.eligible_for_rewards) {
           console.log(`Note: ${response.data.eligibility_reason}`);
@@ -106,14 +101,7 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
       console.error('Failed to start game session:', error);
       // For demo mode, allow starting without backend session
       if (localStorage.getItem('demo_mode') === 'true') {
-        setSessionId('demo_session');
-        setCurrentLevel(1);
-        setScore(0);
-        setLives(3);
-        setFrogPosition({ x: GAME_WIDTH / 2 - FROG_SIZE / 2, y: GAME_HEIGHT - 80 });
-        setObstacles(initializeLevel(1));
-        setLevelStartTime(Date.now());
-        setGameState('playing');
+        beginGame('demo_session', randomSeed());
       } else {
         alert('Failed to start game session. Please try again.');
       }
@@ -122,14 +110,7 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
 
   // Force start game for demo mode
   const forceStartGame = () => {
-    setSessionId('demo_session');
-    setCurrentLevel(1);
-    setScore(0);
-    setLives(3);
-    setFrogPosition({ x: GAME_WIDTH / 2 - FROG_SIZE / 2, y: GAME_HEIGHT - 80 });
-    setObstacles(initializeLevel(1));
-    setLevelStartTime(Date.now());
-    setGameState('playing');
+    beginGame('demo_session', randomSeed());
   };
 
   // Complete game session
@@ -140,7 +121,8 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
       const response = await axios.post(`${API}/game/complete`, {
         session_id: sessionId,
         score: finalScore,
-        levels_completed: levelsCompleted
+        levels_completed: levelsCompleted,
+        replay: recorderRef.current ? recorderRef.current.finish(tickRef.current) : null
       }, {
         headers: { Authorization: `Bearer ${authToken}` }
       });
@@ -160,19 +142,30 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
     }
   };
 
+  // Held directions hop on the next tick, then every HOP_REPEAT_TICKS
+  const pressDirection = (direction) => {
+    if (!heldRef.current[direction]) {
+      heldRef.current[direction] = { since: null };
+    }
+  };
+
+  const releaseDirection = (direction) => {
+    delete heldRef.current[direction];
+  };
+
   // Handle keyboard and mouse input
   useEffect(() => {
     const handleKeyDown = (e) => {
-      setKeys(prev => ({ ...prev, [e.key]: true }));
+      if (KEY_DIRECTIONS[e.key]) pressDirection(KEY_DIRECTIONS[e.key]);
     };
 
     const handleKeyUp = (e) => {
-      setKeys(prev => ({ ...prev, [e.key]: false }));
+      if (KEY_DIRECTIONS[e.key]) releaseDirection(KEY_DIRECTIONS[e.key]);
     };
 
     // Mouse click controls for canvas
     const handleCanvasClick = (e) => {
-      if (gameState !== 'playing') return;
+      if (gameState !== 'playing' || !simulationRef.current) return;
       
       const canvas = canvasRef.current;
       if (!canvas) return;
@@ -186,36 +179,16 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
       const gameY = (y / rect.height) * GAME_HEIGHT;
       
       // Calculate movement direction based on click position relative to frog
-      const frogCenterX = frogPosition.x + FROG_SIZE / 2;
-      const frogCenterY = frogPosition.y + FROG_SIZE / 2;
-      
-      const dx = gameX - frogCenterX;
-      const dy = gameY - frogCenterY;
+      const { frog } = simulationRef.current;
+      const dx = gameX - (frog.x + FROG_SIZE / 2);
+      const dy = gameY - (frog.y + FROG_SIZE / 2);
       
-      // Move frog in direction of click
-      setFrogPosition(prev => {
-        let newX = prev.x;
-        let newY = prev.y;
-        
-        if (Math.abs(dx) > Math.abs(dy)) {
-          // Horizontal movement
-          if (dx > 0) {
-            newX = Math.min(GAME_WIDTH - FROG_SIZE, prev.x + GRID_SIZE);
-          } else {
-            newX = Math.max(0, prev.x - GRID_SIZE);
-          }
-        } else {
-          // Vertical movement
-          if (dy > 0) {
-            newY = Math.min(GAME_HEIGHT - FROG_SIZE, prev.y + GRID_SIZE);
-          } else {
-            newY = Math.max(0, prev.y - GRID_SIZE);
-            setScore(s => s + 10); // Score for moving forward
-          }
-        }
-        
-        return { x: newX, y: newY };
-      });
+      // Hop towards the click on the next tick
+      if (Math.abs(dx) > Math.abs(dy)) {
+        pendingHopsRef.current.push(dx > 0 ? 'right' : 'left');
+      } else {
+        pendingHopsRef.current.push(dy > 0 ? 'down' : 'up');
+      }
     };
 
     window.addEventListener('keydown', handleKeyDown);
@@ -233,131 +206,65 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
         canvas.removeEventListener('click', handleCanvasClick);
       }
     };
-  }, [gameState, frogPosition]);
+  }, [gameState]);
 
-  // Handle frog movement
+  // Game loop: one deterministic tick every TICK_MS. Hops, obstacles and
+  // collisions all advance here, in the order the server replays them, and
+  // ticks only count while playing so pauses do not eat the time bonus.
   useEffect(() => {
     if (gameState !== 'playing') return;
 
-    const moveInterval = setInterval(() => {
-      setFrogPosition(prev => {
-        let newX = prev.x;
-        let newY = prev.y;
-
-        if (keys['ArrowLeft'] || keys['a'] || keys['A']) {
-          newX = Math.max(0, prev.x - GRID_SIZE);
-        }
-        if (keys['ArrowRight'] || keys['d'] || keys['D']) {
-          newX = Math.min(GAME_WIDTH - FROG_SIZE, prev.x + GRID_SIZE);
-        }
-        if (keys['ArrowUp'] || keys['w'] || keys['W']) {
-          newY = Math.max(0, prev.y - GRID_SIZE);
-          setScore(s => s + 10); // Score for moving forward
-        }
-        if (keys['ArrowDown'] || keys['s'] || keys['S']) {
-          newY = Math.min(GAME_HEIGHT - FROG_SIZE, prev.y + GRID_SIZE);
-        }
-
-        return { x: newX, y: newY };
-      });
-    }, 150);
-
-    return () => clearInterval(moveInterval);
-  }, [keys, gameState]);
+    const gameLoop = setInterval(() => {
+      const simulation = simulationRef.current;
+      if (!simulation || simulation.finished) return;
+      const tick = tickRef.current;
 
-  // Update obstacles
-  useEffect(() => {
-    if (gameState !== 'playing') return;
+      const hops = pendingHopsRef.current;
+      pendingHopsRef.current = [];
+      for (const [direction, held] of Object.entries(heldRef.current)) {
+        if (held.since === null) held.since = tick;
+        if ((tick - held.since) % HOP_REPEAT_TICKS === 0) hops.push(direction);
+      }
+      for (const direction of hops) {
+        recorderRef.current.record(tick, direction);
+      }
 
-    const updateInterval = setInterval(() => {
-      setObstacles(prevObstacles => {
-        return prevObstacles.map(obstacle => {
-          let newX = obstacle.x + obstacle.speed;
-          
-          // Wrap around screen
-          if (newX > GAME_WIDTH + obstacle.width) {
-            newX = -obstacle.width;
-          } else if (newX < -obstacle.width) {
-            newX = GAME_WIDTH;
-          }
-
-          return { ...obstacle, x: newX };
-        });
-      });
-    }, 50);
+      const outcome = simulation.step(tick, hops);
+      tickRef.current = tick + 1;
+      showSimulation();
+
+      if (simulation.finished) {
+        setGameState('game_over');
+        completeGameSession(simulation.score, simulation.levelsCompleted);
+      } else if (outcome === 'cleared') {
+        // Next level; the loop stops while the banner is shown
+        pendingHopsRef.current = [];
+        heldRef.current = {};
+        setCurrentLevel(simulation.level - 1);
+        setGameState('level_complete');
+        setTimeout(() => {
+          setCurrentLevel(simulation.level);
+          setGameState(state => (state === 'level_complete' ? 'playing' : state));
+        }, 2000);
+      }
+    }, TICK_MS);
 
-    return () => clearInterval(updateInterval);
-  }, [gameState]);
+    return () => clearInterval(gameLoop);
+  }, [gameState, sessionId, authToken, showSimulation]);
 
-  // Collision detection
+  // Tell the server the session is still being played
   useEffect(() => {
-    if (gameState !== 'playing') return;
-
-    const checkCollisions = () => {
-      const frogRect = {
-        x: frogPosition.x,
-        y: frogPosition.y,
-        width: FROG_SIZE,
-        height: FROG_SIZE
-      };
-
-      // Check obstacle collisions
-      for (const obstacle of obstacles) {
-        if (
-          frogRect.x < obstacle.x + obstacle.width &&
-          frogRect.x + frogRect.width > obstacle.x &&
-          frogRect.y < obstacle.y + obstacle.height &&
-          frogRect.y + frogRect.height > obstacle.y
-        ) {
-          // Different behavior for different obstacle types
-          if (['lily_pad', 'log'].includes(obstacle.type)) {
-            // Safe obstacles - frog moves with them
-            setFrogPosition(prev => ({
-              ...prev,
-              x: Math.max(0, Math.min(GAME_WIDTH - FROG_SIZE, prev.x + obstacle.speed))
-            }));
-          } else {
-            // Dangerous obstacles - lose life
-            setLives(prev => {
-              const newLives = prev - 1;
-              if (newLives <= 0) {
-                setGameState('game_over');
-                completeGameSession(score, currentLevel - 1);
-              }
-              return newLives;
-            });
-            
-            // Reset frog position
-            setFrogPosition({ x: GAME_WIDTH / 2, y: GAME_HEIGHT - 50 });
-            return;
-          }
-        }
-      }
+    const inGame = ['playing', 'paused', 'level_complete'].includes(gameState);
+    if (!inGame || !sessionId || sessionId === 'demo_session' || !authToken) return;
 
-      // Check if level completed (reached top)
-      if (frogPosition.y <= 50) {
-        const timeBonus = Math.max(0, 5000 - (Date.now() - levelStartTime));
-        setScore(s => s + 1000 + timeBonus);
-
-        if (currentLevel < Object.keys(LEVELS).length) {
-          // Next level
-          setCurrentLevel(prev => prev + 1);
-          setFrogPosition({ x: GAME_WIDTH / 2, y: GAME_HEIGHT - 50 });
-          setObstacles(initializeLevel(currentLevel + 1));
-          setLevelStartTime(Date.now());
-          setGameState('level_complete');
-          setTimeout(() => setGameState('playing'), 2000);
-        } else {
-          // Game completed
-          setGameState('game_over');
-          completeGameSession(score + 1000 + timeBonus, currentLevel);
-        }
-      }
-    };
+    const heartbeat = setInterval(() => {
+      axios.post(`${API}/game/heartbeat`, { session_id: sessionId }, {
+        headers: { Authorization: `Bearer ${authToken}` }
+      }).catch(error => console.error('Failed to send game heartbeat:', error));
+    }, HEARTBEAT_MS);
 
-    const collisionInterval = setInterval(checkCollisions, 50);
-    return () => clearInterval(collisionInterval);
-  }, [gameState, frogPosition, obstacles, currentLevel, score, levelStartTime, sessionId, authToken]);
+    return () => clearInterval(heartbeat);
+  }, [gameState, sessionId, authToken]);
 
   // Render game
   useEffect(() => {
@@ -615,30 +522,30 @@ export const FroggerGame = ({ walletReady, authToken, onRewardEarned, userStats
             <div className="grid grid-cols-3 gap-2 bg-black/70 p-4 rounded-xl">
               <div></div>
               <button
-                onTouchStart={() => setKeys(prev => ({ ...prev, 'ArrowUp': true }))}
-                onTouchEnd={() => setKeys(prev => ({ ...prev, 'ArrowUp': false }))}
+                onTouchStart={() => pressDirection('up')}
+                onTouchEnd={() => releaseDirection('up')}
                 className="w-12 h-12 bg-purple-600 rounded-lg flex items-center justify-center text-white text-xl"
               >
                 ↑
               </button>
               <div></div>
               <button
-                onTouchStart={() => setKeys(prev => ({ ...prev, 'ArrowLeft': true }))}
-                onTouchEnd={() => setKeys(prev => ({ ...prev, 'ArrowLeft': false }))}
+                onTouchStart={() => pressDirection('left')}
+                onTouchEnd={() => releaseDirection('left')}
                 className="w-12 h-12 bg-purple-600 rounded-lg flex items-center justify-center text-white text-xl"
               >
                 ←
               </button>
               <button
-                onTouchStart={() => setKeys(prev => ({ ...prev, 'ArrowDown': true }))}
-                onTouchEnd={() => setKeys(prev => ({ ...prev, 'ArrowDown': false }))}
+                onTouchStart={() => pressDirection('down')}
+                onTouchEnd={() => releaseDirection('down')}
                 className="w-12 h-12 bg-purple-600 rounded-lg flex items-center justify-center text-white text-xl"
               >
                 ↓
               </button>
               <button
-                onTouchStart={() => setKeys(prev => ({ ...prev, 'ArrowRight': true }))}
-                onTouchEnd={() => setKeys(prev => ({ ...prev, 'ArrowRight': false }))}
+                onTouchStart={() => pressDirection('right')}
+                onTouchEnd={() => releaseDirection('right')}
                 className="w-12 h-12 bg-purple-600 rounded-lg flex items-center justify-center text-white text-xl"
               >
                 →
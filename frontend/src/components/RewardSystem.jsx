@@ -7,62 +7,62 @@ const API = `${BACKEND_URL}/api`;
 export const RewardSystem = ({ authToken, onStatsUpdate }) => {
   const [userStats, setUserStats] = useState(null);
   const [rewardHistory, setRewardHistory] = useState([]);
+  const [historyCursor, setHistoryCursor] = useState(null);
   const [loading, setLoading] = useState(false);
   const [showHistory, setShowHistory] = useState(false);
   const [eligibility, setEligibility] = useState(null);
 
-  // Fetch user stats
-  const fetchUserStats = async () => {
+  // Fetch reward history, newest first; pass the last page's cursor to load more
+  const fetchRewardHistory = async (cursor = null) => {
     if (!authToken) return;
 
-    setLoading(true);
     try {
-      const response = await axios.get(`${API}/user/stats`, {
-        headers: { Authorization: `Bearer ${authToken}` }
+      const response = await axios.get(`${API}/user/rewards`, {
+        headers: { Authorization: `Bearer ${authToken}` },
+        params: cursor ? { cursor } : {}
       });
       
-      const stats = response.data;
-      setUserStats(stats);
-      onStatsUpdate(stats);
+      const { rewards, next_cursor } = response.data;
+      setRewardHistory(prev => (cursor ? [...prev, ...rewards] : rewards));
+      setHistoryCursor(next_cursor);
       
     } catch (error) {
-      console.error('Error fetching user stats:', error);
-    } finally {
-      setLoading(false);
+      console.error('Error fetching reward history:', error);
     }
   };
 
-  // Check reward eligibility
-  const checkEligibility = async () => {
+  // Load stats, eligibility and optionally history in one /api/batch round trip
+  const loadDashboard = async (includeHistory = false) => {
     if (!authToken) return;
 
-    try {
-      const response = await axios.get(`${API}/rewards/eligibility`, {
-        headers: { Authorization: `Bearer ${authToken}` }
-      });
-      
-      setEligibility(response.data);
-      
-    } catch (error) {
-      console.error('Error checking eligibility:', error);
+    const requests = [
+      { id: 'stats', path: '/user/stats' },
+      { id: 'eligibility', path: '/rewards/eligibility' }
+    ];
+    if (includeHistory) {
+      requests.push({ id: 'history', path: '/user/rewards' });
     }
-  };
-
-  // Fetch reward history
-  const fetchRewardHistory = async () => {
-    if (!authToken) return;
 
     try {
-      const response = await axios.get(`${API}/user/stats`, {
+      const response = await axios.post(`${API}/batch`, { requests }, {
         headers: { Authorization: `Bearer ${authToken}` }
       });
-      
-      // For now, we'll use the stats endpoint. In a full implementation,
-      // you'd have a separate rewards history endpoint
-      setRewardHistory([]);
-      
+
+      for (const { id, status, body } of response.data.responses) {
+        if (status !== 200) {
+          console.error(`Error loading ${id}:`, body.detail);
+        } else if (id === 'stats') {
+          setUserStats(body);
+          onStatsUpdate(body);
+        } else if (id === 'eligibility') {
+          setEligibility(body);
+        } else if (id === 'history') {
+          setRewardHistory(body.rewards);
+          setHistoryCursor(body.next_cursor);
+        }
+      }
     } catch (error) {
-      console.error('Error fetching reward history:', error);
+      console.error('Error loading reward dashboard:', error);
     }
   };
 
@@ -83,8 +83,7 @@ export const RewardSystem = ({ authToken, onStatsUpdate }) => {
 
       if (response.data.success) {
         alert(`🎉 Daily bonus claimed! Received ${response.data.amount_sol} SOL`);
-        fetchUserStats();
-        checkEligibility();
+        loadDashboard(true);
       } else {
         alert(`❌ ${response.data.error}`);
       }
@@ -100,14 +99,12 @@ export const RewardSystem = ({ authToken, onStatsUpdate }) => {
   // Fetch data on mount and when authToken changes
   useEffect(() => {
     if (authToken) {
-      fetchUserStats();
-      checkEligibility();
-      fetchRewardHistory();
+      setLoading(true);
+      loadDashboard(true).finally(() => setLoading(false));
       
       // Set up periodic refresh
       const interval = setInterval(() => {
-        fetchUserStats();
-        checkEligibility();
+        loadDashboard();
       }, 30000); // Refresh every 30 seconds
 
       return () => clearInterval(interval);
@@ -257,8 +254,8 @@ export const RewardSystem = ({ authToken, onStatsUpdate }) => {
               <h3 className="text-lg font-semibold text-purple-100 mb-3">📋 Reward History</h3>
               {rewardHistory.length > 0 ? (
                 <div className="space-y-2 max-h-60 overflow-y-auto">
-                  {rewardHistory.map((reward, index) => (
-                    <div key={index} className="flex justify-between items-center py-2 px-3 bg-purple-800/30 rounded-lg">
+                  {rewardHistory.map((reward) => (
+                    <div key={reward.id} className="flex justify-between items-center py-2 px-3 bg-purple-800/30 rounded-lg">
                       <div>
                         <div className="text-purple-100 font-medium">{reward.reward_type}</div>
                         <div className="text-purple-300 text-xs">{reward.created_at}</div>
@@ -268,6 +265,15 @@ export const RewardSystem = ({ authToken, onStatsUpdate }) => {
                       </div>
                     </div>
                   ))}
+                  {historyCursor && (
+                    <button
+                      onClick={() => fetchRewardHistory(historyCursor)}
+                      className="w-full text-purple-200 hover:text-purple-100 text-sm py-2"
+                      data-testid="load-more-rewards-btn"
+                    >
+                      Load more
+                    </button>
+                  )}
                 </div>
               ) : (
                 <p className="text-purple-200 text-center py-4">
@@ -0,0 +1,231 @@
+// Gameplay input log and game rules, replayed by the server
+// (backend/game_replay.py) to validate scores before rewards are granted.
+// GameSimulation below must stay in step with _Batch on the server: the
+// game only advances through step(), once per TICK_MS, so the client and
+// the replay see the same level, the same collisions and the same score.
+
+export const TICK_MS = 50;
+
+export const GAME_WIDTH = 800;
+export const GAME_HEIGHT = 600;
+export const FROG_SIZE = 30;
+export const GRID_SIZE = 40;
+export const OBSTACLE_HEIGHT = 30;
+export const START_LIVES = 3;
+
+const START_POSITION = { x: GAME_WIDTH / 2 - FROG_SIZE / 2, y: GAME_HEIGHT - 80 };
+const RESET_POSITION = { x: GAME_WIDTH / 2, y: GAME_HEIGHT - 50 };
+const GOAL_Y = 50;
+const SAFE_OBSTACLES = ['lily_pad', 'log'];
+
+// Obstacle lanes per level, matching LEVELS in game_replay.py
+export const LEVEL_LANES = {
+  1: [
+    { type: 'lily_pad', y: 200, speed: 1, width: 60, spacing: 120 },
+    { type: 'dragonfly', y: 160, speed: 2, width: 40, spacing: 180 },
+    { type: 'log', y: 240, speed: -1.5, width: 100, spacing: 200 },
+    { type: 'lily_pad', y: 280, speed: 0.8, width: 60, spacing: 140 }
+  ],
+  2: [
+    { type: 'fish', y: 180, speed: 2.5, width: 50, spacing: 160 },
+    { type: 'turtle', y: 220, speed: -1.8, width: 70, spacing: 200 },
+    { type: 'crocodile', y: 260, speed: 3, width: 80, spacing: 220 },
+    { type: 'log', y: 300, speed: -2, width: 120, spacing: 180 },
+    { type: 'fish', y: 340, speed: 2.8, width: 50, spacing: 140 }
+  ]
+};
+
+export const LEVEL_COUNT = Object.keys(LEVEL_LANES).length;
+
+export const DIRECTIONS = { up: 0, down: 1, left: 2, right: 3 };
+
+const MAGIC = [0x50, 0x4c]; // "PL"
+const VERSION = 1;
+
+// xorshift32 stream for a level, matching level_seeds() on the server
+export const createLevelRandom = (seed, level) => {
+  let state = (seed ^ Math.imul(level, 0x9e3779b9)) >>> 0 || 1;
+  return () => {
+    state ^= state << 13;
+    state >>>= 0;
+    state ^= state >>> 17;
+    state ^= state << 5;
+    state >>>= 0;
+    return state / 4294967296;
+  };
+};
+
+// Seeded obstacle layout of a level, matching initial_obstacle_x() on the server
+export const createObstacles = (seed, level) => {
+  const random = createLevelRandom(seed, level);
+  const obstacles = [];
+  LEVEL_LANES[level].forEach((lane, index) => {
+    const count = Math.floor(GAME_WIDTH / lane.spacing) + 2;
+    for (let i = 0; i < count; i++) {
+      obstacles.push({
+        id: `${index}-${i}`,
+        type: lane.type,
+        x: (i * lane.spacing) - (random() * lane.spacing),
+        y: lane.y,
+        width: lane.width,
+        height: OBSTACLE_HEIGHT,
+        speed: lane.speed,
+        dangerous: !SAFE_OBSTACLES.includes(lane.type)
+      });
+    }
+  });
+  return obstacles;
+};
+
+export class GameSimulation {
+  constructor(seed) {
+    this.seed = seed >>> 0;
+    this.frog = { ...START_POSITION };
+    this.level = 1;
+    this.levelStart = 0;
+    this.lives = START_LIVES;
+    this.score = 0;
+    this.levelsCompleted = 0;
+    this.finished = false;
+    this.obstacles = createObstacles(this.seed, 1);
+  }
+
+  hop(direction) {
+    const { frog } = this;
+    if (direction === 'up') {
+      frog.y = Math.max(0, frog.y - GRID_SIZE);
+      this.score += 10;
+    } else if (direction === 'down') {
+      frog.y = Math.min(GAME_HEIGHT - FROG_SIZE, frog.y + GRID_SIZE);
+    } else if (direction === 'left') {
+      frog.x = Math.max(0, frog.x - GRID_SIZE);
+    } else if (direction === 'right') {
+      frog.x = Math.min(GAME_WIDTH - FROG_SIZE, frog.x + GRID_SIZE);
+    }
+  }
+
+  moveObstacles() {
+    for (const obstacle of this.obstacles) {
+      obstacle.x += obstacle.speed;
+      if (obstacle.x > GAME_WIDTH + obstacle.width) {
+        obstacle.x = -obstacle.width;
+      } else if (obstacle.x < -obstacle.width) {
+        obstacle.x = GAME_WIDTH;
+      }
+    }
+  }
+
+  // Returns 'hit', 'cleared' or null
+  checkCollisions(tick) {
+    const { frog } = this;
+    let hit = false;
+    let carry = 0;
+    for (const obstacle of this.obstacles) {
+      if (
+        frog.x < obstacle.x + obstacle.width &&
+        frog.x + FROG_SIZE > obstacle.x &&
+        frog.y < obstacle.y + obstacle.height &&
+        frog.y + FROG_SIZE > obstacle.y
+      ) {
+        if (obstacle.dangerous) {
+          hit = true;
+        } else {
+          carry += obstacle.speed;
+        }
+      }
+    }
+
+    if (hit) {
+      // Lose a life and start over at the bottom
+      this.lives -= 1;
+      this.frog = { ...RESET_POSITION };
+      if (this.lives <= 0) {
+        this.levelsCompleted = this.level - 1;
+        this.finished = true;
+      }
+      return 'hit';
+    }
+    frog.x = Math.min(GAME_WIDTH - FROG_SIZE, Math.max(0, frog.x + carry));
+
+    // Reaching the top, with a bonus for the ticks spent on the level
+    if (frog.y > GOAL_Y) return null;
+    const elapsedMs = (tick + 1 - this.levelStart) * TICK_MS;
+    this.score += 1000 + Math.max(0, 5000 - elapsedMs);
+    this.levelsCompleted = this.level;
+    this.frog = { ...RESET_POSITION };
+    if (this.level >= LEVEL_COUNT) {
+      this.finished = true;
+    } else {
+      this.level += 1;
+      this.levelStart = tick + 1;
+      this.obstacles = createObstacles(this.seed, this.level);
+    }
+    return 'cleared';
+  }
+
+  // Advance one tick: apply the hops logged for it, move every obstacle,
+  // then check collisions, in the same order as simulate_batch()
+  step(tick, hops = []) {
+    for (const direction of hops) {
+      this.hop(direction);
+    }
+    this.moveObstacles();
+    return this.checkCollisions(tick);
+  }
+}
+
+// Play a logged game through to its end tick, as the server replays it
+export const replayGame = (seed, events, endTick) => {
+  const game = new GameSimulation(seed);
+  let next = 0;
+  for (let tick = 0; tick < endTick && !game.finished; tick++) {
+    const hops = [];
+    while (next < events.length && events[next][0] === tick) {
+      hops.push(events[next][1]);
+      next += 1;
+    }
+    game.step(tick, hops);
+  }
+  return game;
+};
+
+export const randomSeed = () => {
+  const values = new Uint32Array(1);
+  window.crypto.getRandomValues(values);
+  return values[0];
+};
+
+const writeVarint = (bytes, value) => {
+  while (value >= 0x80) {
+    bytes.push((value & 0x7f) | 0x80);
+    value = Math.floor(value / 128);
+  }
+  bytes.push(value);
+};
+
+export class ReplayRecorder {
+  constructor(seed) {
+    this.seed = seed >>> 0;
+    this.events = [];
+  }
+
+  record(tick, direction) {
+    this.events.push([tick, DIRECTIONS[direction]]);
+  }
+
+  // Encode the log as base64 for /api/game/complete
+  finish(endTick) {
+    const bytes = [...MAGIC, VERSION];
+    for (let shift = 0; shift < 32; shift += 8) {
+      bytes.push((this.seed >>> shift) & 0xff);
+    }
+    writeVarint(bytes, this.events.length);
+    let previous = 0;
+    for (const [tick, direction] of this.events) {
+      writeVarint(bytes, (tick - previous) * 4 + direction);
+      previous = tick;
+    }
+    writeVarint(bytes, Math.max(0, endTick - previous));
+    return btoa(String.fromCharCode(...bytes));
+  }
+}
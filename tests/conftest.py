@@ -0,0 +1,14 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "backend"))
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory Motor database"""
+    import mongomock_motor
+
+    return mongomock_motor.AsyncMongoMockClient()["test"]
@@ -0,0 +1,30 @@
+// Records and plays input logs with the client's game rules for
+// tests/test_game_replay.py. Reads [{seed, events, end_tick}] as JSON on
+// stdin, where events are [tick, direction] pairs, and prints the encoded
+// log and the final game state of each.
+import { readFileSync } from 'node:fs';
+
+const source = readFileSync(new URL('../../frontend/src/lib/replay.js', import.meta.url), 'utf8');
+const { DIRECTIONS, ReplayRecorder, replayGame } = await import(
+  `data:text/javascript;base64,${Buffer.from(source).toString('base64')}`
+);
+
+const NAMES = Object.keys(DIRECTIONS).sort((a, b) => DIRECTIONS[a] - DIRECTIONS[b]);
+
+const games = JSON.parse(readFileSync(0, 'utf8')).map(({ seed, events, end_tick: endTick }) => {
+  const hops = events.map(([tick, direction]) => [tick, NAMES[direction]]);
+  const recorder = new ReplayRecorder(seed);
+  for (const [tick, direction] of hops) {
+    recorder.record(tick, direction);
+  }
+  const game = replayGame(seed, hops, endTick);
+  return {
+    replay: recorder.finish(endTick),
+    score: game.score,
+    levels_completed: game.levelsCompleted,
+    lives: game.lives,
+    finished: game.finished
+  };
+});
+
+process.stdout.write(JSON.stringify(games));
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from abuse_analytics import RewardFeatures, analyze, connected_clusters, main
+
+START = datetime(2025, 10, 1)
+
+
+def claims(rows):
+    """Build a reward chunk from (wallet, ip, seconds after START) tuples"""
+    return pd.DataFrame({
+        "wallet_address": [wallet for wallet, _, _ in rows],
+        "client_ip": [ip for _, ip, _ in rows],
+        "amount": 1.0,
+        "created_at": [START + timedelta(seconds=offset) for _, _, offset in rows]
+    })
+
+
+def sessions(rows):
+    """Build a session chunk from (wallet, duration seconds, levels) tuples"""
+    return pd.DataFrame({
+        "wallet_address": [wallet for wallet, _, _ in rows],
+        "start_time": [START] * len(rows),
+        "end_time": [START + timedelta(seconds=duration) for _, duration, _ in rows],
+        "levels_completed": [levels for _, _, levels in rows]
+    })
+
+
+def test_intervals_carry_across_chunk_boundaries():
+    rewards = RewardFeatures(fast_interval_seconds=60)
+    rewards.update(claims([("a", "1.1.1.1", 0), ("a", "1.1.1.1", 30)]))
+    rewards.update(claims([("a", "1.1.1.1", 50), ("b", "2.2.2.2", 55)]))
+
+    features = rewards.wallet_features()
+
+    assert features.loc["a", "claims"] == 3
+    assert features.loc["a", "intervals"] == 2
+    assert features.loc["a", "min_interval"] == 20
+    assert features.loc["a", "fast_claims"] == 2
+    assert features.loc["b", "intervals"] == 0
+
+
+def test_connected_clusters_link_wallets_through_shared_ips():
+    pairs = pd.DataFrame({
+        "client_ip": ["1.1.1.1", "1.1.1.1", "2.2.2.2", "3.3.3.3"],
+        "wallet_address": ["a", "b", "b", "c"]
+    })
+
+    clusters = connected_clusters(pairs)
+
+    assert clusters["a"] == clusters["b"]
+    assert clusters["c"] != clusters["a"]
+
+
+def test_analyze_flags_fast_claimers_impossible_sessions_and_ip_farms():
+    farm = [(f"farm-{i}", "6.6.6.6", i) for i in range(6)]
+    fast = [("fast", "7.7.7.7", offset) for offset in (0, 10, 20, 30)]
+    honest = [("honest", "8.8.8.8", offset) for offset in (0, 3600, 7200, 10800)]
+    reward_chunks = [claims(sorted(farm + fast + honest))]
+    session_chunks = [sessions([("bot", 4, 3), ("honest", 600, 3)])]
+
+    report = analyze(reward_chunks, session_chunks, fast_interval_seconds=60)
+
+    assert report.loc["fast", "flag_fast_claims"]
+    assert report.loc["bot", "flag_impossible_sessions"]
+    assert report.loc["farm-0", "flag_shared_ip"]
+    assert report.loc["farm-0", "cluster_wallets"] == 6
+    assert not report.loc["honest", "suspicious"]
+
+
+def test_main_reads_archived_sessions(tmp_path, monkeypatch):
+    import mongomock
+
+    client = mongomock.MongoClient()
+    db = client["analytics"]
+    db.reward_transactions.insert_one(
+        {"wallet_address": "bot", "client_ip": "9.9.9.9", "amount": 1.0, "status": "completed", "created_at": START}
+    )
+    # Archived by the session reaper: two levels in one second
+    db.game_sessions_archive.insert_one({
+        "_id": "session-1", "wallet_address": "bot", "status": "completed",
+        "start_time": START, "end_time": START + timedelta(seconds=1), "levels_completed": 2
+    })
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost")
+    monkeypatch.setenv("DB_NAME", "analytics")
+    monkeypatch.setattr("pymongo.MongoClient", lambda url: client)
+    output = tmp_path / "flagged.csv"
+
+    monkeypatch.setattr("sys.argv", ["abuse_analytics.py", "-o", str(output)])
+    assert main() == 0
+    assert list(pd.read_csv(output, index_col=0).index) == ["bot"]
+
+    monkeypatch.setattr("sys.argv", ["abuse_analytics.py", "--no-archive", "-o", str(output)])
+    assert main() == 0
+    assert pd.read_csv(output, index_col=0).empty
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+import server
+from eligibility_cache import EligibilityCache
+from ip_limits import SubnetLimiter
+from reward_schema import RewardStore
+
+WALLET = "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"
+USER = {"wallet_address": WALLET}
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "reward_store", RewardStore(db))
+    monkeypatch.setattr(server, "ip_limiter", SubnetLimiter({32: 10.0}, {128: 10.0}))
+    monkeypatch.setattr(server, "eligibility_cache", EligibilityCache())
+    return db
+
+
+def batch(*requests):
+    request = Request({"type": "http", "headers": [], "client": ("203.0.113.7", 5000)})
+    body = server.BatchRequest(requests=[server.BatchSubRequest(**sub_request) for sub_request in requests])
+    return asyncio.run(server.batch(body, request, current_user=USER))["responses"]
+
+
+def test_identical_requests_run_once(db, monkeypatch):
+    calls = []
+
+    async def stats(current_user):
+        calls.append(current_user["wallet_address"])
+        return {"calls": len(calls)}
+
+    monkeypatch.setitem(server.BATCH_ROUTES, "/user/stats", lambda params, request, user: stats(user))
+
+    responses = batch(
+        {"id": "a", "path": "/api/user/stats"},
+        {"id": "b", "path": "/user/stats/"},
+        {"id": "c", "path": "/user/rewards?limit=5"}
+    )
+
+    assert calls == [WALLET]
+    assert [(response["id"], response["status"]) for response in responses] == [("a", 200), ("b", 200), ("c", 200)]
+    assert responses[0]["body"] == responses[1]["body"] == {"calls": 1}
+
+
+def test_balance_lookup_is_shared_between_requests(db, monkeypatch):
+    lookups = []
+
+    async def balance(wallet_address):
+        lookups.append(wallet_address)
+        await asyncio.sleep(0)
+        return {"balance": 15.0, "usd_value": 225.0, "has_minimum_balance": True, "account_exists": True, "token_price": 15.0}
+
+    monkeypatch.setattr(server, "get_purpe_token_balance", server.shared_within_batch(balance))
+
+    responses = batch({"path": "/token/balance"}, {"path": "/rewards/eligibility"})
+
+    assert lookups == [WALLET]
+    assert responses[0]["body"]["balance"] == 15.0
+    assert responses[1]["body"]["eligible"]
+
+
+def test_failures_are_reported_per_request(db, monkeypatch):
+    async def broken(current_user):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setitem(server.BATCH_ROUTES, "/user/stats", lambda params, request, user: broken(user))
+
+    responses = batch(
+        {"path": "/user/stats"},
+        {"path": "/leaderboard", "params": {"limit": "many"}},
+        {"path": "/leaderboard", "params": {"window": "decade"}},
+        {"path": "/rewards/claim"},
+        {"path": "/leaderboard"}
+    )
+
+    assert [response["status"] for response in responses] == [500, 400, 400, 404, 200]
+    assert responses[0]["body"] == {"detail": "Internal server error"}
@@ -0,0 +1,42 @@
+import asyncio
+
+from demo_sessions import DemoSessionStore
+
+
+def test_oldest_sessions_are_evicted_past_capacity():
+    store = DemoSessionStore(max_sessions=2)
+    first = store.start("demo-a")
+    store.start("demo-b")
+    store.start("demo-c")
+
+    assert first["id"] not in store.sessions
+    assert len(store.sessions) == 2
+    assert store.metrics["evicted"] == 1
+
+
+def test_expired_sessions_cannot_be_completed():
+    store = DemoSessionStore(ttl_seconds=0)
+    session = store.start("demo-a")
+    store.evict_expired()
+
+    assert store.complete(session["id"], "demo-a", 10, 1) is None
+    assert store.metrics["expired"] == 1
+
+
+def test_completion_requires_the_owning_wallet():
+    store = DemoSessionStore()
+    session = store.start("demo-a")
+
+    assert store.complete(session["id"], "demo-b", 10, 1) is None
+    assert store.complete(session["id"], "demo-a", 10, 1)["status"] == "completed"
+
+
+def test_sampled_sessions_are_flushed_in_one_batch(db):
+    store = DemoSessionStore(sample_rate=1.0)
+    for _ in range(3):
+        session = store.start("demo-a")
+        store.complete(session["id"], "demo-a", 5, 1)
+
+    assert asyncio.run(store.flush(db)) == 3
+    docs = asyncio.run(db.demo_game_sessions.find({}).to_list(None))
+    assert len(docs) == 3 and all("expires" not in doc for doc in docs)
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from eligibility_cache import EligibilityCache
+
+ELIGIBLE = {"eligible": True, "remaining_daily_amount": 9.0, "demo_mode": False}
+
+
+def test_ineligible_decisions_are_held_until_next_eligible():
+    cache = EligibilityCache(negative_ttl=1)
+    next_eligible = datetime.fromtimestamp(1000, timezone.utc).isoformat()
+    decision = {"eligible": False, "reason": "wait", "next_eligible": next_eligible, "demo_mode": False}
+    cache.put("wallet-a", decision, cache.generation, now=100)
+
+    assert cache.get("wallet-a", now=999)["reason"] == "wait"
+    assert cache.get("wallet-a", now=1000) is None
+    assert cache.metrics["expired"] == 1
+
+
+def test_eligible_decisions_expire_after_the_positive_ttl():
+    cache = EligibilityCache(positive_ttl=30)
+    cache.put("wallet-a", ELIGIBLE, cache.generation, now=100)
+
+    assert cache.get("wallet-a", now=129)["eligible"] is True
+    assert cache.get("wallet-a", now=130) is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_claims_and_balance_changes_invalidate_the_wallet():
+    cache = EligibilityCache()
+    cache.put("wallet-a", ELIGIBLE, cache.generation, balance=15.0)
+    cache.put("wallet-b", ELIGIBLE, cache.generation, balance=15.0)
+
+    cache.observe_balance("wallet-a", 15.0)
+    assert cache.get("wallet-a") is not None
+    cache.observe_balance("wallet-a", 4.0)
+    assert cache.get("wallet-a") is None
+
+    cache.invalidate("wallet-b")
+    assert cache.get("wallet-b") is None
+    assert cache.metrics["invalidated"] == 2
+
+
+def test_decisions_computed_across_an_invalidation_are_not_stored():
+    cache = EligibilityCache()
+    generation = cache.generation
+    cache.invalidate("wallet-a")
+    cache.put("wallet-a", ELIGIBLE, generation)
+
+    assert cache.get("wallet-a") is None
+
+
+def test_least_recently_used_wallets_are_evicted():
+    cache = EligibilityCache(max_entries=2)
+    for wallet in ("wallet-a", "wallet-b"):
+        cache.put(wallet, ELIGIBLE, cache.generation)
+    cache.get("wallet-a")
+    cache.put("wallet-c", ELIGIBLE, cache.generation)
+
+    assert set(cache.entries) == {"wallet-a", "wallet-c"}
+    assert cache.metrics["evicted"] == 1
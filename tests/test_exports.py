@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from exports import (
+    InvalidCursor,
+    before_cursor,
+    build_export_query,
+    decode_cursor,
+    encode_cursor,
+    iter_encoded,
+    iter_export_lines,
+    iter_reward_transactions
+)
+from export_rewards import run_export
+from reward_schema import RewardMigration, RewardStore
+
+
+@pytest.fixture
+def db(db):
+    start = datetime(2025, 10, 1)
+    rows = [
+        {
+            "id": f"reward-{i}",
+            "wallet_address": f"wallet-{i % 3}",
+            "client_ip": "10.0.0.1",
+            "amount": 1.0,
+            "status": "completed",
+            # Several rows share a timestamp so _id has to break ties
+            "created_at": start + timedelta(seconds=i // 4)
+        }
+        for i in range(250)
+    ]
+    asyncio.run(db.reward_transactions.insert_many(rows))
+    return db
+
+
+def export(db, query=None, **kwargs):
+    async def collect():
+        lines = iter_export_lines(iter_reward_transactions(db, query or {}, RewardStore(db), page_size=40, **kwargs), "ndjson")
+        return [json.loads(line) async for line in lines]
+    return asyncio.run(collect())
+
+
+def test_export_pages_through_every_row_once(db):
+    rows = export(db)
+
+    assert [row["id"] for row in rows] == [f"reward-{i}" for i in range(250)]
+
+
+def test_export_resumes_from_cursor(db):
+    first = export(db, limit=95)
+    rest = export(db, cursor=first[-1]["cursor"])
+
+    assert len(first) == 95
+    assert [row["id"] for row in first + rest] == [f"reward-{i}" for i in range(250)]
+
+
+def test_export_filters_by_wallet_and_date(db):
+    query = build_export_query(
+        start=datetime(2025, 10, 1, 0, 0, 10),
+        end=datetime(2025, 10, 1, 0, 0, 20),
+        wallet_address="wallet-1"
+    )
+
+    rows = export(db, query)
+
+    assert rows and all(row["wallet_address"] == "wallet-1" for row in rows)
+    assert all("2025-10-01T00:00:10" <= row["created_at"] < "2025-10-01T00:00:20" for row in rows)
+
+
+def test_gzip_output_round_trips(db):
+    async def collect():
+        lines = iter_export_lines(iter_reward_transactions(db, {}, RewardStore(db)), "csv")
+        return b"".join([chunk async for chunk in iter_encoded(lines, compress=True, flush_bytes=1024)])
+
+    csv_lines = zlib.decompress(asyncio.run(collect()), 31).decode().splitlines()
+    assert csv_lines[0].startswith("id,wallet_address")
+    assert len(csv_lines) == 251
+
+
+def test_newest_first_pages_walk_back_from_cursor(db):
+    async def walk():
+        seen, position = [], None
+        while True:
+            query = {"wallet_address": "wallet-2"}
+            if position:
+                query = before_cursor(query, decode_cursor(position))
+            page = await db.reward_transactions.find(query).sort([("created_at", -1), ("_id", -1)]).limit(7).to_list(7)
+            seen += [document["id"] for document in page]
+            if len(page) < 7:
+                return seen
+            position = encode_cursor(page[-1]["created_at"], page[-1]["_id"])
+
+    expected = [f"reward-{i}" for i in range(249, -1, -1) if i % 3 == 2]
+    assert asyncio.run(walk()) == expected
+
+
+def test_export_command_reads_compact_rows_after_migration(db, tmp_path, monkeypatch):
+    async def migrate():
+        await RewardMigration(db, batch_size=100).run()
+        # Written after the switch, so only the compact collection has it
+        await (await RewardStore.open(db)).insert({
+            "id": "reward-250",
+            "wallet_address": "wallet-0",
+            "client_ip": "10.0.0.1",
+            "amount": 1.0,
+            "status": "completed",
+            "created_at": datetime(2025, 10, 2)
+        })
+
+    asyncio.run(migrate())
+    monkeypatch.setenv("MONGO_URL", "mongodb://localhost")
+    monkeypatch.setenv("DB_NAME", db.name)
+    monkeypatch.setattr("motor.motor_asyncio.AsyncIOMotorClient", lambda url: db.client)
+    output = tmp_path / "rewards.ndjson"
+    args = argparse.Namespace(
+        start=None, end=None, wallet=None, ip=None, cursor=None, limit=None,
+        page_size=40, format="ndjson", gzip=False, output=str(output)
+    )
+
+    assert asyncio.run(run_export(args)) == 0
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    # Compact rows break created_at ties on the reward id instead of insertion order
+    assert len(rows) == 251
+    assert {row["id"] for row in rows} == {f"reward-{i}" for i in range(251)}
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,141 @@
+import asyncio
+import base64
+import json
+import random
+import shutil
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from game_replay import (
+    LEFT,
+    UP,
+    InvalidReplay,
+    ReplayValidator,
+    decode_replay,
+    encode_replay,
+    replay_workers,
+    simulate_batch
+)
+
+
+def random_log(seed, rng):
+    events = []
+    tick = 0
+    for _ in range(rng.randint(5, 120)):
+        tick += rng.randint(0, 10)
+        events.append((tick, rng.choice([UP, UP, UP, 1, LEFT, 3])))
+    return encode_replay(seed, events, tick + rng.randint(0, 40))
+
+
+def test_input_log_round_trips():
+    events = [(0, UP), (3, LEFT), (3, UP), (700, UP)]
+
+    data = encode_replay(0xDEADBEEF, events, 720)
+    seed, ticks, directions, end_tick = decode_replay(data)
+
+    assert seed == 0xDEADBEEF
+    assert list(zip(ticks.tolist(), directions.tolist())) == events
+    assert end_tick == 720
+    assert len(data) == 14
+
+
+@pytest.mark.parametrize("data", [b"", b"XX\x01\x00\x00\x00\x00\x00\x00", encode_replay(1, [(1, UP)], 5)[:-1]])
+def test_malformed_logs_are_rejected(data):
+    with pytest.raises(InvalidReplay):
+        decode_replay(data)
+
+
+def test_idle_player_scores_nothing():
+    result = simulate_batch([encode_replay(7, [], 200)], [7])[0]
+
+    assert result == {
+        "valid": True,
+        "score": 0,
+        "levels_completed": 0,
+        "lives": 3,
+        "finished": False,
+        "ticks": 200,
+        "duration_seconds": 10.0
+    }
+
+
+def test_replay_must_match_the_session_seed():
+    result = simulate_batch([encode_replay(7, [(0, UP)], 10)], [8])[0]
+
+    assert not result["valid"]
+
+
+def test_batched_results_match_individual_replays():
+    rng = random.Random(3)
+    seeds = [rng.getrandbits(32) for _ in range(150)]
+    logs = [random_log(seed, rng) for seed in seeds]
+
+    batched = simulate_batch(logs, seeds)
+    individual = [simulate_batch([log], [seed])[0] for log, seed in zip(logs, seeds)]
+
+    assert batched == individual
+    assert any(result["levels_completed"] for result in batched)
+    assert any(result["lives"] < 3 for result in batched)
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+def test_client_and_server_agree_on_the_same_input_logs():
+    rng = random.Random(35)
+    games = []
+    for _ in range(200):
+        events = []
+        tick = 0
+        for _ in range(rng.randint(20, 200)):
+            tick += rng.randint(1, 12)
+            events.append((tick, rng.choice([UP] * 6 + [1, LEFT, 3])))
+        games.append({"seed": rng.getrandbits(32), "events": events, "end_tick": tick + rng.randint(0, 200)})
+
+    # The client records and plays each game, the server replays its log
+    driver = Path(__file__).parent / "js" / "replay_parity.mjs"
+    output = subprocess.run(["node", str(driver)], input=json.dumps(games), capture_output=True, text=True, check=True)
+    client = json.loads(output.stdout)
+    server = simulate_batch([base64.b64decode(game["replay"]) for game in client], [game["seed"] for game in games])
+
+    fields = ("score", "levels_completed", "lives", "finished")
+    assert [{name: result[name] for name in fields} for result in server] == [{name: game[name] for name in fields} for game in client]
+    assert any(result["levels_completed"] and not result["finished"] for result in server)
+    assert any(result["finished"] and result["lives"] == 0 for result in server)
+
+
+def test_validator_batches_concurrent_requests():
+    validator = ReplayValidator(executor=None, batch_size=8, max_wait=0.01)
+    logs = [encode_replay(seed, [(0, UP)], 10) for seed in range(1, 21)]
+
+    async def run():
+        return await asyncio.gather(*(validator.validate(log, seed) for seed, log in enumerate(logs, 1)))
+
+    results = asyncio.run(run())
+
+    assert all(result["valid"] and result["score"] == 10 for result in results)
+    assert validator.metrics["batches"] == 3
+
+
+def test_replay_workers_default_to_a_share_of_the_cpus(monkeypatch):
+    monkeypatch.delenv("REPLAY_WORKERS", raising=False)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.setattr("os.cpu_count", lambda: 16)
+
+    assert replay_workers() == 4
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "32")
+    assert replay_workers() == 1
+
+    monkeypatch.setenv("REPLAY_WORKERS", "0")
+    assert replay_workers() == 0
+
+
+def test_zero_replay_workers_validate_without_a_process_pool(monkeypatch):
+    monkeypatch.setenv("REPLAY_WORKERS", "0")
+    validator = ReplayValidator.from_env()
+    assert validator.executor is None
+
+    result = asyncio.run(validator.validate(encode_replay(7, [], 200), 7))
+    validator.close()
+    assert result["valid"]
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+import server
+from session_reaper import ACTIVE, COMPLETED, EXPIRED
+
+WALLET = "wallet-a"
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    monkeypatch.setattr(server, "db", db)
+    started = datetime.now(timezone.utc) - timedelta(minutes=5)
+    asyncio.run(db.game_sessions.insert_one({
+        "id": "session-1",
+        "wallet_address": WALLET,
+        "start_time": started,
+        "last_seen": started,
+        "status": ACTIVE,
+        "replay_seed": 7
+    }))
+    return db
+
+
+def finish(session_id="session-1"):
+    session_data = {"session_id": session_id, "score": 2000, "levels_completed": 2, "replay": "UEwBBwAAAAAA"}
+    return asyncio.run(server.finish_game_session(session_data, "203.0.113.7", {"wallet_address": WALLET}))
+
+
+def status(db):
+    return asyncio.run(db.game_sessions.find_one({"id": "session-1"}))["status"]
+
+
+def test_expired_sessions_cannot_be_finished(db):
+    asyncio.run(db.game_sessions.update_one({"id": "session-1"}, {"$set": {"status": EXPIRED}}))
+
+    result = finish()
+
+    assert not result["replay_valid"] and not result["reward_awarded"]
+    assert "expired" in result["reward_reason"]
+    assert status(db) == EXPIRED
+
+
+def test_sessions_expired_during_validation_stay_expired(db, monkeypatch):
+    class ReaperRacingValidator:
+        async def validate(self, replay, seed):
+            await db.game_sessions.update_one({"id": "session-1"}, {"$set": {"status": EXPIRED}})
+            return {"valid": True, "score": 0, "levels_completed": 0, "duration_seconds": 0.0}
+
+    monkeypatch.setattr(server, "replay_validator", ReaperRacingValidator())
+
+    result = finish()
+
+    assert not result["replay_valid"] and not result["reward_awarded"]
+    assert status(db) == EXPIRED
+
+
+def test_sessions_are_finished_once(db, monkeypatch):
+    class Validator:
+        async def validate(self, replay, seed):
+            return {"valid": True, "score": 0, "levels_completed": 0, "duration_seconds": 0.0}
+
+    async def ineligible(wallet_address):
+        return {"eligible": False, "reason": "Not eligible"}
+
+    monkeypatch.setattr(server, "replay_validator", Validator())
+    monkeypatch.setattr(server, "score_leaderboards", server.ScoreLeaderboards(db))
+    monkeypatch.setattr(server, "check_reward_eligibility", ineligible)
+
+    assert finish()["replay_valid"]
+    assert status(db) == COMPLETED
+    assert not finish()["replay_valid"]
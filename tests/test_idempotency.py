@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from idempotency import IdempotencyStore
+
+
+@pytest.fixture
+def store(db):
+    store = IdempotencyStore(db, max_entries=2)
+    asyncio.run(store.ensure_indexes())
+    return store
+
+
+def counting_handler(calls, delay=0.0):
+    async def handler():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return {"success": True, "call": len(calls)}
+    return handler
+
+
+def test_repeated_key_replays_response(store):
+    calls = []
+
+    async def scenario():
+        first = await store.run("wallet:claim:a", {"reward_type": "game_completion"}, counting_handler(calls))
+        second = await store.run("wallet:claim:a", {"reward_type": "game_completion"}, counting_handler(calls))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert len(calls) == 1
+
+
+def test_concurrent_duplicates_wait_for_original(store):
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(*[
+            store.run("wallet:claim:b", {}, counting_handler(calls, delay=0.05)) for _ in range(5)
+        ])
+
+    responses = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(response == responses[0] for response in responses)
+
+
+def test_replay_survives_local_cache_eviction(store):
+    calls = []
+
+    async def scenario():
+        for key in ("c", "d", "e"):
+            await store.run(f"wallet:claim:{key}", {}, counting_handler(calls))
+        return await store.run("wallet:claim:c", {}, counting_handler(calls))
+
+    response = asyncio.run(scenario())
+    assert len(store.cache) == 2
+    assert response == {"success": True, "call": 1}
+    assert len(calls) == 3
+
+
+def test_key_reuse_with_different_payload_is_rejected(store):
+    async def scenario():
+        await store.run("wallet:claim:f", {"reward_type": "game_completion"}, counting_handler([]))
+        await store.run("wallet:claim:f", {"reward_type": "daily_bonus"}, counting_handler([]))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+
+
+def test_concurrent_duplicate_with_different_payload_is_rejected(store):
+    calls = []
+
+    async def scenario():
+        return await asyncio.gather(
+            store.run("wallet:claim:h", {"reward_type": "game_completion"}, counting_handler(calls, delay=0.05)),
+            store.run("wallet:claim:h", {"reward_type": "daily_bonus"}, counting_handler(calls)),
+            return_exceptions=True
+        )
+
+    original, duplicate = asyncio.run(scenario())
+    assert original == {"success": True, "call": 1}
+    assert isinstance(duplicate, HTTPException) and duplicate.status_code == 422
+    assert len(calls) == 1
+
+
+def test_failed_request_releases_key(store):
+    calls = []
+
+    async def failing():
+        raise RuntimeError("database unavailable")
+
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await store.run("wallet:claim:g", {}, failing)
+        return await store.run("wallet:claim:g", {}, counting_handler(calls))
+
+    assert asyncio.run(scenario()) == {"success": True, "call": 1}
@@ -0,0 +1,111 @@
+import asyncio
+import random
+import uuid
+
+from ip_limits import PrefixTrie, SubnetLimiter, parse_prefix_limits
+from reward_schema import RewardStore
+
+
+def grant(rewards, client_ip, amount):
+    return rewards.insert({
+        "id": str(uuid.uuid4()),
+        "wallet_address": "wallet",
+        "client_ip": client_ip,
+        "amount": amount,
+        "status": "completed"
+    })
+
+
+def test_trie_totals_match_brute_force():
+    rng = random.Random(7)
+    trie = PrefixTrie(32)
+    entries = []
+    for _ in range(2000):
+        # Cluster addresses into a few /16s so prefixes are shared
+        value = (rng.choice([10, 172, 192]) << 24) | (rng.randrange(4) << 16) | rng.randrange(1 << 16)
+        amount = rng.choice([0.5, 1.0, 2.0])
+        trie.add(value, amount)
+        entries.append((value, amount))
+
+    for value, _ in rng.sample(entries, 200):
+        for length in (0, 8, 16, 20, 24, 31, 32):
+            mask = trie.mask(length)
+            expected = sum(amount for other, amount in entries if other & mask == value & mask)
+            assert abs(trie.total(value, length) - expected) < 1e-9
+
+
+def test_subnet_cap_blocks_rotating_addresses():
+    limiter = SubnetLimiter({32: 10.0, 24: 5.0}, {128: 10.0, 64: 3.0})
+    for host in range(1, 6):
+        assert limiter.exceeded(f"203.0.113.{host}") is None
+        limiter.record(f"203.0.113.{host}", 1.0)
+
+    exhausted = limiter.exceeded("203.0.113.200")
+    assert exhausted["network"] == "203.0.113.0/24"
+    assert limiter.exceeded("203.0.114.1") is None
+
+
+def test_ipv6_and_mapped_addresses():
+    limiter = SubnetLimiter({32: 2.0}, {128: 10.0, 64: 3.0})
+    for suffix in ("1", "2", "3"):
+        limiter.record(f"2001:db8:0:1::{suffix}", 1.0)
+    limiter.record("::ffff:198.51.100.7", 2.0)
+
+    assert limiter.exceeded("2001:db8:0:1::ffff")["network"] == "2001:db8:0:1::/64"
+    assert limiter.exceeded("2001:db8:0:2::1") is None
+    assert limiter.exceeded("198.51.100.7")["prefix_length"] == 32
+
+
+def test_unparseable_addresses_fall_back_to_exact_match():
+    limiter = SubnetLimiter({32: 1.0}, {128: 1.0})
+    limiter.record("unknown", 1.0)
+
+    assert limiter.exceeded("unknown")["total"] == 1.0
+
+
+def test_parse_prefix_limits():
+    assert parse_prefix_limits("24:50, 16:200,") == {24: 50.0, 16: 200.0}
+
+
+def test_subnet_caps_are_off_by_default(monkeypatch):
+    monkeypatch.delenv("IPV4_SUBNET_LIMITS", raising=False)
+    monkeypatch.delenv("IPV6_SUBNET_LIMITS", raising=False)
+    monkeypatch.setenv("MAX_PURPE_PER_IP", "2")
+    limiter = SubnetLimiter.from_env()
+
+    assert limiter.limits == {4: [(32, 2.0)], 6: [(128, 2.0)]}
+
+
+def test_sync_picks_up_claims_granted_by_other_workers(db):
+    rewards = RewardStore(db)
+    mine, theirs = SubnetLimiter({32: 2.0}, {128: 2.0}), SubnetLimiter({32: 2.0}, {128: 2.0})
+
+    async def run():
+        await grant(rewards, "198.51.100.7", 2.0)
+        theirs.record("198.51.100.7", 2.0)
+        assert mine.exceeded("198.51.100.7") is None
+        await mine.hydrate(db, rewards)
+
+    asyncio.run(run())
+    assert mine.exceeded("198.51.100.7")["total"] == 2.0
+
+
+def test_claims_recorded_during_a_sync_are_kept(db):
+    rewards = RewardStore(db)
+    limiter = SubnetLimiter({32: 10.0}, {128: 10.0})
+    aggregate = rewards.collection.aggregate
+
+    async def aggregate_while_granting(pipeline, **kwargs):
+        async for result in aggregate(pipeline, **kwargs):
+            # A claim granted by this worker after the aggregation read Mongo
+            limiter.record("203.0.113.9", 1.0)
+            yield result
+
+    async def run():
+        await grant(rewards, "203.0.113.5", 1.0)
+        rewards.collection.aggregate = aggregate_while_granting
+        await limiter.hydrate(db, rewards)
+
+    asyncio.run(run())
+    assert limiter.usage("203.0.113.5")[0]["total"] == 1.0
+    assert limiter.usage("203.0.113.9")[0]["total"] == 1.0
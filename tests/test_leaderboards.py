@@ -0,0 +1,120 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from leaderboards import DAILY, GLOBAL, WEEKLY, ScoreBoard, ScoreLeaderboards, ensure_score_indexes, period_key
+
+AT = datetime(2025, 10, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(db):
+    asyncio.run(ensure_score_indexes(db))
+    return db
+
+
+def board(db, top_k):
+    return ScoreBoard(db.score_bests, GLOBAL, "all", top_k=top_k, refresh_seconds=60)
+
+
+def test_top_k_is_bounded_and_ordered(db):
+    scores = board(db, top_k=3)
+
+    async def run():
+        for index, score in enumerate([50, 10, 70, 30, 60]):
+            await scores.submit(f"wallet-{index}", score, AT + timedelta(seconds=index))
+        return await scores.page(0, 10), await scores.count()
+
+    page, total = asyncio.run(run())
+    assert [entry["score"] for entry in page] == [70, 60, 50]
+    assert len(scores.top) == 3
+    assert total == 5
+
+
+def test_improving_a_score_replaces_the_old_entry(db):
+    scores = board(db, top_k=3)
+
+    async def run():
+        await scores.submit("a", 10, AT)
+        await scores.submit("b", 20, AT)
+        assert not await scores.submit("a", 5, AT)
+        assert await scores.submit("a", 30, AT)
+        return await scores.page(0, 10)
+
+    assert [(entry["wallet_address"], entry["score"]) for entry in asyncio.run(run())] == [("a", 30), ("b", 20)]
+    assert asyncio.run(db.score_bests.count_documents({})) == 2
+
+
+def test_standing_ranks_ties_like_pages(db):
+    scores = board(db, top_k=2)
+
+    async def run():
+        # b and c tie on score, c got there first; d and e tie exactly
+        for wallet, score, seconds in [("a", 100, 0), ("b", 80, 5), ("c", 80, 1), ("e", 10, 0), ("d", 10, 0)]:
+            await scores.submit(wallet, score, AT + timedelta(seconds=seconds))
+        standings = {wallet: await scores.standing(wallet) for wallet in "abcde"}
+        return standings, await scores.page(0, 10), await scores.standing("missing")
+
+    standings, page, missing = asyncio.run(run())
+    assert [entry["wallet_address"] for entry in page] == ["a", "c"]
+    assert {wallet: standing["rank"] for wallet, standing in standings.items()} == {"a": 1, "c": 2, "b": 3, "d": 4, "e": 5}
+    assert [entry["rank"] for entry in page] == [standings["a"]["rank"], standings["c"]["rank"]]
+    assert standings["c"]["percentile"] == 80.0
+    assert missing is None
+
+
+def test_boards_in_other_workers_see_new_bests(db):
+    first, second = ScoreLeaderboards(db, refresh_seconds=0), ScoreLeaderboards(db, refresh_seconds=0)
+    now = datetime.now(timezone.utc)
+
+    async def run():
+        await first.submit("a", 100, now)
+        await second.submit("b", 200, now)
+        return await first.board(DAILY).page(0, 10), await second.board(DAILY).standing("a")
+
+    page, standing = asyncio.run(run())
+    assert [entry["wallet_address"] for entry in page] == ["b", "a"]
+    assert standing["rank"] == 2
+
+
+def test_rebuild_reads_windows_and_archive(db):
+    now = datetime.now(timezone.utc)
+
+    def game(wallet, score, age, valid=True):
+        return {
+            "wallet_address": wallet,
+            "status": "completed",
+            "final_score": score,
+            "end_time": now - age,
+            "replay_valid": valid
+        }
+
+    asyncio.run(db.game_sessions.insert_many([
+        game("a", 500, timedelta(0)),
+        game("b", 900, timedelta(days=10)),
+        game("c", 9999, timedelta(0), valid=False)
+    ]))
+    asyncio.run(db.game_sessions_archive.insert_one(game("d", 1200, timedelta(days=60))))
+
+    boards = ScoreLeaderboards(db)
+    assert asyncio.run(boards.rebuild()) > 0
+    assert asyncio.run(ScoreLeaderboards(db).rebuild()) == 0
+
+    def wallets(window):
+        return [entry["wallet_address"] for entry in asyncio.run(boards.board(window).page(0, 10))]
+
+    assert wallets(GLOBAL) == ["d", "b", "a"]
+    assert wallets(DAILY) == ["a"]
+    assert boards.periods[WEEKLY] == period_key(WEEKLY, now)
+
+
+def test_daily_board_rolls_over(db):
+    boards = ScoreLeaderboards(db)
+    yesterday = datetime(2025, 10, 1, 23, 0, tzinfo=timezone.utc)
+    asyncio.run(boards.board(DAILY, yesterday).submit("a", 10, yesterday))
+
+    today = boards.board(DAILY, yesterday + timedelta(hours=2))
+    assert asyncio.run(today.count()) == 0
+    # Kept for a day after the period ends
+    assert today.expires_at == datetime(2025, 10, 4, tzinfo=timezone.utc)
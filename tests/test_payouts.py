@@ -0,0 +1,215 @@
+import asyncio
+
+import pytest
+
+from payouts import (
+    CONFIRMED,
+    FAILED,
+    PACKET_DATA_SIZE,
+    PENDING,
+    SUBMITTED,
+    LocalPayoutRPC,
+    PayoutWorker,
+    enqueue_payout,
+    ensure_payout_indexes,
+    estimate_transaction_size,
+    max_transfers_per_transaction,
+    pack_transfers,
+    to_base_units
+)
+from reward_schema import RewardStore
+
+WALLET_A = "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"
+WALLET_B = "4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T"
+
+
+def make_payouts(count, wallets=None):
+    wallets = wallets or [f"wallet-{i}" for i in range(count)]
+    return [
+        {"id": f"payout-{i}", "wallet_address": wallets[i % len(wallets)], "amount": 1.0}
+        for i in range(count)
+    ]
+
+
+def test_pack_transfers_respects_packet_size():
+    batches = pack_transfers(make_payouts(100))
+
+    per_transaction = max_transfers_per_transaction()
+    assert len(batches) == -(-100 // per_transaction)
+    for batch in batches:
+        assert estimate_transaction_size(len(batch)) <= PACKET_DATA_SIZE
+
+
+def test_pack_transfers_merges_payouts_per_wallet():
+    payouts = make_payouts(5, wallets=[WALLET_A, WALLET_B])
+
+    [batch] = pack_transfers(payouts)
+
+    amounts = {transfer.wallet_address: transfer.amount for transfer in batch}
+    assert amounts == {WALLET_A: 3.0, WALLET_B: 2.0}
+    assert sorted(pid for transfer in batch for pid in transfer.payout_ids) == [p["id"] for p in payouts]
+
+
+def test_to_base_units():
+    assert to_base_units(0.5, 6) == 500000
+    assert to_base_units(1.1, 9) == 1100000000
+
+
+@pytest.fixture
+def db(db):
+    asyncio.run(ensure_payout_indexes(db, RewardStore(db)))
+    return db
+
+
+def run_cycles(worker, count=3):
+    async def cycles():
+        for _ in range(count):
+            await worker.run_once()
+    asyncio.run(cycles())
+
+
+def enqueue_all(db, payouts):
+    async def enqueue():
+        for payout in payouts:
+            await enqueue_payout(db, payout["id"], payout["wallet_address"], payout["amount"])
+    asyncio.run(enqueue())
+
+
+def statuses(db):
+    async def fetch():
+        return {p["id"]: p["status"] for p in await db.payouts.find({}).to_list(None)}
+    return asyncio.run(fetch())
+
+
+def test_worker_batches_and_confirms(db):
+    rpc = LocalPayoutRPC()
+    enqueue_all(db, make_payouts(50))
+
+    run_cycles(PayoutWorker(db, rpc, RewardStore(db)))
+
+    assert set(statuses(db).values()) == {CONFIRMED}
+    assert len(rpc.transactions) == len(pack_transfers(make_payouts(50)))
+    assert sum(rpc.ledger.values()) == 50.0
+
+
+class StealingRPC(LocalPayoutRPC):
+    """Lets a second worker take over expired leases while the first one is sending"""
+
+    def __init__(self, db):
+        super().__init__()
+        self.rival = PayoutWorker(db, self, RewardStore(db), lease_seconds=0)
+        self.stolen = False
+
+    async def send_transaction(self, transaction):
+        await super().send_transaction(transaction)
+        if not self.stolen:
+            self.stolen = True
+            await asyncio.sleep(0.01)
+            await self.rival.run_once()
+
+
+def test_expired_lease_is_not_paid_twice(db):
+    rpc = StealingRPC(db)
+    payouts = make_payouts(50)
+    enqueue_all(db, payouts)
+    assert len(pack_transfers(payouts)) > 1
+
+    run_cycles(PayoutWorker(db, rpc, RewardStore(db)))
+
+    assert set(statuses(db).values()) == {CONFIRMED}
+    assert sum(rpc.ledger.values()) == 50.0
+
+
+def test_payouts_lost_after_renewing_the_lease_are_not_sent(db):
+    rpc = LocalPayoutRPC()
+    enqueue_all(db, make_payouts(3))
+    worker = PayoutWorker(db, rpc, RewardStore(db))
+    rival = PayoutWorker(db, rpc, RewardStore(db), lease_seconds=0)
+
+    async def renew_then_lose(batch_id, payout_ids):
+        held = await PayoutWorker.renew_lease(worker, batch_id, payout_ids)
+        await asyncio.sleep(0.01)
+        await rival.run_once()
+        return held
+
+    worker.renew_lease = renew_then_lose
+    run_cycles(worker)
+
+    assert set(statuses(db).values()) == {CONFIRMED}
+    assert sum(rpc.ledger.values()) == 3.0
+    assert len(rpc.transactions) == 1
+
+
+def test_enqueue_is_idempotent(db):
+    rpc = LocalPayoutRPC()
+    payouts = make_payouts(3)
+    enqueue_all(db, payouts)
+    enqueue_all(db, payouts)
+
+    run_cycles(PayoutWorker(db, rpc, RewardStore(db)))
+
+    assert len(statuses(db)) == 3
+    assert sum(rpc.ledger.values()) == 3.0
+
+
+def test_dropped_transaction_is_retried_only_after_expiry(db):
+    rpc = LocalPayoutRPC(blockhash_ttl=10)
+    rpc.drop_sends = 1
+    worker = PayoutWorker(db, rpc, RewardStore(db), retry_backoff=0)
+    enqueue_all(db, make_payouts(2))
+
+    run_cycles(worker)
+    assert set(statuses(db).values()) == {SUBMITTED}
+    assert rpc.ledger == {}
+
+    rpc.advance_blocks(20)
+    run_cycles(worker)
+
+    assert set(statuses(db).values()) == {CONFIRMED}
+    assert rpc.ledger == {"wallet-0": 1.0, "wallet-1": 1.0}
+
+
+def test_payout_fails_after_max_attempts(db):
+    rpc = LocalPayoutRPC()
+    rpc.fail_on_chain = 2
+    worker = PayoutWorker(db, rpc, RewardStore(db), max_attempts=2, retry_backoff=0)
+    enqueue_all(db, make_payouts(1))
+
+    run_cycles(worker, count=1)
+    assert statuses(db) == {"payout-0": PENDING}
+
+    run_cycles(worker, count=1)
+    assert statuses(db) == {"payout-0": FAILED}
+    assert rpc.ledger == {}
+
+
+def test_sweep_queues_rewards_whose_enqueue_failed(db, monkeypatch):
+    import server
+    from eligibility_cache import EligibilityCache
+    from ip_limits import SubnetLimiter
+
+    async def eligible(wallet_address, demo_mode, client_ip):
+        return {"eligible": True}
+
+    async def unavailable(*args):
+        raise ConnectionError("payouts unavailable")
+
+    rewards = RewardStore(db)
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "reward_store", rewards)
+    monkeypatch.setattr(server, "ip_limiter", SubnetLimiter({32: 10.0}, {128: 10.0}))
+    monkeypatch.setattr(server, "eligibility_cache", EligibilityCache())
+    monkeypatch.setattr(server, "check_reward_eligibility", eligible)
+    monkeypatch.setattr(server, "enqueue_payout", unavailable)
+
+    response = asyncio.run(server.grant_reward("game_completion", "203.0.113.7", {"wallet_address": WALLET_A}))
+    assert response.success and statuses(db) == {}
+
+    rpc = LocalPayoutRPC()
+    # Too recent to tell apart from a claim that is still enqueueing
+    run_cycles(PayoutWorker(db, rpc, rewards), count=1)
+    assert statuses(db) == {}
+
+    run_cycles(PayoutWorker(db, rpc, rewards, sweep_grace=0))
+    assert statuses(db) == {response.payout_id: CONFIRMED}
+    assert rpc.ledger == {WALLET_A: 1.0}
@@ -0,0 +1,78 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from reward_rollups import (
+    ALL_TIME,
+    DAILY,
+    HOUR,
+    ROLLING_7D,
+    WEEKLY,
+    RollupPruner,
+    backfill_rollups,
+    ensure_rollup_indexes,
+    get_window_leaderboard,
+    mark_rollups_live,
+    record_reward
+)
+from reward_schema import RewardStore
+
+# A Wednesday
+NOW = datetime(2025, 10, 15, 12, 30, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(db):
+    asyncio.run(ensure_rollup_indexes(db))
+    return db
+
+
+def totals(db, window, now=NOW):
+    rows = asyncio.run(get_window_leaderboard(db, window, 10, now))
+    return {row["wallet_address"]: (row["total_rewards"], row["claims"]) for row in rows}
+
+
+def test_windows_merge_hourly_buckets(db):
+    for wallet, age in [("a", timedelta(hours=1)), ("a", timedelta(0)), ("b", timedelta(days=2)), ("c", timedelta(days=6))]:
+        asyncio.run(record_reward(db, wallet, 1.0, NOW - age))
+
+    assert totals(db, DAILY) == {"a": (2.0, 2)}
+    assert totals(db, WEEKLY) == {"a": (2.0, 2), "b": (1.0, 1)}
+    assert totals(db, ROLLING_7D) == {"a": (2.0, 2), "b": (1.0, 1), "c": (1.0, 1)}
+    assert totals(db, ALL_TIME)["a"] == (2.0, 2)
+
+
+def test_backfill_counts_rewards_before_the_cutoff_once(db):
+    rewards = RewardStore(db)
+    assert asyncio.run(backfill_rollups(db, rewards)) is None
+
+    async def claim(minutes_ago):
+        at = NOW - timedelta(minutes=minutes_ago)
+        await db.reward_transactions.insert_one({"wallet_address": "a", "amount": 1.5, "status": "completed", "created_at": at})
+        return at
+
+    async def run():
+        for minutes in (90, 5):
+            await claim(minutes)
+        await mark_rollups_live(db, NOW - timedelta(minutes=2))
+        # Rolled up live while the backfill runs; must not be counted again
+        await record_reward(db, "a", 1.5, await claim(1))
+        return await asyncio.gather(*(backfill_rollups(db, rewards) for _ in range(4)))
+
+    assert sorted(asyncio.run(run())) == [0, 0, 0, 3]
+    assert asyncio.run(backfill_rollups(db, rewards)) == 0
+    assert totals(db, DAILY) == {"a": (4.5, 3)}
+    assert totals(db, ALL_TIME) == {"a": (4.5, 3)}
+
+
+def test_pruning_drops_expired_hours_and_keeps_totals(db):
+    for days in (1, 6, 10, 120):
+        asyncio.run(record_reward(db, "a", 1.0, NOW - timedelta(days=days)))
+    pruner = RollupPruner(db, hourly_days=8)
+
+    assert asyncio.run(pruner.prune(NOW)) == 2
+    assert asyncio.run(db.reward_rollups.count_documents({"granularity": HOUR})) == 2
+    assert totals(db, ROLLING_7D) == {"a": (2.0, 2)}
+    assert totals(db, ALL_TIME) == {"a": (4.0, 4)}
+    assert asyncio.run(pruner.prune(NOW)) == 0
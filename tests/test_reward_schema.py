@@ -0,0 +1,113 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import bson
+
+from reward_schema import (
+    COMPACT_COLLECTION,
+    MIGRATION_ID,
+    RewardMigration,
+    RewardStore,
+    decode_reward,
+    encode_query,
+    encode_reward
+)
+
+WALLET = "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"
+START = datetime(2025, 10, 1)
+
+
+def reward(index, wallet=WALLET, **overrides):
+    record = {
+        "id": str(uuid.uuid4()),
+        "wallet_address": wallet,
+        "client_ip": f"10.0.0.{index % 250}",
+        "amount": 1.0,
+        "reward_type": "game_completion",
+        "transaction_signature": None,
+        "payout_status": "pending",
+        "status": "completed",
+        "demo_mode": False,
+        "created_at": START + timedelta(minutes=index)
+    }
+    record.update(overrides)
+    return record
+
+
+def test_compact_documents_round_trip():
+    signatures = [None, "ab" * 32, "5VERv8NMvzbJMEkV8xnrLkEaWRtSz9CosKDYjCJjBRnbJLgp8uirBgmQpjKhoR4tjF3ZpRzrFmBV6UjKdiSZkQUW"]
+    for signature in signatures:
+        for client_ip in ("203.0.113.7", "2001:db8::1", "2001:DB8::1", "testclient", None):
+            record = reward(1, client_ip=client_ip, transaction_signature=signature)
+            assert decode_reward(encode_reward(record)) == {**record, "_id": record["id"]}
+
+    record = reward(1, wallet="not a wallet")
+    assert decode_reward(encode_reward(record))["wallet_address"] == "not a wallet"
+
+
+def test_compact_documents_are_smaller():
+    record = reward(1, transaction_signature="ab" * 32, payout_status="confirmed")
+
+    assert len(bson.encode(encode_reward(record))) < 0.6 * len(bson.encode(record))
+
+
+def test_queries_use_compact_names_and_values():
+    query = encode_query({"wallet_address": WALLET, "id": {"$in": [str(uuid.UUID(int=1))]}, "$or": [{"status": "completed"}]})
+
+    assert set(query) == {"w", "_id", "$or"}
+    assert isinstance(query["w"], bytes) and len(query["w"]) == 32
+    assert query["$or"] == [{"st": "completed"}]
+
+
+def test_compact_store_serves_legacy_shaped_rows(db):
+    store = RewardStore(db, compact=True)
+    records = [reward(index) for index in range(5)]
+    for record in records:
+        asyncio.run(store.insert(record))
+    asyncio.run(store.update_many({"id": {"$in": [records[0]["id"]]}}, {"$set": {"payout_status": "confirmed", "transaction_signature": "cd" * 32}}))
+
+    async def newest():
+        return [row async for row in store.find({"wallet_address": WALLET}, sort=[("created_at", -1), ("_id", -1)], limit=2)]
+
+    rows = asyncio.run(newest())
+    assert [row["id"] for row in rows] == [records[4]["id"], records[3]["id"]]
+    assert rows[0]["client_ip"] == records[4]["client_ip"]
+    confirmed = asyncio.run(db[COMPACT_COLLECTION].find_one({"p": "confirmed"}))
+    assert decode_reward(confirmed)["transaction_signature"] == "cd" * 32
+
+
+def test_migration_copies_resumes_and_completes(db):
+    asyncio.run(db.reward_transactions.insert_many([reward(index) for index in range(25)]))
+    dual = RewardStore(db, dual_write=True)
+    late = reward(99)
+    asyncio.run(dual.insert(late))
+
+    migration = RewardMigration(db, batch_size=10)
+    asyncio.run(migration.run_pass(asyncio.run(migration.state())))
+    # Simulate an interrupted run: rewind the checkpoint and start over
+    asyncio.run(db.migrations.update_one({"_id": MIGRATION_ID}, {"$set": {"last_id": None}}))
+    state = asyncio.run(RewardMigration(db, batch_size=10).run())
+
+    assert state["completed_at"]
+    assert asyncio.run(db[COMPACT_COLLECTION].count_documents({})) == 26
+    assert asyncio.run(RewardStore.open(db)).compact
+
+
+def test_migration_reconciles_rows_updated_mid_copy(db):
+    record = reward(1)
+    asyncio.run(db.reward_transactions.insert_one(dict(record)))
+    # A stale copy, as if a payout update landed between the read and the copy
+    asyncio.run(db[COMPACT_COLLECTION].insert_one(encode_reward(record)))
+    asyncio.run(db.reward_transactions.update_one({"id": record["id"]}, {"$set": {"payout_status": "confirmed"}}))
+
+    migration = RewardMigration(db)
+    asyncio.run(migration.run())
+
+    stored = asyncio.run(db[COMPACT_COLLECTION].find_one({}))
+    assert decode_reward(stored)["payout_status"] == "confirmed"
+    assert migration.metrics["reconciled"] == 1
+
+
+def test_empty_databases_start_compact(db):
+    assert asyncio.run(RewardStore.open(db)).compact
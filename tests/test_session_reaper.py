@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from session_reaper import ACTIVE, COMPLETED, EXPIRED, SessionReaper, ensure_session_indexes
+
+
+@pytest.fixture
+def db(db):
+    asyncio.run(ensure_session_indexes(db))
+    return db
+
+
+def session(session_id, status, age, **fields):
+    started = datetime.now(timezone.utc) - age
+    return {
+        "id": session_id,
+        "wallet_address": "wallet-a",
+        "start_time": started,
+        "status": status,
+        "current_level": 1,
+        "score": 0,
+        "lives": 3,
+        **fields
+    }
+
+
+def test_abandoned_sessions_are_expired_in_batches(db):
+    rows = [session(f"old-{i}", ACTIVE, timedelta(hours=3)) for i in range(7)]
+    rows.append(session("fresh", ACTIVE, timedelta(minutes=5)))
+    asyncio.run(db.game_sessions.insert_many(rows))
+    reaper = SessionReaper(db, idle_seconds=7200, batch_size=3, min_pause=0)
+
+    assert asyncio.run(reaper.expire_abandoned()) == 7
+    assert reaper.metrics["batches"] == 3
+    assert asyncio.run(db.game_sessions.count_documents({"status": EXPIRED})) == 7
+    assert asyncio.run(db.game_sessions.find_one({"id": "fresh"}))["status"] == ACTIVE
+
+
+def test_idle_window_runs_from_when_the_session_was_last_seen(db):
+    now = datetime.now(timezone.utc)
+    asyncio.run(db.game_sessions.insert_many([
+        session("long-game", ACTIVE, timedelta(hours=3), last_seen=now - timedelta(minutes=1)),
+        session("gone-quiet", ACTIVE, timedelta(hours=4), last_seen=now - timedelta(hours=3)),
+        session("unseen-legacy", ACTIVE, timedelta(hours=3))
+    ]))
+    reaper = SessionReaper(db, idle_seconds=7200, min_pause=0)
+
+    assert asyncio.run(reaper.expire_abandoned()) == 2
+    active = {doc["id"] for doc in asyncio.run(db.game_sessions.find({"status": ACTIVE}).to_list(None))}
+    assert active == {"long-game"}
+
+
+def test_old_finished_sessions_move_to_the_archive(db):
+    old_end = datetime.now(timezone.utc) - timedelta(days=40)
+    asyncio.run(db.game_sessions.insert_many([
+        session("old", COMPLETED, timedelta(days=40), end_time=old_end, final_score=120, levels_completed=2),
+        session("recent", COMPLETED, timedelta(days=1), end_time=datetime.now(timezone.utc)),
+        session("playing", ACTIVE, timedelta(days=40))
+    ]))
+    # A previous sweep copied "old" but died before deleting it
+    asyncio.run(db.game_sessions_archive.insert_one({"_id": "old", "status": COMPLETED}))
+    reaper = SessionReaper(db, retention_days=30, min_pause=0)
+
+    assert asyncio.run(reaper.archive_old()) == 1
+    remaining = {doc["id"] for doc in asyncio.run(db.game_sessions.find({}).to_list(None))}
+    assert remaining == {"recent", "playing"}
+    assert asyncio.run(db.game_sessions_archive.count_documents({})) == 1
+
+
+def test_archived_documents_drop_live_play_fields(db):
+    old_end = datetime.now(timezone.utc) - timedelta(days=40)
+    asyncio.run(db.game_sessions.insert_one(
+        session("old", COMPLETED, timedelta(days=40), end_time=old_end, final_score=120, levels_completed=2)
+    ))
+
+    asyncio.run(SessionReaper(db, retention_days=30, min_pause=0).sweep())
+
+    archived = asyncio.run(db.game_sessions_archive.find_one({"_id": "old"}))
+    assert archived["final_score"] == 120
+    assert not {"lives", "score", "current_level", "id"} & set(archived)
@@ -0,0 +1,66 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone, timedelta
+
+import httpx
+import pytest
+
+import server
+from ip_limits import SubnetLimiter
+from leaderboards import ScoreLeaderboards
+from reward_schema import RewardStore
+
+WALLET_A = "9WzDXwBbmkg8ZTbNMqUxvQRAyrZzDsGYdLVL9zYtAWWM"
+WALLET_B = "4Nd1mBQtrMJVYVfKf2PJy9NZUZdTAsp7D4xWLs4gDB4T"
+
+
+@pytest.fixture
+def db(db, monkeypatch):
+    rewards = RewardStore(db, compact=True)
+    monkeypatch.setattr(server, "db", db)
+    monkeypatch.setattr(server, "reward_store", rewards)
+    monkeypatch.setattr(server, "ip_limiter", SubnetLimiter({32: 10.0}, {128: 10.0}))
+    monkeypatch.setattr(server, "score_leaderboards", ScoreLeaderboards(db))
+    monkeypatch.setattr(server, "user_rewards_today", {})
+    monkeypatch.setattr(server, "startup_state", dict(server.startup_state, ready=False))
+
+    now = datetime.now(timezone.utc)
+
+    async def grant(wallet_address, amount, created_at, status="completed"):
+        await rewards.insert({
+            "id": str(uuid.uuid4()),
+            "wallet_address": wallet_address,
+            "client_ip": "203.0.113.7",
+            "amount": amount,
+            "status": status,
+            "created_at": created_at
+        })
+
+    async def seed():
+        await grant(WALLET_A, 1.0, now)
+        await grant(WALLET_A, 0.5, now)
+        await grant(WALLET_A, 2.0, now, status="failed")
+        # Only today's claims count toward the daily limits
+        await grant(WALLET_B, 2.0, now - timedelta(days=1, hours=1))
+
+    asyncio.run(seed())
+    return db
+
+
+def test_ready_only_after_reward_state_is_hydrated(db):
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            before = await client.get("/api/ready")
+            await server.warm_start()
+            return before, await client.get("/api/ready")
+
+    before, response = asyncio.run(run())
+    assert before.status_code == 503
+
+    counters = server.user_rewards_today[server.get_daily_key(WALLET_A)]
+    assert (counters["count"], counters["total_amount"]) == (2, 1.5)
+    assert server.get_daily_key(WALLET_B) not in server.user_rewards_today
+    assert server.ip_limiter.usage("203.0.113.7")[0]["total"] == 3.5
+    assert response.status_code == 200
+    assert response.json()["hydrated_wallets"] == 1
+    assert response.json()["hydrated_ips"] == 1